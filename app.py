@@ -2,57 +2,92 @@
 Main Flask Application
 """
 
-from flask import Flask, jsonify, send_from_directory
+import atexit
+import logging
+from flask import Flask, Response, jsonify, send_from_directory
 from routes import create_routes
 from database import DatabaseManager
+from utils.serialization import configure_json
+from utils.http_cache import compress_response
+from utils.static_assets import StaticAssets
+from utils.logging_setup import configure_logging
+from utils.metrics import REGISTRY, start_request_timer, observe_request
+from utils.profiler import start_request_hooks, finish_request_hooks, attach_trace
+from config import UPDATE_FLUSH_SECONDS
 import os
 
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
-def create_app():
-    """Create and configure Flask app"""
-    app = Flask(
-        __name__,
-        static_folder=FRONTEND_DIR,
-        static_url_path=""
-    )
+def create_app(preload: bool = False, start_background: bool = None):
+    """
+    Create and configure Flask app
+    
+    Args:
+        preload: Load the embedding model, spaCy and the question index up
+                 front (used by wsgi.py before a pre-fork server forks)
+        start_background: Start background threads now; defaults to
+                          not preload (pre-forked workers start their own
+                          via start_background_tasks)
+    """
+    if start_background is None:
+        start_background = not preload
+    configure_logging()
+    
+    # Frontend files are served by serve_frontend below, not Flask's static route
+    app = Flask(__name__, static_folder=None)
     
     # Configuration
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     app.config['JSON_SORT_KEYS'] = False
+    configure_json(app)  # orjson-backed jsonify when available
+    # after_request hooks run in reverse order: latency includes compression,
+    # and ?trace=1 adds its breakdown before the body is compressed
+    app.before_request(start_request_timer)
+    app.before_request(start_request_hooks)  # Sampling profiler, ?trace=1
+    app.after_request(observe_request)
+    app.after_request(compress_response)  # gzip/brotli above COMPRESSION_MIN_BYTES
+    app.after_request(attach_trace)
+    app.teardown_request(finish_request_hooks)
     
     # Initialize database
-    db_path = os.getenv('DATABASE_PATH', 'interview_system.db')
+    db_path = DatabaseManager().db_path
     if not os.path.exists(db_path):
-        print("🔄 Initializing database...")
+        logger.info("Initializing database", extra={'db_path': db_path})
         from database.init_db import init_database
         init_database(db_path)
+    else:
+        from database.init_db import migrate_database
+        migrate_database(db_path)
     
     # Register routes
-    api_routes = create_routes()
+    api_routes = create_routes(preload=preload, start_background=start_background)
     app.register_blueprint(api_routes, url_prefix='/api')
     
+    # Frontend: fingerprinted, precompressed assets (read from disk in debug mode)
+    static_assets = StaticAssets(FRONTEND_DIR)
+    
+    def serve_frontend(path):
+        if not app.debug:
+            response = static_assets.serve(path)
+            if response is not None:
+                return response
+        return send_from_directory(FRONTEND_DIR, path)
+    
     # Root endpoint
     @app.route('/')
     def index():
-        return send_from_directory(FRONTEND_DIR, "index.html")
-        return jsonify({
-            'service': 'AI Interview Preparation System',
-            'version': '1.0.0',
-            'endpoints': {
-                'health': '/api/health',
-                'stats': '/api/stats',
-                'parse_resume': '/api/parse-resume [POST]',
-                'create_profile': '/api/create-profile [POST]',
-                'retrieve_questions': '/api/retrieve-questions/<candidate_id> [GET]',
-                'record_response': '/api/record-response [POST]',
-                'add_question': '/api/add-question [POST]'
-            }
-        })
+        return serve_frontend("index.html")
+    
+    # Prometheus scrape endpoint (totals across all workers when METRICS_DIR is set)
+    @app.route('/metrics')
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
     
     @app.route("/<path:path>")
     def serve_static(path):
-        return send_from_directory(FRONTEND_DIR, path)
+        return serve_frontend(path)
 
     
     # Error handlers
@@ -66,8 +101,20 @@ def create_app():
     
     return app
 
+def start_background_tasks(app):
+    """Start the app's background threads in the current process (e.g. after fork)"""
+    app.extensions['maintenance'].start()
+
+def stop_background_tasks(app, timeout: float = UPDATE_FLUSH_SECONDS):
+    """Apply the queued profile updates before the process exits"""
+    update_queue = app.extensions['update_queue']
+    if not update_queue.flush(timeout):
+        stats = update_queue.stats()
+        logger.warning("Profile updates dropped at exit", extra={
+            'queue_depth': stats['queue_depth'], 'in_flight': stats['in_flight']})
+
 if __name__ == '__main__':
     app = create_app()
-    print("\n🚀 Starting AI Interview System...")
-    print("📝 API Documentation available at: http://localhost:5000/")
+    atexit.register(stop_background_tasks, app)
+    logger.info("Starting AI Interview System", extra={'url': 'http://localhost:5000/'})
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
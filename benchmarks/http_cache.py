@@ -0,0 +1,101 @@
+"""
+HTTP caching / compression benchmark
+
+For each endpoint, compares bytes on the wire and latency of a plain
+request, gzip and brotli responses, and a conditional re-request that is
+answered with 304 Not Modified. Runs in-process against the Flask app.
+
+Usage:
+    python -m benchmarks.http_cache [--candidate ID] [--repeat 30]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+
+
+def measure(client, url: str, headers: Dict, repeat: int) -> Dict:
+    """Median / p95 latency in ms and body size for one request shape"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        body = response.data
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'status': response.status_code,
+        'bytes': len(body),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[int(0.95 * (len(timings) - 1))], 3)
+    }
+
+
+def endpoints(candidate_id: str, static_paths: List[str]) -> List[str]:
+    return [
+        f'/api/retrieve-questions/{candidate_id}?max_questions=10',
+        f'/api/retrieve-questions/{candidate_id}?max_questions=10&fields=all',
+        f'/api/candidate/{candidate_id}',
+        '/api/database-summary',
+        '/'
+    ] + static_paths
+
+
+def run(candidate_id: str = None, repeat: int = 30) -> List[Dict]:
+    from app import create_app
+    from database import DatabaseManager
+    import re
+
+    app = create_app()
+    client = app.test_client()
+
+    if candidate_id is None:
+        conn = DatabaseManager().get_connection()
+        row = conn.execute('SELECT candidate_id FROM candidate_profiles LIMIT 1').fetchone()
+        conn.close()
+        if row is None:
+            raise SystemExit("No candidates in the database; pass --candidate")
+        candidate_id = row['candidate_id']
+
+    html = client.get('/').get_data(as_text=True)
+    static_paths = ['/' + path for path in re.findall(r'(?:src|href)="((?:js|css)/[^"]+)"', html)][:2]
+
+    results = []
+    for url in endpoints(candidate_id, static_paths):
+        plain = client.get(url)
+        etag = plain.headers.get('ETag')
+        shapes = {
+            'identity': {},
+            'gzip': {'Accept-Encoding': 'gzip'},
+            'br': {'Accept-Encoding': 'br'}
+        }
+        if etag:
+            shapes['304'] = {'If-None-Match': etag, 'Accept-Encoding': 'br, gzip'}
+
+        for shape, headers in shapes.items():
+            results.append(dict(url=url, shape=shape, **measure(client, url, headers, repeat)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--candidate', help='Candidate to query (default: first in the database)')
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.candidate, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'url':<60} {'shape':>8} {'status':>6} {'bytes':>8} {'median ms':>10} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['url'][:60]:<60} {r['shape']:>8} {r['status']:>6} {r['bytes']:>8} "
+              f"{r['median_ms']:>10} {r['p95_ms']:>8}")
+
+
+if __name__ == '__main__':
+    main()
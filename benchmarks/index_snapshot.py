@@ -0,0 +1,122 @@
+"""
+Question index cold / warm start benchmark
+
+Builds a throwaway database with N synthetic questions and times:
+  legacy       QuestionIndex from get_all_questions() (SELECT * + JSON decode)
+  full_build   Stream rows into columns and publish a snapshot generation
+  warm_start   Attach the current snapshot (mmap) and answer one query
+  incremental  Refresh after inserting --changes new questions
+
+Usage:
+    python -m benchmarks.index_snapshot [--questions 10000 100000] [--changes 100]
+
+A million questions needs roughly 5 GB of free disk for the database.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+from config import VECTOR_DIMENSION
+
+
+def insert_synthetic(db, count: int, seed: int) -> None:
+    """Bulk insert normalized random questions in one transaction"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now().isoformat()
+    conn = db.get_connection()
+    batch = 10000
+    for start in range(0, count, batch):
+        n = min(batch, count - start)
+        vectors = rng.standard_normal((n, VECTOR_DIMENSION)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        conn.executemany('INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(
+            str(uuid.uuid4()),
+            f'Synthetic question {start + i}',
+            ('technical', 'behavioral', 'situational')[(start + i) % 3],
+            ('easy', 'medium', 'hard')[(start + i) % 3],
+            json.dumps([f'topic-{(start + i) % 50}']),
+            json.dumps(['Engineer']),
+            json.dumps(np.round(vectors[i], 6).tolist()),
+            '[]',
+            now,
+            now
+        ) for i in range(n)])
+    conn.commit()
+    conn.close()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, round(time.perf_counter() - started, 4)
+
+
+def run(count: int, changes: int, seed: int = 0) -> Dict:
+    from database import DatabaseManager
+    from database.init_db import init_database
+    from services.question_index import QuestionIndex
+    from services.index_store import QuestionIndexStore
+
+    workdir = tempfile.mkdtemp(prefix='index-bench-')
+    try:
+        db_path = os.path.join(workdir, 'bench.db')
+        init_database(db_path)
+        db = DatabaseManager(db_path)
+        insert_synthetic(db, count, seed)
+        store_dir = os.path.join(workdir, 'bench.db.index')
+        query = np.ones(VECTOR_DIMENSION, dtype=np.float32) / np.sqrt(VECTOR_DIMENSION)
+
+        _, legacy = timed(lambda: QuestionIndex(db.get_all_questions(),
+                                                db.get_question_ordinals()))
+        _, full_build = timed(lambda: QuestionIndexStore(store_dir).refresh(db, force=True))
+
+        def warm():
+            store = QuestionIndexStore(store_dir)
+            index = store.load(store.refresh(db))
+            return index.top_k(index.scores(query), 10)
+        _, warm_start = timed(warm)
+
+        insert_synthetic(db, changes, seed + 1)
+        _, incremental = timed(lambda: QuestionIndexStore(store_dir).refresh(db))
+
+        return {
+            'questions': count,
+            'changes': changes,
+            'legacy_s': legacy,
+            'full_build_s': full_build,
+            'warm_start_s': warm_start,
+            'incremental_s': incremental,
+            'db_mb': round(os.path.getsize(db_path) / 1e6, 1)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--questions', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--changes', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results: List[Dict] = [run(count, args.changes) for count in args.questions]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'questions':>9} {'legacy s':>9} {'full build s':>12} {'warm start s':>12} "
+          f"{'incremental s':>13} {'db MB':>8}")
+    for r in results:
+        print(f"{r['questions']:>9} {r['legacy_s']:>9} {r['full_build_s']:>12} "
+              f"{r['warm_start_s']:>12} {r['incremental_s']:>13} {r['db_mb']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""
+Closed-loop load test replaying interview sessions
+
+Every virtual candidate runs the real flow in a loop until the test ends:
+
+  POST /api/full-resume-processing    resume text -> candidate_id
+  GET  /api/diverse-questions/<id>    overview across categories
+  then for each answer:
+    GET  /api/adaptive-questions/<id>?last_score=...
+    POST /api/record-response
+
+with an exponentially distributed think time before each request. The
+app runs in-process (Flask test client, one per candidate thread) or is
+reached over HTTP. Reports p50/p95/p99 per endpoint, errors by kind
+(HTTP status, "database is locked", connection failures) and throughput
+per interval.
+
+Usage:
+    python -m benchmarks.load_test [--url http://127.0.0.1:5000] [--concurrency 16]
+        [--duration 60] [--think-time 1.0] [--answers 5] [--json]
+    python -m benchmarks.load_test --synthetic 10000 --embedding-backend hashing
+
+Without --url the app is created in this process against DATABASE_PATH
+(or --db, or a temporary --synthetic database).
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (status, decoded JSON body or None); status 0 means no response
+Response = Tuple[int, Optional[Dict]]
+
+
+# ============================================================
+# TRANSPORTS
+# ============================================================
+
+class InProcessTransport:
+    """Requests through the Flask test client; no sockets involved"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self) -> Callable[[str, str, Optional[Dict]], Response]:
+        test_client = self.app.test_client()
+
+        def send(method: str, path: str, payload: Optional[Dict] = None) -> Response:
+            response = test_client.open(path, method=method, json=payload)
+            return response.status_code, response.get_json(silent=True)
+
+        return send
+
+
+class HttpTransport:
+    """Requests over HTTP to a running server"""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def client(self) -> Callable[[str, str, Optional[Dict]], Response]:
+        def send(method: str, path: str, payload: Optional[Dict] = None) -> Response:
+            data = json.dumps(payload).encode() if payload is not None else None
+            request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return response.status, _decode(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, _decode(e.read())
+
+        return send
+
+
+def _decode(body: bytes) -> Optional[Dict]:
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+# ============================================================
+# RESULTS
+# ============================================================
+
+class Recorder:
+    """Thread-safe latency, error and timeline collection"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(list)
+        self._errors = Counter()
+        self._empty = Counter()
+        self._timeline = defaultdict(lambda: [0, 0])  # bucket -> [ok, errors]
+        self.sessions = 0
+
+    @staticmethod
+    def classify(status: int, body: Optional[Dict], exception: Optional[Exception]) -> Optional[str]:
+        """None for success, otherwise the error kind"""
+        if exception is not None:
+            if isinstance(exception, TimeoutError) or 'timed out' in str(exception):
+                return 'timeout'
+            return f'connection ({type(exception).__name__})'
+        message = str((body or {}).get('error', ''))
+        if 'database is locked' in message:
+            return 'database is locked'
+        if status >= 400:
+            return f'http {status}'
+        return None
+
+    def record(self, endpoint: str, seconds: float, error: Optional[str]) -> None:
+        bucket = int((time.monotonic() - self.started) / self.interval)
+        with self._lock:
+            self._timeline[bucket][1 if error else 0] += 1
+            if error:
+                self._errors[(endpoint, error)] += 1
+            else:
+                self._latencies[endpoint].append(seconds)
+
+    def empty(self, endpoint: str) -> None:
+        """A successful retrieval that returned no questions"""
+        with self._lock:
+            self._empty[endpoint] += 1
+
+    def session_done(self) -> None:
+        with self._lock:
+            self.sessions += 1
+
+    def report(self, elapsed: float) -> Dict:
+        with self._lock:
+            endpoints = {}
+            for endpoint in sorted(set(self._latencies) | {e for e, _ in self._errors}):
+                latencies = sorted(self._latencies.get(endpoint, []))
+                errors = sum(n for (e, _), n in self._errors.items() if e == endpoint)
+                endpoints[endpoint] = {
+                    'requests': len(latencies) + errors,
+                    'errors': errors,
+                    'empty_results': self._empty.get(endpoint, 0),
+                    'p50_ms': _percentile(latencies, 0.50),
+                    'p95_ms': _percentile(latencies, 0.95),
+                    'p99_ms': _percentile(latencies, 0.99),
+                    'throughput_rps': round(len(latencies) / elapsed, 2)
+                }
+            total_ok = sum(len(v) for v in self._latencies.values())
+            total_errors = sum(self._errors.values())
+            return {
+                'elapsed_s': round(elapsed, 1),
+                'sessions_completed': self.sessions,
+                'requests': total_ok + total_errors,
+                'errors': total_errors,
+                'throughput_rps': round(total_ok / elapsed, 2),
+                'endpoints': endpoints,
+                'errors_by_kind': [{'endpoint': e, 'kind': kind, 'count': n}
+                                   for (e, kind), n in self._errors.most_common()],
+                'timeline': [{'t_s': round(bucket * self.interval, 1),
+                              'rps': round(ok / self.interval, 2),
+                              'errors': failed}
+                             for bucket, (ok, failed) in sorted(self._timeline.items())]
+            }
+
+
+def _percentile(sorted_seconds: List[float], p: float) -> Optional[float]:
+    if not sorted_seconds:
+        return None
+    return round(sorted_seconds[int(p * (len(sorted_seconds) - 1))] * 1000, 2)
+
+
+# ============================================================
+# VIRTUAL CANDIDATES
+# ============================================================
+
+class CandidateLoop:
+    """One closed-loop virtual candidate: a session, then the next one"""
+
+    def __init__(self, send, recorder: Recorder, resumes: List[str], args, seed: int):
+        self.send = send
+        self.recorder = recorder
+        self.resumes = resumes
+        self.args = args
+        self.rng = random.Random(seed)
+
+    def call(self, endpoint: str, method: str, path: str,
+             payload: Optional[Dict] = None) -> Optional[Dict]:
+        """Send one request and record it; returns the body on success"""
+        status, body, exception = 0, None, None
+        started = time.perf_counter()
+        try:
+            status, body = self.send(method, path, payload)
+        except Exception as e:  # Connection refused/reset, timeouts
+            exception = e
+        error = self.recorder.classify(status, body, exception)
+        self.recorder.record(endpoint, time.perf_counter() - started, error)
+        return None if error else (body or {})
+
+    def think(self, stop_at: float) -> bool:
+        """Pause like a person would; False once the test is over"""
+        if self.args.think_time > 0:
+            time.sleep(min(self.rng.expovariate(1.0 / self.args.think_time),
+                           max(0.0, stop_at - time.monotonic())))
+        return time.monotonic() < stop_at
+
+    def session(self, stop_at: float) -> None:
+        # Resumes are replayed from a fixed pool, so every one after the first
+        # upload is a duplicate: accept it rather than measure 409s
+        body = self.call('POST /api/full-resume-processing', 'POST', '/api/full-resume-processing',
+                         {'resume_text': self.rng.choice(self.resumes), 'allow_duplicate': True})
+        if body is None or not self.think(stop_at):
+            return
+        candidate_id = body['candidate_id']
+
+        body = self.call('GET /api/diverse-questions', 'GET',
+                         f'/api/diverse-questions/{candidate_id}?per_category={self.args.per_category}')
+        overview = [q['question_id'] for q in (body or {}).get('questions', [])]
+
+        last_score = None
+        for _ in range(self.args.answers):
+            if not self.think(stop_at):
+                return
+            path = f'/api/adaptive-questions/{candidate_id}?max_questions=1'
+            if last_score is not None:
+                path += f'&last_score={last_score}'
+            body = self.call('GET /api/adaptive-questions', 'GET', path)
+            if body is None:
+                return
+            questions = body.get('questions') or []
+            if not questions:
+                self.recorder.empty('GET /api/adaptive-questions')
+            # Nothing above the similarity threshold: answer from the overview
+            question_id = questions[0]['question_id'] if questions else (
+                overview.pop(0) if overview else None)
+            if question_id is None or not self.think(stop_at):
+                return
+
+            knowledge = round(self.rng.uniform(0.3, 1.0), 2)
+            speech = round(self.rng.uniform(0.3, 1.0), 2)
+            self.call('POST /api/record-response', 'POST', '/api/record-response', {
+                'candidate_id': candidate_id,
+                'question_id': question_id,
+                'answer_text': 'An answer covering the main points with an example.',
+                'knowledge_score': knowledge,
+                'speech_score': speech
+            })
+            last_score = round(0.6 * knowledge + 0.4 * speech, 2)
+        self.recorder.session_done()
+
+    def run(self, start_at: float, stop_at: float) -> None:
+        time.sleep(max(0.0, start_at - time.monotonic()))
+        while time.monotonic() < stop_at:
+            self.session(stop_at)
+
+
+def run_load(transport, resumes: List[str], args) -> Dict:
+    """Run args.concurrency candidates for args.duration seconds"""
+    recorder = Recorder(args.interval)
+    now = time.monotonic()
+    stop_at = now + args.ramp_up + args.duration
+    loops = [CandidateLoop(transport.client(), recorder, resumes, args, seed=args.seed + i)
+             for i in range(args.concurrency)]
+    threads = [threading.Thread(target=loop.run, daemon=True,
+                                args=(now + args.ramp_up * i / max(args.concurrency, 1), stop_at))
+               for i, loop in enumerate(loops)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report = recorder.report(time.monotonic() - recorder.started)
+    report['config'] = {k: getattr(args, k) for k in
+                        ('url', 'concurrency', 'duration', 'ramp_up', 'think_time', 'answers')}
+    return report
+
+
+def synthetic_resumes(count: int, seed: int) -> List[str]:
+    """Plain-text resumes from the synthetic data generator"""
+    from database.synthetic_data import SyntheticDataGenerator
+    from benchmarks.suite import resumes, resume_text
+
+    return [resume_text(r) for r in resumes(SyntheticDataGenerator(seed=seed), count)]
+
+
+def print_report(report: Dict) -> None:
+    print(f"\n{report['sessions_completed']} sessions, {report['requests']} requests, "
+          f"{report['errors']} errors, {report['throughput_rps']} req/s "
+          f"over {report['elapsed_s']} s")
+    print(f"\n{'endpoint':<34} {'requests':>8} {'errors':>7} {'empty':>6} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for endpoint, s in report['endpoints'].items():
+        print(f"{endpoint:<34} {s['requests']:>8} {s['errors']:>7} {s['empty_results']:>6} "
+              f"{str(s['p50_ms']):>9} {str(s['p95_ms']):>9} {str(s['p99_ms']):>9} "
+              f"{s['throughput_rps']:>8}")
+    if report['errors_by_kind']:
+        print('\nerrors')
+        for e in report['errors_by_kind']:
+            print(f"  {e['count']:>6}  {e['endpoint']:<34} {e['kind']}")
+    print(f"\n{'t (s)':>7} {'req/s':>8} {'errors':>7}")
+    for point in report['timeline']:
+        print(f"{point['t_s']:>7} {point['rps']:>8} {point['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Base URL of a running server (default: in-process app)')
+    parser.add_argument('--db', help='Database for the in-process app (default: DATABASE_PATH)')
+    parser.add_argument('--synthetic', type=int, metavar='QUESTIONS',
+                        help='In-process: generate a temporary database with this many questions')
+    parser.add_argument('--embedding-backend', choices=['sentence-transformers', 'hashing'],
+                        help='In-process: EMBEDDING_BACKEND for the app')
+    parser.add_argument('--concurrency', type=int, default=16, help='Virtual candidates')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds at full concurrency')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='Seconds to start all candidates')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='Mean seconds between a candidate\'s requests (0 = none)')
+    parser.add_argument('--answers', type=int, default=5, help='Answers per session')
+    parser.add_argument('--per-category', type=int, default=2)
+    parser.add_argument('--interval', type=float, default=5.0, help='Timeline bucket in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--json', action='store_true', help='Print the JSON report')
+    args = parser.parse_args()
+
+    workdir = None
+    # The in-process app's own progress output would drown the report
+    quiet = open(os.devnull, 'w') if not args.url else None
+    if args.url:
+        transport = HttpTransport(args.url)
+    else:
+        # config reads these at import, so set them before importing the app
+        if args.synthetic:
+            workdir = tempfile.mkdtemp(prefix='load-test-')
+            args.db = os.path.join(workdir, 'load.db')
+        if args.db:
+            os.environ['DATABASE_PATH'] = args.db
+        if args.embedding_backend:
+            os.environ['EMBEDDING_BACKEND'] = args.embedding_backend
+        sys.path.insert(0, REPO_ROOT)
+
+        with redirect_stdout(quiet):
+            if args.synthetic:
+                from database.synthetic_data import generate_synthetic_data
+                # Question embeddings from the same backend the app embeds resumes with
+                generate_synthetic_data(args.db, questions=args.synthetic,
+                                        candidates=max(100, args.synthetic // 100),
+                                        responses=args.synthetic, seed=args.seed,
+                                        embeddings='model')
+            from app import create_app
+            transport = InProcessTransport(create_app())
+
+    try:
+        with redirect_stdout(quiet or sys.stdout):
+            report = run_load(transport, synthetic_resumes(200, args.seed), args)
+    finally:
+        if quiet:
+            quiet.close()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Serialization benchmark for question responses
+
+Compares payload size and encode time of a retrieval response before
+(every field including the 384-float embedding, stdlib json with sorted
+keys, as Flask's default jsonify) and after (lean default fields, orjson).
+
+Usage:
+    python -m benchmarks.serialization [--questions 10 50 200] [--repeat 50] [--db PATH]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+from config import VECTOR_DIMENSION, QUESTION_RESPONSE_FIELDS
+from utils.serialization import orjson, select_fields
+
+
+def synthetic_questions(count: int, seed: int = 0) -> List[Dict]:
+    """Question dicts shaped like a retrieval result"""
+    rng = random.Random(seed)
+    return [{
+        'question_id': f'q-{i:08d}',
+        'question_text': f'Explain how you would design component {i} for scale.',
+        'category': rng.choice(['technical', 'behavioral', 'situational']),
+        'difficulty': rng.choice(['easy', 'medium', 'hard']),
+        'topics': ['System Design', 'Python'],
+        'job_roles': ['Backend Developer'],
+        'embedding': [rng.uniform(-0.1, 0.1) for _ in range(VECTOR_DIMENSION)],
+        'ideal_keywords': ['scalability', 'caching', 'sharding'],
+        'created_at': '2024-01-01T00:00:00',
+        'similarity_score': round(rng.random(), 4)
+    } for i in range(count)]
+
+
+def database_questions(db_path: str, count: int) -> List[Dict]:
+    """Real questions from a database, repeated up to count"""
+    from database import DatabaseManager
+    questions = DatabaseManager(db_path).get_all_questions()
+    if not questions:
+        raise SystemExit(f"No questions in {db_path}")
+    return [dict(questions[i % len(questions)], similarity_score=0.5)
+            for i in range(count)]
+
+
+def time_encoder(encode: Callable[[Dict], bytes], payload: Dict, repeat: int) -> Dict:
+    """Median / p95 encode time in milliseconds and payload size"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'bytes': len(body),
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[int(0.95 * (len(timings) - 1))], 4)
+    }
+
+
+def encoders() -> Dict[str, Callable[[Dict], bytes]]:
+    """Available encoders, named after what they model"""
+    available = {
+        'stdlib_sorted': lambda obj: json.dumps(obj, sort_keys=True).encode('utf-8'),
+        'stdlib': lambda obj: json.dumps(obj).encode('utf-8')
+    }
+    if orjson is not None:
+        available['orjson'] = lambda obj: orjson.dumps(
+            obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return available
+
+
+def run(sizes: List[int], repeat: int, db_path: str = None) -> List[Dict]:
+    results = []
+    for size in sizes:
+        questions = (database_questions(db_path, size) if db_path
+                     else synthetic_questions(size))
+        payloads = {
+            'full': questions,
+            'lean': select_fields(questions, tuple(QUESTION_RESPONSE_FIELDS))
+        }
+        for shape, items in payloads.items():
+            payload = {'success': True, 'count': len(items), 'questions': items}
+            for name, encode in encoders().items():
+                results.append(dict(questions=size, fields=shape, encoder=name,
+                                    **time_encoder(encode, payload, repeat)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--questions', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--db', help='Use questions from this database')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.questions, args.repeat, args.db)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'questions':>9} {'fields':>6} {'encoder':>14} {'bytes':>10} {'median ms':>10} {'p95 ms':>9}")
+    for r in results:
+        print(f"{r['questions']:>9} {r['fields']:>6} {r['encoder']:>14} "
+              f"{r['bytes']:>10} {r['median_ms']:>10} {r['p95_ms']:>9}")
+
+    if orjson is None:
+        print("\norjson is not installed; only stdlib encoders were measured")
+
+
+if __name__ == '__main__':
+    main()
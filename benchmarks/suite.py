@@ -0,0 +1,449 @@
+"""
+Retrieval and ingestion benchmark suite
+
+Each scale (number of questions) runs in its own process against a
+throwaway database. Every case reports latency percentiles, throughput and
+the peak Python allocation of one call; every scale reports peak RSS.
+
+  retrieve_cold            First retrieval of a new QuestionRetriever
+  retrieve_warm            Loaded index, cache miss (new candidate each call)
+  retrieve_warm_filtered   Same, with difficulty and category filters
+  retrieve_cached          Identical repeated request (retrieval cache hit)
+  create_profile           ProfileCreator.create_profile
+  update_after_response    ProfileUpdater.update_after_response (synchronous)
+  parse_resume             ResumeParser.parse_resume (skipped without spaCy)
+  bulk_add_questions       QuestionManager.bulk_add_questions, per question
+  http_*                   Flask endpoints through the test client
+
+Data comes from database.synthetic_data (clustered embeddings, candidates
+with interview history); embeddings computed during the cases use the
+hashing backend (EMBEDDING_BACKEND=hashing), so no case times the
+sentence-transformers model.
+
+Usage:
+    python -m benchmarks.suite [--scales 1k 100k 1m] [--repeat 50] [--output run.json]
+    python -m benchmarks.suite --scales 1k --baseline previous.json
+    python -m benchmarks.suite --compare previous.json run.json
+
+The 1m scale needs roughly 5 GB of free disk and several minutes of setup.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCALE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_scale(value: str) -> int:
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500"""
+    value = value.strip().lower()
+    if value and value[-1] in SCALE_SUFFIXES:
+        return int(float(value[:-1]) * SCALE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+# ============================================================
+# SERVICE INPUTS
+# ============================================================
+
+# Generator blocks far past the populated rows, for rows the cases insert
+INPUT_BLOCK = 10 ** 6
+
+
+def resumes(generator, count: int) -> List[Dict]:
+    """Parsed-resume dicts in the shape ResumeParser produces"""
+    rows, _ = generator.candidate_rows(INPUT_BLOCK, generator.candidate_domains(count))
+    return [{'personal_info': json.loads(row[1]),
+             'skills': json.loads(row[2]),
+             'experience': json.loads(row[3]),
+             'projects': json.loads(row[4]),
+             'education': json.loads(row[5]),
+             'raw_text': row[6]} for row in rows]
+
+
+def resume_text(resume: Dict) -> str:
+    """Plain-text resume for the parser"""
+    lines = [resume['personal_info']['name'], resume['personal_info']['email'],
+             'Skills: ' + ', '.join(resume['skills']), 'Experience']
+    lines += [f"{exp['role']} at {exp['company']} ({exp['duration']}) - {exp['description']}"
+              for exp in resume['experience']]
+    lines += ['Projects'] + [f"{p['name']}: {p['description']}" for p in resume['projects']]
+    lines += ['Education'] + [edu['degree'] for edu in resume['education']]
+    return '\n'.join(lines)
+
+
+def question_batch(generator, block: int, count: int) -> List[Dict]:
+    """Question dicts (without embeddings) for bulk_add_questions"""
+    rows = generator.question_rows(INPUT_BLOCK + block, generator.question_domains(count))
+    return [{'question_text': row[1],
+             'category': row[2],
+             'difficulty': row[3],
+             'topics': json.loads(row[4]),
+             'job_roles': json.loads(row[5]),
+             'ideal_keywords': json.loads(row[7])} for row in rows]
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+def measure(fn: Callable, inputs: List, items_per_call: int = 1) -> Dict:
+    """
+    Time fn over inputs
+
+    The last input is run separately under tracemalloc, so the peak
+    allocation is reported without slowing the timed calls.
+
+    Args:
+        fn: Called once per input
+        inputs: At least two inputs
+        items_per_call: Items each call handles (for throughput)
+
+    Returns:
+        Latency percentiles (ms), throughput (items/s), peak allocation (kB)
+    """
+    latencies = []
+    started = time.perf_counter()
+    for item in inputs[:-1]:
+        call_started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(inputs[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    return {
+        'calls': len(latencies),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'mean_ms': round(float(ms.mean()), 3),
+        'max_ms': round(float(ms.max()), 3),
+        'throughput_per_s': round(len(latencies) * items_per_call / elapsed, 1),
+        'peak_alloc_kb': round(peak / 1024, 1)
+    }
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+# ============================================================
+# ONE SCALE (runs in a child process)
+# ============================================================
+
+def run_scale(scale: int, candidates: int, responses: int, repeat: int, seed: int) -> Dict:
+    """Populate the database named by DATABASE_PATH and run every case"""
+    from database import DatabaseManager
+    from database.synthetic_data import SyntheticDataGenerator, generate_synthetic_data
+    from utils.embedding_service import embedding_service
+    from services import ProfileCreator, ProfileUpdater, QuestionManager, QuestionRetriever
+
+    embedding_service.use_backend('hashing')
+    rng = random.Random(seed)
+    db = DatabaseManager()
+    generator = SyntheticDataGenerator(seed=seed)
+    results = {}
+    setup = {}
+
+    started = time.perf_counter()
+    generate_synthetic_data(db.db_path, questions=scale, candidates=candidates,
+                            responses=responses, seed=seed)
+    setup['generate_s'] = round(time.perf_counter() - started, 2)
+
+    retriever = QuestionRetriever()
+    started = time.perf_counter()
+    retriever._load_questions()
+    setup['index_build_s'] = round(time.perf_counter() - started, 2)
+
+    # Every retrieval case takes candidates nobody has retrieved for yet
+    unused = iter(range(candidates))
+
+    def new_candidates(count: int) -> List[str]:
+        return [generator.candidate_id(i) for i in itertools.islice(unused, count)]
+
+    creator = ProfileCreator()
+    results['create_profile'] = measure(
+        lambda resume: creator.create_profile(resume), resumes(generator, repeat + 1))
+
+    # A restarted worker: new retriever, index attached from the snapshot
+    results['retrieve_cold'] = measure(
+        lambda cid: QuestionRetriever().retrieve_questions(cid),
+        new_candidates(max(2, min(repeat, 10) + 1)))
+    results['retrieve_warm'] = measure(
+        lambda cid: retriever.retrieve_questions(cid),
+        new_candidates(repeat + 1))
+    results['retrieve_warm_filtered'] = measure(
+        lambda cid: retriever.retrieve_questions(cid, difficulty='hard', category='technical'),
+        new_candidates(repeat + 1))
+    cached_candidate = new_candidates(1)[0]
+    retriever.retrieve_questions(cached_candidate)
+    results['retrieve_cached'] = measure(
+        lambda cid: retriever.retrieve_questions(cid),
+        [cached_candidate] * (repeat + 1))
+
+    answering = new_candidates(5)
+
+    def answers(count: int) -> List[Dict]:
+        return [{'candidate_id': rng.choice(answering),
+                 'question_id': generator.question_id(rng.randrange(scale)),
+                 'answer_text': 'A structured answer covering the key points.',
+                 'knowledge_score': round(rng.uniform(0.5, 1.0), 2),
+                 'speech_score': round(rng.uniform(0.5, 1.0), 2)}
+                for _ in range(count)]
+
+    updater = ProfileUpdater()
+    results['update_after_response'] = measure(
+        lambda answer: updater.update_after_response(async_update=False, **answer),
+        answers(repeat + 1))
+
+    try:
+        from services import ResumeParser
+        parser = ResumeParser()
+    except Exception as e:
+        results['parse_resume'] = {'skipped': f'{type(e).__name__}: {e}'}
+    else:
+        results['parse_resume'] = measure(
+            lambda text: parser.parse_resume(resume_text=text),
+            [resume_text(resume) for resume in resumes(generator, repeat + 1)])
+
+    manager = QuestionManager()
+    batch_size = 100
+    results['bulk_add_questions'] = measure(
+        lambda batch: manager.bulk_add_questions(batch),
+        [question_batch(generator, block, batch_size) for block in range(max(2, repeat // 10 + 1))],
+        items_per_call=batch_size)
+
+    results.update(run_http_cases(new_candidates, answers, repeat))
+
+    return {
+        'scale': scale,
+        'candidates': candidates,
+        'responses': responses,
+        'setup': setup,
+        'db_mb': round(os.path.getsize(db.db_path) / 1e6, 1),
+        'peak_rss_kb': peak_rss_kb(),
+        'cases': results
+    }
+
+
+def run_http_cases(new_candidates: Callable, answers: Callable, repeat: int) -> Dict:
+    """Flask endpoints through the test client (no network)"""
+    try:
+        from app import create_app
+        app = create_app(start_background=False)
+    except Exception as e:
+        return {'http': {'skipped': f'{type(e).__name__}: {e}'}}
+
+    client = app.test_client()
+
+    def get(path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {path} -> {response.status_code}')
+
+    def post(payload):
+        response = client.post('/api/record-response', json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f'POST /api/record-response -> {response.status_code}')
+
+    # First request attaches the index refreshed by bulk_add_questions
+    get(f'/api/retrieve-questions/{new_candidates(1)[0]}')
+
+    return {
+        'http_retrieve_questions': measure(
+            lambda cid: get(f'/api/retrieve-questions/{cid}'), new_candidates(repeat + 1)),
+        'http_diverse_questions': measure(
+            lambda cid: get(f'/api/diverse-questions/{cid}'), new_candidates(repeat + 1)),
+        'http_database_summary': measure(
+            lambda _: get('/api/database-summary'), [None] * (repeat + 1)),
+        'http_record_response': measure(post, answers(repeat + 1))
+    }
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+def run_in_child(scale: int, candidates: int, responses: int, repeat: int,
+                 seed: int, keep: bool) -> Dict:
+    """Run one scale in a fresh interpreter with its own database"""
+    workdir = tempfile.mkdtemp(prefix=f'suite-{scale}-')
+    result_path = os.path.join(workdir, 'result.json')
+    env = dict(os.environ,
+               DATABASE_PATH=os.path.join(workdir, 'bench.db'),
+               EMBEDDING_BACKEND='hashing',
+               PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    try:
+        subprocess.run([sys.executable, '-m', 'benchmarks.suite', '--child', str(scale),
+                        '--candidates', str(candidates), '--responses', str(responses),
+                        '--repeat', str(repeat), '--seed', str(seed),
+                        '--child-output', result_path],
+                       cwd=REPO_ROOT, env=env, check=True)
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        if keep:
+            print(f'Kept {workdir}', file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def environment() -> Dict:
+    """What the numbers were measured on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> List[Dict]:
+    """
+    p50/p95 ratios (current / baseline) for every case present in both runs
+
+    Returns:
+        Rows with scale, case, ratios and a regression flag
+    """
+    old = {(run['scale'], case): stats
+           for run in baseline['runs'] for case, stats in run['cases'].items()}
+    rows = []
+    for run in current['runs']:
+        for case, stats in run['cases'].items():
+            before = old.get((run['scale'], case))
+            if not before or 'skipped' in stats or 'skipped' in before:
+                continue
+            p50 = stats['p50_ms'] / before['p50_ms'] if before['p50_ms'] else None
+            p95 = stats['p95_ms'] / before['p95_ms'] if before['p95_ms'] else None
+            rows.append({
+                'scale': run['scale'],
+                'case': case,
+                'p50_ratio': round(p50, 2) if p50 else None,
+                'p95_ratio': round(p95, 2) if p95 else None,
+                'regression': bool(p50 and p50 > tolerance)
+            })
+    return rows
+
+
+def print_results(report: Dict) -> None:
+    for run in report['runs']:
+        print(f"\nscale {run['scale']}  (db {run['db_mb']} MB, peak rss "
+              f"{run['peak_rss_kb']} kB, setup {run['setup']})")
+        print(f"{'case':<26} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'items/s':>10} {'peak kB':>9}")
+        for case, s in run['cases'].items():
+            if 'skipped' in s:
+                print(f"{case:<26} skipped ({s['skipped']})")
+                continue
+            print(f"{case:<26} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} "
+                  f"{s['throughput_per_s']:>10} {s['peak_alloc_kb']:>9}")
+
+
+def print_comparison(rows: List[Dict]) -> None:
+    print(f"\n{'scale':>8} {'case':<26} {'p50 x':>7} {'p95 x':>7}")
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        print(f"{r['scale']:>8} {r['case']:<26} {str(r['p50_ratio']):>7} "
+              f"{str(r['p95_ratio']):>7}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', default=['1k', '100k'],
+                        help='Question counts, e.g. 1k 100k 1m')
+    parser.add_argument('--candidates', type=int, default=1000,
+                        help='Generated candidates (at least 5 * repeat + 25)')
+    parser.add_argument('--responses', type=int, default=20000,
+                        help='Generated interview_history rows')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed calls per case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--json', action='store_true', help='Print the JSON report')
+    parser.add_argument('--baseline', help='Compare against an earlier JSON report')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two JSON reports without running')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='p50 ratio above which a case counts as a regression')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark databases')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            result = run_scale(args.child, args.candidates, args.responses,
+                               args.repeat, args.seed)
+        with open(args.child_output, 'w') as f:
+            json.dump(result, f)
+        return
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.tolerance)
+        print_comparison(rows)
+        sys.exit(1 if any(r['regression'] for r in rows) else 0)
+
+    if args.candidates < 5 * args.repeat + 25:
+        parser.error('--candidates must be at least 5 * --repeat + 25')
+
+    report = {
+        'environment': environment(),
+        'repeat': args.repeat,
+        'runs': [run_in_child(parse_scale(s), args.candidates, args.responses,
+                              args.repeat, args.seed, args.keep)
+                 for s in args.scales]
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_results(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(json.load(f), report, args.tolerance)
+        print_comparison(rows)
+        sys.exit(1 if any(r['regression'] for r in rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
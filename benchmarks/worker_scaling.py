@@ -0,0 +1,150 @@
+"""
+Worker scaling load test for the pre-fork server
+
+Starts gunicorn (gunicorn.conf.py, wsgi:app) with each worker count in
+turn, drives it with concurrent HTTP clients for a fixed duration and
+reports throughput, latency percentiles and per-worker memory (rss / pss
+/ uss from /api/worker-stats).
+
+Usage:
+    python -m benchmarks.worker_scaling [--workers 1 2 4] [--concurrency 8]
+        [--duration 10] [--path /api/retrieve-questions/<id>]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/api/health', timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not start within {timeout}s")
+
+
+def drive(url: str, concurrency: int, duration: float) -> Dict:
+    """Closed-loop load: each client sends its next request when the last returns"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        local, failed = [], 0
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                local.append(time.perf_counter() - started)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[int(p * (len(latencies) - 1))] * 1000, 2) if latencies else None
+
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99)
+    }
+
+
+def worker_memory(base_url: str, workers: int, attempts: int = 200) -> Dict[int, Dict]:
+    """Sample /api/worker-stats until every worker has answered (or give up)"""
+    seen = {}
+    for _ in range(attempts):
+        with urllib.request.urlopen(base_url + '/api/worker-stats', timeout=5) as response:
+            stats = json.loads(response.read())
+        seen[stats['pid']] = stats['memory']
+        if len(seen) >= workers:
+            break
+    return seen
+
+
+def run_one(workers: int, args) -> Dict:
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{port}')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_ROOT, 'gunicorn.conf.py'),
+         '--pythonpath', REPO_ROOT, 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_up(base_url, args.startup_timeout)
+        drive(base_url + args.path, args.concurrency, min(2.0, args.duration))  # warm-up
+        result = drive(base_url + args.path, args.concurrency, args.duration)
+        memory = worker_memory(base_url, workers)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    pss = [m.get('pss_kb') for m in memory.values() if m.get('pss_kb') is not None]
+    return dict(
+        workers=workers,
+        **result,
+        workers_sampled=len(memory),
+        rss_kb_per_worker=[m.get('rss_kb') for m in memory.values()],
+        uss_kb_per_worker=[m.get('uss_kb') for m in memory.values()],
+        pss_kb_total=sum(pss) if pss else None
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run')
+    parser.add_argument('--path', default='/api/database-summary', help='Endpoint to load')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--startup-timeout', type=float, default=120.0)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    results = [run_one(workers, args) for workers in args.workers]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6} {'uss kB/worker':>22} {'pss kB total':>12}")
+    for r in results:
+        uss = ','.join(str(u) for u in r['uss_kb_per_worker'])
+        print(f"{r['workers']:>7} {r['throughput_rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['errors']:>6} {uss:>22} {r['pss_kb_total']:>12}")
+
+
+if __name__ == '__main__':
+    main()
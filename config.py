@@ -2,26 +2,129 @@
 Shared configuration for all team members
 """
 
+import os
+import tempfile
+
 # Vector and Model Configuration
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "sentence-transformers", or "hashing" for deterministic model-free vectors
+# (hashed bag of words) when the model itself is not what is being measured
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
 VECTOR_DIMENSION = 384
 SIMILARITY_THRESHOLD = 0.2
 
 # Database Configuration
-DATABASE_PATH = "interview_system.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "interview_system.db")
 ENABLE_CACHE = True
 CACHE_EXPIRY_MINUTES = 5
 
+# Retrieval cache janitor
+CACHE_JANITOR_INTERVAL_SECONDS = 60
+CACHE_JANITOR_BATCH_SIZE = 500  # Rows deleted per transaction
+CACHE_MAX_ROWS_PER_CANDIDATE = 20
+CACHE_MAX_ROWS = 10000
+
 # History Configuration
 HISTORY_LIMIT = 50
+TREND_WINDOW = 5  # Recent scores compared against the ones before them
+ROLLUP_GRANULARITIES = ('day', 'week')
+
+# Duplicate resume detection (Person A)
+CHECK_DUPLICATE_RESUMES = True
+MINHASH_PERMUTATIONS = 128
+MINHASH_BANDS = 32  # 4 rows per band: resumes above ~0.6 Jaccard share a bucket 99% of the time
+MINHASH_SHINGLE_WORDS = 3
+MINHASH_SEED = 1  # Stored signatures are only comparable under the same seed
+RESUME_DUPLICATE_JACCARD = 0.6  # Estimated word-shingle Jaccard similarity
+RESUME_DUPLICATE_COSINE = 0.9  # Profile-vector similarity required as well
+RESUME_DUPLICATE_MAX_RESULTS = 5
 
 # Update Weights (for Person B)
 UPDATE_OLD_WEIGHT = 0.8
 UPDATE_NEW_WEIGHT = 0.2
+HIGH_PERFORMANCE_SCORE = 0.7  # Only responses at or above this move the profile
+PROFILE_RECENCY_DECAY = 0.9  # Per-response decay of older responses
+
+# Background profile updates (Person B)
+ASYNC_PROFILE_UPDATES = True
+UPDATE_COALESCE_SECONDS = 2.0  # Wait for more answers before recomputing
+UPDATE_FLUSH_SECONDS = 10.0  # Longest a stopping worker waits for queued profile updates
 
 # Question Retrieval
 MAX_QUESTIONS_PER_SESSION = 10
 MIN_SIMILARITY_SCORE = 0.7
+MMR_POOL_SIZE = 200  # Top matches considered when MMR re-ranking is requested
+DIVERSITY_MAX_GROUPS = 10  # Groups filled by diverse-questions, best-matching first
+EXCLUDE_SEEN_QUESTIONS = True  # Skip questions the candidate already answered
+REPEAT_COOLDOWN_DAYS = None  # Days after which answered questions may repeat (None = never)
+
+# Duplicate question detection during imports (Person C)
+QUESTION_DUPLICATE_SIMILARITY = 0.92  # Embedding cosine similarity
+QUESTION_DUPLICATE_ACTION = "flag"  # "flag" (insert and report) | "skip" (report, reuse the matched id)
+QUESTION_DEDUP_EXACT_MAX_PAIRS = 50_000_000  # Smaller joins compare every pair
+QUESTION_DEDUP_PROBES = 8  # Clusters searched per incoming question
+QUESTION_DEDUP_BLOCK_SIZE = 16_000_000  # Similarities computed per matrix product
+
+# Shared question index (Person D)
+SHARED_QUESTION_INDEX = True  # Publish the index as memory-mapped files all workers attach to
+QUESTION_INDEX_DIR = None  # None = "<database path>.index"; e.g. /dev/shm/interview-index for RAM-backed
+QUESTION_INDEX_CHECK_SECONDS = 2.0  # How often a worker looks for a newer generation
+QUESTION_INDEX_KEEP_GENERATIONS = 3  # Older generations are deleted after a publish
+QUESTION_INDEX_INCREMENTAL_MAX_FRACTION = 0.25  # Rebuild from scratch when more questions changed
+QUESTION_INDEX_IMPORT_WAIT_SECONDS = 5.0  # Longest an import waits for another process's publish
+
+# Interview sessions (Person D)
+SESSION_POOL_SIZE = 50  # Ranked questions precomputed per difficulty
+SESSION_TTL_MINUTES = 60
+MAX_ACTIVE_SESSIONS = 10000
+SESSION_PRUNE_SECONDS = 60  # Expired and over-cap sessions are deleted this often
+
+# Question search (Person D)
+SEARCH_BM25_WEIGHTS = (1.0, 2.0, 2.0)  # question_text, ideal_keywords, topics
+SEARCH_CANDIDATES = 100  # Lexical and semantic candidates each fed into the fusion
+SEARCH_RRF_K = 60  # Reciprocal rank fusion: score = sum of 1 / (k + rank)
+SEARCH_MAX_RESULTS = 100
+
+# Candidate matching (reverse lookup)
+CANDIDATE_INDEX_CHECK_SECONDS = 1.0  # How often a worker applies the candidate change log
+CANDIDATE_CHANGES_KEEP = 100000  # Change-log entries kept; a worker further behind reloads
+CANDIDATE_CHANGES_PRUNE_SECONDS = 3600
+CANDIDATE_MATCH_MAX_K = 100
+CANDIDATE_SUBSET_SCORING_FRACTION = 0.25  # Filters keeping fewer rows score only those rows
+SHARED_CANDIDATE_INDEX = True  # Publish profile vectors as memory-mapped files all workers attach to
+CANDIDATE_INDEX_DIR = None  # None = "<database path>.candidates"
+CANDIDATE_INDEX_KEEP_GENERATIONS = 2  # Older generations are deleted after a publish
+CANDIDATE_INDEX_COMPACT_FRACTION = 0.05  # Publish a new generation once this share of rows changed
+CANDIDATE_INDEX_COMPACT_MIN_ROWS = 1000  # ... but never for fewer changed rows than this
+
+# API responses
+JSON_PROVIDER = "auto"  # "auto" (orjson if installed) | "orjson" | "stdlib"
+# Question fields returned when no ?fields= is given (embeddings left out)
+QUESTION_RESPONSE_FIELDS = ('question_id', 'question_text', 'category', 'difficulty',
+                            'topics', 'job_roles', 'ideal_keywords', 'similarity_score',
+                            'diversity_group', 'search_score', 'lexical_rank', 'semantic_rank')
+
+# HTTP caching and compression
+COMPRESSION_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # brotli is optional; gzip only without it
+STATIC_MAX_AGE_SECONDS = 31536000  # Fingerprinted frontend assets (one year)
+
+# Logging and metrics
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # Per-request messages are DEBUG
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" | "json" (one object per line)
+METRICS_DIR = os.getenv("METRICS_DIR")  # Shared by pre-forked workers; None = this process only
+METRICS_SNAPSHOT_SECONDS = 5.0  # How often a worker publishes its metrics to METRICS_DIR
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # X-Admin-Token for /api/admin/* and ?trace=1; unset = disabled
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "interview-profiles"))
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005
+PROFILE_MAX_SECONDS = 300
+PROFILE_MAX_REQUESTS = 10000
+PROFILE_TOP_FUNCTIONS = 30
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 50))  # Logged with EXPLAIN QUERY PLAN
+QUERY_STATS_WINDOW = 200  # Recent executions per statement kept for p50/p95
+QUERY_STATS_MAX_STATEMENTS = 1000  # Distinct statements tracked; the rest are pooled
+SLOW_QUERY_LOG_SIZE = 100  # Recent slow statements kept for /api/admin/query-stats
 
 # Scoring Weights
 KNOWLEDGE_WEIGHT = 0.6
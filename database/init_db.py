@@ -3,9 +3,12 @@ Initialize the database with schema
 Run this ONCE at project start: python -m database.init_db
 """
 
+import logging
 import sqlite3
 import os
 
+logger = logging.getLogger(__name__)
+
 def init_database(db_path='interview_system.db'):
     """Initialize database with complete schema"""
     
@@ -25,13 +28,46 @@ def init_database(db_path='interview_system.db'):
     conn.commit()
     conn.close()
     
-    print(f"✅ Database initialized successfully at: {db_path}")
-    print(f"📊 Tables created:")
-    print("   - questions")
-    print("   - candidate_profiles")
-    print("   - parsed_resumes")
-    print("   - interview_history")
-    print("   - retrieval_cache")
+    logger.info("Database initialized", extra={'db_path': db_path})
+
+def migrate_database(db_path='interview_system.db'):
+    """
+    Bring an existing database up to the current schema
+    
+    Every statement in schema.sql is idempotent, so replaying it only
+    creates the tables and indexes that are missing.
+    """
+    schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
+    
+    with open(schema_path, 'r') as f:
+        schema_sql = f.read()
+    
+    conn = sqlite3.connect(db_path)
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.executescript(schema_sql)
+    conn.commit()
+    conn.close()
+    
+    # Backfill aggregate tables that were just created
+    from database.operations import DatabaseManager
+    db = DatabaseManager(db_path)
+    if 'candidate_stats' not in existing:
+        db.rebuild_candidate_stats()
+    if 'performance_rollups' not in existing:
+        db.rebuild_performance_rollups()
+    if 'question_counts' not in existing:
+        db.rebuild_question_counts()
+    if 'question_ordinals' not in existing:
+        db.backfill_question_ordinals()
+    if 'candidate_seen' not in existing:
+        db.rebuild_seen_sets()
+    if 'questions_fts' not in existing:
+        db.rebuild_question_search_index()
+    if 'resume_signatures' not in existing:
+        db.rebuild_resume_signatures()
 
 if __name__ == "__main__":
+    from utils.logging_setup import configure_logging
+    configure_logging(plain=True)
     init_database()
\ No newline at end of file
@@ -3,21 +3,30 @@ Complete database operations for all 4 team members
 """
 
 import sqlite3
+import numpy as np
 import json
 import uuid
+import hashlib
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+from config import DATABASE_PATH, TREND_WINDOW, ROLLUP_GRANULARITIES, SEARCH_BM25_WEIGHTS
+from utils.bitset import Bitset
+from utils import minhash
+from utils.metrics import instrument_methods, count_statement
+from .query_stats import TimedConnection
 
+@instrument_methods
 class DatabaseManager:
     """Centralized database operations"""
     
-    def __init__(self, db_path='interview_system.db'):
-        self.db_path = db_path
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DATABASE_PATH
     
     def get_connection(self):
         """Get database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TimedConnection)  # Per-statement stats
         conn.row_factory = sqlite3.Row  # Access columns by name
+        conn.set_trace_callback(count_statement)
         return conn
     
     # ============================================================
@@ -38,7 +47,13 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+        self._insert_parsed_resume(cursor, candidate_id, resume_data)
+        conn.commit()
+        conn.close()
+        return candidate_id
+    
+    def _insert_parsed_resume(self, cursor, candidate_id: str, resume_data: Dict):
+        """Write a parsed resume using an open cursor"""
         cursor.execute('''
             INSERT OR REPLACE INTO parsed_resumes VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
@@ -51,10 +66,6 @@ class DatabaseManager:
             resume_data.get('raw_text', ''),
             datetime.now().isoformat()
         ))
-        
-        conn.commit()
-        conn.close()
-        return candidate_id
     
     def get_parsed_resume(self, candidate_id: str) -> Optional[Dict]:
         """Get parsed resume by candidate ID"""
@@ -95,7 +106,14 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+        self._insert_candidate_profile(cursor, candidate_id, profile_vector, metadata)
+        conn.commit()
+        conn.close()
+        return candidate_id
+    
+    def _insert_candidate_profile(self, cursor, candidate_id: str,
+                                  profile_vector: List[float], metadata: Dict):
+        """Write a new profile (version 1) using an open cursor"""
         now = datetime.now().isoformat()
         
         cursor.execute('''
@@ -108,10 +126,155 @@ class DatabaseManager:
             now,
             now
         ))
+    
+    def create_candidate(self, candidate_id: str, resume_data: Dict,
+                         profile_vector: List[float], metadata: Dict,
+                         signature: Optional[np.ndarray] = None,
+                         find_duplicates: Optional[Callable[[Dict[str, Dict]], List[Dict]]] = None
+                         ) -> List[Dict]:
+        """
+        Save a parsed resume, its signature and its profile in one transaction
+        
+        The duplicate check runs inside the same write transaction (BEGIN
+        IMMEDIATE), so of two concurrent uploads of one resume the second
+        sees the first.
+        
+        Args:
+            candidate_id: Candidate identifier
+            resume_data: Parsed resume
+            profile_vector: 384-dim normalized vector
+            metadata: Profile metadata
+            signature: utils.minhash signature of the resume text
+            find_duplicates: Called with the stored resumes sharing an LSH
+                             bucket with signature (as returned by
+                             get_resume_lsh_candidates); returns duplicates
+        
+        Returns:
+            The duplicates found (nothing is saved), or [] once saved
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            if find_duplicates is not None and signature is not None:
+                duplicates = find_duplicates(self._resume_lsh_candidates(cursor, signature))
+                if duplicates:
+                    conn.rollback()
+                    return duplicates
+            
+            self._insert_parsed_resume(cursor, candidate_id, resume_data)
+            if signature is not None:
+                self._save_resume_signature(cursor, candidate_id, signature)
+            self._insert_candidate_profile(cursor, candidate_id, profile_vector, metadata)
+            conn.commit()
+            return []
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def save_resume_signature(self, candidate_id: str, signature: np.ndarray) -> None:
+        """
+        Store a resume's MinHash signature and its LSH band buckets
+        
+        Args:
+            candidate_id: Candidate identifier
+            signature: utils.minhash signature of the resume text
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        self._save_resume_signature(cursor, candidate_id, signature)
+        conn.commit()
+        conn.close()
+    
+    def _save_resume_signature(self, cursor, candidate_id: str, signature: np.ndarray):
+        """Write a signature and its band buckets using an open cursor"""
+        cursor.execute('SELECT signature FROM resume_signatures WHERE candidate_id = ?',
+                      (candidate_id,))
+        old = cursor.fetchone()
+        if old:
+            cursor.executemany('''
+                DELETE FROM resume_lsh_bands WHERE band = ? AND bucket = ? AND candidate_id = ?
+            ''', [(band, bucket, candidate_id) for band, bucket in
+                  enumerate(minhash.band_buckets(minhash.from_bytes(old['signature'])))])
+        
+        cursor.execute('INSERT OR REPLACE INTO resume_signatures VALUES (?, ?)',
+                      (candidate_id, minhash.to_bytes(signature)))
+        cursor.executemany('INSERT OR IGNORE INTO resume_lsh_bands VALUES (?, ?, ?)',
+                           [(band, bucket, candidate_id) for band, bucket in
+                            enumerate(minhash.band_buckets(signature))])
+    
+    def get_resume_lsh_candidates(self, signature: np.ndarray) -> Dict[str, Dict]:
+        """
+        Stored resumes sharing at least one LSH bucket with a signature
+        
+        Returns:
+            Dict of candidate_id -> {'signature', 'profile_vector'} (the
+            vector is None if the candidate has no profile)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        candidates = self._resume_lsh_candidates(cursor, signature)
+        conn.close()
+        return candidates
+    
+    def _resume_lsh_candidates(self, cursor, signature: np.ndarray) -> Dict[str, Dict]:
+        """get_resume_lsh_candidates using an open cursor"""
+        buckets = list(enumerate(minhash.band_buckets(signature)))
+        
+        # A join from the wanted buckets (not IN) so each band is a primary-key search
+        cursor.execute(f'''
+            WITH wanted (band, bucket) AS (VALUES {','.join(['(?, ?)'] * len(buckets))})
+            SELECT s.candidate_id, s.signature, p.profile_vector
+            FROM resume_signatures s
+            LEFT JOIN candidate_profiles p ON p.candidate_id = s.candidate_id
+            WHERE s.candidate_id IN (
+                SELECT b.candidate_id FROM wanted w
+                JOIN resume_lsh_bands b ON b.band = w.band AND b.bucket = w.bucket
+            )
+        ''', [value for pair in buckets for value in pair])
+        
+        return {row['candidate_id']: {
+                    'signature': minhash.from_bytes(row['signature']),
+                    'profile_vector': (json.loads(row['profile_vector'])
+                                       if row['profile_vector'] else None)
+                } for row in cursor.fetchall()}
+    
+    def rebuild_resume_signatures(self, batch_size: int = 1000) -> int:
+        """
+        Recompute every resume signature from parsed_resumes.raw_text
+        
+        Returns:
+            Number of resumes with a signature
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM resume_lsh_bands')
+        cursor.execute('DELETE FROM resume_signatures')
+        
+        count = 0
+        rows = conn.execute('SELECT candidate_id, raw_text FROM parsed_resumes')
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                break
+            signatures, bands = [], []
+            for row in batch:
+                signature = minhash.signature(row['raw_text'] or '')
+                if signature is None:
+                    continue
+                signatures.append((row['candidate_id'], minhash.to_bytes(signature)))
+                bands.extend((band, bucket, row['candidate_id']) for band, bucket in
+                             enumerate(minhash.band_buckets(signature)))
+            cursor.executemany('INSERT INTO resume_signatures VALUES (?, ?)', signatures)
+            cursor.executemany('INSERT OR IGNORE INTO resume_lsh_bands VALUES (?, ?, ?)', bands)
+            count += len(signatures)
         
         conn.commit()
         conn.close()
-        return candidate_id
+        return count
     
     # ============================================================
     # PERSON B: PROFILE VECTOR UPDATION
@@ -140,7 +303,8 @@ class DatabaseManager:
     
     def update_profile_vector(self, candidate_id: str, 
                             new_vector: List[float],
-                            metadata: Optional[Dict] = None) -> bool:
+                            metadata: Optional[Dict] = None,
+                            accumulator: Optional[Dict] = None) -> bool:
         """
         Update candidate profile vector (after interview response)
         
@@ -148,6 +312,9 @@ class DatabaseManager:
             candidate_id: Candidate identifier
             new_vector: Updated 384-dim normalized vector
             metadata: Optional updated metadata
+            accumulator: Optional running update state to save in the same
+                         transaction (keys: base_vector, accumulator,
+                         weight_sum, last_history_id)
         
         Returns:
             True if updated successfully
@@ -183,10 +350,95 @@ class DatabaseManager:
             ))
         
         success = cursor.rowcount > 0
+        
+        if success and accumulator is not None:
+            self._save_profile_accumulator(cursor, candidate_id, accumulator)
+        
         conn.commit()
         conn.close()
         return success
     
+    def _save_profile_accumulator(self, cursor, candidate_id: str,
+                                  accumulator: Dict):
+        """Write running update state using an open cursor"""
+        cursor.execute('''
+            INSERT OR REPLACE INTO profile_accumulators VALUES (?, ?, ?, ?, ?, ?)
+        ''', (
+            candidate_id,
+            json.dumps(accumulator['base_vector']),
+            json.dumps(accumulator['accumulator']),
+            accumulator['weight_sum'],
+            accumulator['last_history_id'],
+            datetime.now().isoformat()
+        ))
+    
+    def save_profile_accumulator(self, candidate_id: str, accumulator: Dict):
+        """
+        Save running update state without touching the profile vector
+        
+        Args:
+            candidate_id: Candidate identifier
+            accumulator: Dict with base_vector, accumulator, weight_sum,
+                         last_history_id
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        self._save_profile_accumulator(cursor, candidate_id, accumulator)
+        conn.commit()
+        conn.close()
+    
+    def get_profile_accumulator(self, candidate_id: str) -> Optional[Dict]:
+        """Get running update state for a candidate"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM profile_accumulators WHERE candidate_id = ?',
+                      (candidate_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {
+                'base_vector': json.loads(row['base_vector']),
+                'accumulator': json.loads(row['accumulator']),
+                'weight_sum': row['weight_sum'],
+                'last_history_id': row['last_history_id'],
+                'updated_at': row['updated_at']
+            }
+        return None
+    
+    def get_scored_embeddings_since(self, candidate_id: str,
+                                    after_history_id: int = 0) -> List[Dict]:
+        """
+        Get responses newer than a history id with their question embeddings
+        
+        Args:
+            candidate_id: Candidate identifier
+            after_history_id: Only return rows with a larger history_id
+        
+        Returns:
+            List of {history_id, total_score, embedding}, oldest first
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT h.history_id, h.total_score, q.embedding
+            FROM interview_history h
+            JOIN questions q ON q.question_id = h.question_id
+            WHERE h.candidate_id = ? AND h.history_id > ?
+            ORDER BY h.history_id
+        ''', (candidate_id, after_history_id))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [{
+            'history_id': row['history_id'],
+            'total_score': row['total_score'],
+            'embedding': json.loads(row['embedding'])
+        } for row in rows]
+    
     def get_candidate_history(self, candidate_id: str, 
                             limit: int = 50) -> List[Dict]:
         """
@@ -223,6 +475,110 @@ class DatabaseManager:
             'timestamp': row['timestamp']
         } for row in rows]
     
+    def iter_candidate_rows(self, batch_size: int = 5000,
+                            candidate_ids: Optional[List[str]] = None):
+        """
+        Stream raw candidate profile rows (JSON columns left undecoded)
+        
+        Used to build the in-memory candidate index for reverse lookups.
+        
+        Args:
+            batch_size: Rows per yielded batch
+            candidate_ids: Only these candidates (missing ids are skipped)
+        
+        Yields:
+            Lists of up to batch_size sqlite3.Row
+        """
+        query = '''
+            SELECT candidate_id, profile_vector, metadata, version
+            FROM candidate_profiles
+        '''
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            if candidate_ids is None:
+                cursor.execute(query)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+                return
+        
+            for start in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[start:start + 500]
+                cursor.execute(query + f"WHERE candidate_id IN ({','.join('?' * len(chunk))})",
+                              chunk)
+                rows = cursor.fetchall()
+                if rows:
+                    yield rows
+        finally:
+            conn.close()
+    
+    def get_candidate_change_seq(self) -> int:
+        """Newest candidate_changes sequence number (0 if none)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # sqlite_sequence keeps the high-water mark even after pruning
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'candidate_changes'")
+        row = cursor.fetchone()
+        
+        conn.close()
+        return row['seq'] if row else 0
+    
+    def get_candidate_changes(self, after_seq: int, up_to_seq: int) -> Tuple[List[str], bool]:
+        """
+        Candidate profiles inserted, updated or deleted in a change-log range
+        
+        Args:
+            after_seq: Exclusive lower bound
+            up_to_seq: Inclusive upper bound
+        
+        Returns:
+            (distinct candidate_ids, complete): complete is False if part of
+            the range was already pruned from the log
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT MIN(seq) AS seq FROM candidate_changes')
+        oldest = cursor.fetchone()['seq']
+        complete = up_to_seq <= after_seq or (oldest is not None and oldest <= after_seq + 1)
+        
+        cursor.execute('''
+            SELECT DISTINCT candidate_id FROM candidate_changes
+            WHERE seq > ? AND seq <= ?
+        ''', (after_seq, up_to_seq))
+        candidate_ids = [row['candidate_id'] for row in cursor.fetchall()]
+        
+        conn.close()
+        return candidate_ids, complete
+    
+    def prune_candidate_changes(self, keep: int) -> int:
+        """
+        Drop all but the newest `keep` change-log entries
+        
+        Every worker reads the log from its own position, so it is trimmed
+        by length; a worker that falls further behind reloads its index.
+        
+        Returns:
+            Rows deleted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            DELETE FROM candidate_changes WHERE seq <= (
+                SELECT seq FROM sqlite_sequence WHERE name = 'candidate_changes'
+            ) - ?
+        ''', (keep,))
+        deleted = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return deleted
+    
     # ============================================================
     # PERSON C: DATABASE CREATION (QUESTIONS)
     # ============================================================
@@ -329,6 +685,205 @@ class DatabaseManager:
             'created_at': row['created_at']
         } for row in rows]
     
+    def iter_question_rows(self, batch_size: int = 5000,
+                           question_ids: Optional[List[str]] = None):
+        """
+        Stream raw question rows (JSON columns left undecoded) with ordinals
+        
+        Used to build columnar question indexes without materializing
+        every question as a dict.
+        
+        Args:
+            batch_size: Rows per yielded batch
+            question_ids: Only these questions (missing ids are skipped)
+        
+        Yields:
+            Lists of up to batch_size sqlite3.Row
+        """
+        query = '''
+            SELECT q.question_id, q.question_text, q.category, q.difficulty,
+                   q.topics, q.job_roles, q.embedding, q.ideal_keywords,
+                   q.created_at, q.updated_at, o.ordinal
+            FROM questions q
+            LEFT JOIN question_ordinals o ON o.question_id = q.question_id
+        '''
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            if question_ids is None:
+                cursor.execute(query)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+                return
+            
+            for start in range(0, len(question_ids), 500):
+                chunk = question_ids[start:start + 500]
+                cursor.execute(query + f"WHERE q.question_id IN ({','.join('?' * len(chunk))})",
+                              chunk)
+                rows = cursor.fetchall()
+                if rows:
+                    yield rows
+        finally:
+            conn.close()
+    
+    def get_question_change_seq(self) -> int:
+        """Newest question_changes sequence number (0 if none)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # sqlite_sequence keeps the high-water mark even after pruning
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'question_changes'")
+        row = cursor.fetchone()
+        
+        conn.close()
+        return row['seq'] if row else 0
+    
+    def get_question_changes(self, after_seq: int, up_to_seq: int) -> Tuple[List[str], bool]:
+        """
+        Questions inserted, updated or deleted in a change-log range
+        
+        Args:
+            after_seq: Exclusive lower bound
+            up_to_seq: Inclusive upper bound
+        
+        Returns:
+            (distinct question_ids, complete): complete is False if part of
+            the range was already pruned from the log
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT MIN(seq) AS seq FROM question_changes')
+        oldest = cursor.fetchone()['seq']
+        complete = up_to_seq <= after_seq or (oldest is not None and oldest <= after_seq + 1)
+        
+        cursor.execute('''
+            SELECT DISTINCT question_id FROM question_changes
+            WHERE seq > ? AND seq <= ?
+        ''', (after_seq, up_to_seq))
+        question_ids = [row['question_id'] for row in cursor.fetchall()]
+        
+        conn.close()
+        return question_ids, complete
+    
+    def prune_question_changes(self, up_to_seq: int) -> int:
+        """
+        Drop change-log entries already folded into a published index
+        
+        Returns:
+            Rows deleted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM question_changes WHERE seq <= ?', (up_to_seq,))
+        deleted = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return deleted
+    
+    def get_question_ordinals(self) -> Dict[str, int]:
+        """Map question_id -> dense ordinal (bit position in seen-sets)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT question_id, ordinal FROM question_ordinals')
+        ordinals = {row['question_id']: row['ordinal'] for row in cursor.fetchall()}
+        
+        conn.close()
+        return ordinals
+    
+    def backfill_question_ordinals(self) -> int:
+        """
+        Assign ordinals to questions inserted before question_ordinals existed
+        
+        Returns:
+            Number of ordinals added
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR IGNORE INTO question_ordinals (question_id)
+            SELECT question_id FROM questions ORDER BY rowid
+        ''')
+        added = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return added
+    
+    def get_question_counts(self, top_topics: int = 10) -> Dict:
+        """
+        Get question bank counters (never reads embeddings)
+        
+        Args:
+            top_topics: Number of most common topics to return
+        
+        Returns:
+            Dict with total, by_category, by_difficulty, top_topics
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT dimension, value, count FROM question_counts
+            WHERE dimension IN ('total', 'category', 'difficulty') AND count > 0
+        ''')
+        rows = cursor.fetchall()
+        
+        cursor.execute('''
+            SELECT value, count FROM question_counts
+            WHERE dimension = 'topic' AND count > 0
+            ORDER BY count DESC
+            LIMIT ?
+        ''', (top_topics,))
+        topic_rows = cursor.fetchall()
+        conn.close()
+        
+        counts = {'total': 0, 'by_category': {}, 'by_difficulty': {}}
+        for row in rows:
+            if row['dimension'] == 'total':
+                counts['total'] = row['count']
+            else:
+                counts[f"by_{row['dimension']}"][row['value']] = row['count']
+        
+        counts['top_topics'] = {row['value']: row['count'] for row in topic_rows}
+        return counts
+    
+    def rebuild_question_counts(self) -> int:
+        """
+        Recompute question_counts from the questions table
+        
+        Returns:
+            Number of counters written
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM question_counts')
+        cursor.execute('''
+            INSERT INTO question_counts (dimension, value, count)
+            SELECT 'total', '', COUNT(*) FROM questions
+            UNION ALL
+            SELECT 'category', category, COUNT(*) FROM questions GROUP BY category
+            UNION ALL
+            SELECT 'difficulty', difficulty, COUNT(*) FROM questions GROUP BY difficulty
+            UNION ALL
+            SELECT 'topic', t.value, COUNT(DISTINCT q.rowid)
+            FROM questions q, json_each(CASE WHEN json_valid(q.topics) THEN q.topics ELSE '[]' END) t
+            GROUP BY t.value
+        ''')
+        written = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return written
+    
     def get_questions_by_filter(self, category: Optional[str] = None,
                                difficulty: Optional[str] = None,
                                topic: Optional[str] = None) -> List[Dict]:
@@ -382,16 +937,74 @@ class DatabaseManager:
     # PERSON D: QUESTION RETRIEVAL
     # ============================================================
     
-    def get_question_by_id(self, question_id: str) -> Optional[Dict]:
-        """Get single question by ID"""
+    def search_questions_text(self, match: str, limit: int,
+                              category: Optional[str] = None,
+                              difficulty: Optional[str] = None,
+                              weights: Tuple[float, float, float] = SEARCH_BM25_WEIGHTS
+                              ) -> List[Tuple[str, float]]:
+        """
+        Full-text search over questions_fts, best BM25 match first
+        
+        Args:
+            match: FTS5 MATCH expression
+            limit: Maximum results
+            category: Optional category filter
+            difficulty: Optional difficulty filter
+            weights: BM25 weights of question_text, ideal_keywords, topics
+        
+        Returns:
+            List of (question_id, relevance); higher relevance is better
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM questions WHERE question_id = ?', 
-                      (question_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
+        query = '''
+            SELECT q.question_id, -bm25(questions_fts, ?, ?, ?) AS relevance
+            FROM questions_fts
+            JOIN questions q ON q.rowid = questions_fts.rowid
+            WHERE questions_fts MATCH ?
+        '''
+        params = [*weights, match]
+        if category:
+            query += ' AND q.category = ?'
+            params.append(category)
+        if difficulty:
+            query += ' AND q.difficulty = ?'
+            params.append(difficulty)
+        query += ' ORDER BY relevance DESC LIMIT ?'
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [(row['question_id'], row['relevance']) for row in rows]
+    
+    def rebuild_question_search_index(self) -> int:
+        """
+        Re-index every question in questions_fts (the triggers keep it
+        current afterwards)
+        
+        Returns:
+            Number of questions indexed
+        """
+        conn = self.get_connection()
+        conn.execute("INSERT INTO questions_fts (questions_fts) VALUES ('rebuild')")
+        conn.commit()
+        count = conn.execute('SELECT COUNT(*) AS count FROM questions').fetchone()['count']
+        conn.close()
+        return count
+    
+    def get_question_by_id(self, question_id: str) -> Optional[Dict]:
+        """Get single question by ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM questions WHERE question_id = ?', 
+                      (question_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
         if row:
             return {
                 'question_id': row['question_id'],
@@ -405,18 +1018,38 @@ class DatabaseManager:
             }
         return None
     
+    @staticmethod
+    def retrieval_cache_key(candidate_id: str, **params) -> str:
+        """
+        Build the retrieval_cache key for a candidate and retrieval parameters
+        
+        Args:
+            candidate_id: Candidate identifier
+            **params: Parameters that change the retrieved set
+        
+        Returns:
+            cache_id
+        """
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return f"{candidate_id}:{digest[:16]}"
+    
     def cache_retrieval_results(self, candidate_id: str,
                                question_ids: List[str],
                                similarity_scores: List[float],
-                               expiry_minutes: int = 5) -> str:
+                               expiry_minutes: int = 5,
+                               cache_key: Optional[str] = None) -> str:
         """
         Cache retrieval results for performance
         
+        Writes one row per cache key, replacing any earlier result for the
+        same key instead of appending.
+        
         Args:
             candidate_id: Candidate identifier
             question_ids: Retrieved question IDs
             similarity_scores: Corresponding similarity scores
             expiry_minutes: Cache expiry time
+            cache_key: Key from retrieval_cache_key (defaults to candidate_id)
         
         Returns:
             cache_id
@@ -424,12 +1057,17 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cache_id = str(uuid.uuid4())
+        cache_id = cache_key or candidate_id
         now = datetime.now()
         expires = now + timedelta(minutes=expiry_minutes)
         
         cursor.execute('''
             INSERT INTO retrieval_cache VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (cache_id) DO UPDATE SET
+                retrieved_questions = excluded.retrieved_questions,
+                similarity_scores = excluded.similarity_scores,
+                created_at = excluded.created_at,
+                expires_at = excluded.expires_at
         ''', (
             cache_id,
             candidate_id,
@@ -443,7 +1081,8 @@ class DatabaseManager:
         conn.close()
         return cache_id
     
-    def get_cached_retrieval(self, candidate_id: str) -> Optional[Dict]:
+    def get_cached_retrieval(self, candidate_id: str,
+                             cache_key: Optional[str] = None) -> Optional[Dict]:
         """Get cached retrieval results if not expired"""
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -452,10 +1091,8 @@ class DatabaseManager:
         
         cursor.execute('''
             SELECT * FROM retrieval_cache 
-            WHERE candidate_id = ? AND expires_at > ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (candidate_id, now))
+            WHERE cache_id = ? AND expires_at > ?
+        ''', (cache_key or candidate_id, now))
         
         row = cursor.fetchone()
         conn.close()
@@ -470,6 +1107,121 @@ class DatabaseManager:
             }
         return None
     
+    def save_interview_session(self, session_id: str, candidate_id: str,
+                               state: Dict, created_at: float) -> None:
+        """Store a new interview session"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO interview_sessions VALUES (?, ?, ?, 0, ?, ?)
+        ''', (session_id, candidate_id, json.dumps(state), created_at, created_at))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_interview_session(self, session_id: str,
+                              active_since: float = 0.0) -> Optional[Dict]:
+        """
+        Get an interview session
+        
+        Args:
+            session_id: Session identifier
+            active_since: Treat sessions idle since before this Unix time as gone
+        
+        Returns:
+            Dict with candidate_id, state, version, created_at, last_active
+            (None if missing or expired)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM interview_sessions
+            WHERE session_id = ? AND last_active >= ?
+        ''', (session_id, active_since))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row:
+            return {
+                'session_id': row['session_id'],
+                'candidate_id': row['candidate_id'],
+                'state': json.loads(row['state']),
+                'version': row['version'],
+                'created_at': row['created_at'],
+                'last_active': row['last_active']
+            }
+        return None
+    
+    def update_interview_session(self, session_id: str, state: Dict,
+                                 last_active: float, version: int) -> bool:
+        """
+        Replace a session's state if it is still at the version it was read at
+        
+        Returns:
+            False if another request updated (or deleted) the session first
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE interview_sessions
+            SET state = ?, last_active = ?, version = version + 1
+            WHERE session_id = ? AND version = ?
+        ''', (json.dumps(state), last_active, session_id, version))
+        updated = cursor.rowcount == 1
+        
+        conn.commit()
+        conn.close()
+        return updated
+    
+    def delete_interview_session(self, session_id: str) -> bool:
+        """Delete a session; True if it existed"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM interview_sessions WHERE session_id = ?', (session_id,))
+        deleted = cursor.rowcount == 1
+        
+        conn.commit()
+        conn.close()
+        return deleted
+    
+    def prune_interview_sessions(self, idle_before: float, max_sessions: int) -> int:
+        """
+        Delete sessions idle since before idle_before, then the least
+        recently active ones beyond max_sessions
+        
+        Returns:
+            Sessions deleted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM interview_sessions WHERE last_active < ?', (idle_before,))
+        deleted = cursor.rowcount
+        cursor.execute('''
+            DELETE FROM interview_sessions WHERE session_id IN (
+                SELECT session_id FROM interview_sessions
+                ORDER BY last_active DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_sessions,))
+        deleted += cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return deleted
+    
+    def count_interview_sessions(self, active_since: float = 0.0) -> int:
+        """Sessions active since a Unix time"""
+        conn = self.get_connection()
+        count = conn.execute('''
+            SELECT COUNT(*) AS count FROM interview_sessions WHERE last_active >= ?
+        ''', (active_since,)).fetchone()['count']
+        conn.close()
+        return count
+    
     # ============================================================
     # COMMON: INTERVIEW HISTORY (All team members use this)
     # ============================================================
@@ -497,6 +1249,7 @@ class DatabaseManager:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        now = datetime.now().isoformat()
         cursor.execute('''
             INSERT INTO interview_history 
             (candidate_id, question_id, answer_text, knowledge_score, 
@@ -509,43 +1262,444 @@ class DatabaseManager:
             knowledge_score,
             speech_score,
             total_score,
-            datetime.now().isoformat()
+            now
         ))
         
         history_id = cursor.lastrowid
+        
+        # Keep aggregates in the same transaction as the response
+        self._apply_response_to_stats(cursor, candidate_id, knowledge_score,
+                                      speech_score, total_score, now)
+        self._apply_response_to_rollups(cursor, candidate_id, question_id,
+                                        knowledge_score, speech_score,
+                                        total_score, now)
+        self._apply_response_to_seen(cursor, candidate_id, question_id, now)
+        
         conn.commit()
         conn.close()
         return history_id
     
-    def get_candidate_statistics(self, candidate_id: str) -> Dict:
-        """Get performance statistics for a candidate"""
+    def _apply_response_to_stats(self, cursor, candidate_id: str,
+                                 knowledge_score: float,
+                                 speech_score: float,
+                                 total_score: float,
+                                 timestamp: str):
+        """Fold one response into candidate_stats using an open cursor"""
+        cursor.execute('SELECT * FROM candidate_stats WHERE candidate_id = ?',
+                      (candidate_id,))
+        row = cursor.fetchone()
+        
+        if row:
+            count = row['response_count']
+            sums = [row['sum_knowledge'], row['sum_speech'], row['sum_total']]
+            min_total, max_total = row['min_total'], row['max_total']
+            recent = json.loads(row['recent_scores'])
+        else:
+            count, sums, min_total, max_total, recent = 0, [0.0, 0.0, 0.0], None, None, []
+        
+        total = total_score or 0.0
+        recent = ([total] + recent)[:2 * TREND_WINDOW]
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO candidate_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            candidate_id,
+            count + 1,
+            sums[0] + (knowledge_score or 0.0),
+            sums[1] + (speech_score or 0.0),
+            sums[2] + total,
+            total if min_total is None else min(min_total, total),
+            total if max_total is None else max(max_total, total),
+            json.dumps(recent),
+            sum(recent[:TREND_WINDOW]),
+            sum(recent[TREND_WINDOW:]),
+            timestamp,
+            datetime.now().isoformat()
+        ))
+    
+    def _apply_response_to_seen(self, cursor, candidate_id: str,
+                                question_id: str, timestamp: str):
+        """Set the question's bit in the candidate's seen-set using an open cursor"""
+        cursor.execute('SELECT ordinal FROM question_ordinals WHERE question_id = ?',
+                      (question_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        
+        cursor.execute('SELECT bitmap FROM candidate_seen WHERE candidate_id = ?',
+                      (candidate_id,))
+        seen_row = cursor.fetchone()
+        seen = Bitset.from_compact_bytes(seen_row['bitmap'] if seen_row else None)
+        
+        if row['ordinal'] in seen and seen_row:
+            return
+        seen.add(row['ordinal'])
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO candidate_seen VALUES (?, ?, ?, ?)
+        ''', (candidate_id, seen.to_compact_bytes(), len(seen), timestamp))
+    
+    def get_seen_set(self, candidate_id: str,
+                     since: Optional[str] = None) -> Tuple[Bitset, int]:
+        """
+        Get the ordinals of questions a candidate has answered
+        
+        Args:
+            candidate_id: Candidate identifier
+            since: Only count answers at or after this ISO timestamp
+                   (None = all time, read from the persisted seen-set)
+        
+        Returns:
+            (Bitset of question ordinals, number of answers it reflects)
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        if since is None:
+            cursor.execute('SELECT bitmap, seen_count FROM candidate_seen WHERE candidate_id = ?',
+                          (candidate_id,))
+            row = cursor.fetchone()
+            conn.close()
+            if row is None:
+                return Bitset(), 0
+            return Bitset.from_compact_bytes(row['bitmap']), row['seen_count']
+        
+        # Cooldown window: only the recent slice of history is read
         cursor.execute('''
-            SELECT 
-                COUNT(*) as total_questions,
-                AVG(knowledge_score) as avg_knowledge,
-                AVG(speech_score) as avg_speech,
-                AVG(total_score) as avg_total,
-                MAX(total_score) as best_score,
-                MIN(total_score) as worst_score
-            FROM interview_history
-            WHERE candidate_id = ?
-        ''', (candidate_id,))
+            SELECT o.ordinal FROM interview_history h
+            JOIN question_ordinals o ON o.question_id = h.question_id
+            WHERE h.candidate_id = ? AND h.timestamp >= ?
+        ''', (candidate_id, since))
+        ordinals = [row['ordinal'] for row in cursor.fetchall()]
+        conn.close()
+        
+        seen = Bitset()
+        seen.update(ordinals)
+        return seen, len(ordinals)
+    
+    def rebuild_seen_sets(self, candidate_id: Optional[str] = None) -> int:
+        """
+        Recompute candidate_seen from interview_history
+        
+        Args:
+            candidate_id: Rebuild one candidate (all candidates if None)
+        
+        Returns:
+            Number of candidates written
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
+        where = 'WHERE h.candidate_id = ?' if candidate_id else ''
+        params = (candidate_id,) if candidate_id else ()
+        
+        cursor.execute(f'''
+            SELECT h.candidate_id, o.ordinal FROM interview_history h
+            JOIN question_ordinals o ON o.question_id = h.question_id
+            {where}
+        ''', params)
+        
+        seen = {}
+        for row in cursor.fetchall():
+            seen.setdefault(row['candidate_id'], Bitset()).add(row['ordinal'])
+        
+        if candidate_id:
+            cursor.execute('DELETE FROM candidate_seen WHERE candidate_id = ?', params)
+        else:
+            cursor.execute('DELETE FROM candidate_seen')
+        
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO candidate_seen VALUES (?, ?, ?, ?)
+        ''', [(cid, bits.to_compact_bytes(), len(bits), now) for cid, bits in seen.items()])
+        
+        conn.commit()
+        conn.close()
+        return len(seen)
+    
+    @staticmethod
+    def rollup_bucket_start(timestamp: str, granularity: str) -> str:
+        """First day of the rollup bucket containing timestamp (ISO date)"""
+        day = datetime.fromisoformat(timestamp).date()
+        if granularity == 'week':
+            day -= timedelta(days=day.weekday())
+        return day.isoformat()
+    
+    def _apply_response_to_rollups(self, cursor, candidate_id: str,
+                                   question_id: str,
+                                   knowledge_score: float,
+                                   speech_score: float,
+                                   total_score: float,
+                                   timestamp: str):
+        """Add one response to the day/week rollups using an open cursor"""
+        cursor.execute('SELECT category FROM questions WHERE question_id = ?',
+                      (question_id,))
         row = cursor.fetchone()
+        categories = ['all', row['category']] if row else ['all']
+        
+        rows = [
+            (candidate_id, granularity, category,
+             self.rollup_bucket_start(timestamp, granularity),
+             knowledge_score or 0.0, speech_score or 0.0, total_score or 0.0)
+            for granularity in ROLLUP_GRANULARITIES
+            for category in categories
+        ]
+        
+        cursor.executemany('''
+            INSERT INTO performance_rollups VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+            ON CONFLICT (candidate_id, granularity, category, bucket_start) DO UPDATE SET
+                response_count = response_count + 1,
+                sum_knowledge = sum_knowledge + excluded.sum_knowledge,
+                sum_speech = sum_speech + excluded.sum_speech,
+                sum_total = sum_total + excluded.sum_total
+        ''', rows)
+    
+    def get_performance_rollups(self, candidate_id: str,
+                                granularity: str = 'day',
+                                start: Optional[str] = None,
+                                end: Optional[str] = None,
+                                category: Optional[str] = 'all') -> List[Dict]:
+        """
+        Get time-bucketed score rollups
+        
+        Args:
+            candidate_id: Candidate identifier
+            granularity: 'day' or 'week'
+            start: Optional first bucket date (inclusive, ISO date)
+            end: Optional last bucket date (inclusive, ISO date)
+            category: Question category, 'all' for every response, or None
+                      for one series per category
+        
+        Returns:
+            Buckets ordered by category, then bucket_start
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = '''
+            SELECT * FROM performance_rollups
+            WHERE candidate_id = ? AND granularity = ?
+        '''
+        params = [candidate_id, granularity]
+        
+        if category is None:
+            query += " AND category != 'all'"
+        else:
+            query += ' AND category = ?'
+            params.append(category)
+        
+        if start:
+            query += ' AND bucket_start >= ?'
+            params.append(self.rollup_bucket_start(start, granularity))
+        
+        if end:
+            query += ' AND bucket_start <= ?'
+            params.append(end)
+        
+        query += ' ORDER BY category, bucket_start'
+        
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
         conn.close()
         
+        return [{
+            'category': row['category'],
+            'bucket_start': row['bucket_start'],
+            'response_count': row['response_count'],
+            'avg_knowledge_score': round(row['sum_knowledge'] / row['response_count'], 4),
+            'avg_speech_score': round(row['sum_speech'] / row['response_count'], 4),
+            'avg_total_score': round(row['sum_total'] / row['response_count'], 4)
+        } for row in rows]
+    
+    def rebuild_performance_rollups(self, candidate_id: Optional[str] = None) -> int:
+        """
+        Recompute performance_rollups from interview_history
+        
+        Args:
+            candidate_id: Rebuild one candidate (all candidates if None)
+        
+        Returns:
+            Number of rollup rows written
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        where = 'WHERE h.candidate_id = ?' if candidate_id else ''
+        params = [candidate_id] if candidate_id else []
+        
+        if candidate_id:
+            cursor.execute('DELETE FROM performance_rollups WHERE candidate_id = ?',
+                          (candidate_id,))
+        else:
+            cursor.execute('DELETE FROM performance_rollups')
+        
+        # Weeks start on Monday, matching rollup_bucket_start
+        buckets = {
+            'day': "date(h.timestamp)",
+            'week': "date(h.timestamp, 'weekday 0', '-6 days')"
+        }
+        
+        written = 0
+        for granularity in ROLLUP_GRANULARITIES:
+            bucket = buckets[granularity]
+            for category_expr, join in (("'all'", ''),
+                                        ('q.category', 'JOIN questions q ON q.question_id = h.question_id')):
+                cursor.execute(f'''
+                    INSERT INTO performance_rollups
+                    SELECT h.candidate_id, ?, {category_expr}, {bucket},
+                           COUNT(*),
+                           COALESCE(SUM(h.knowledge_score), 0),
+                           COALESCE(SUM(h.speech_score), 0),
+                           COALESCE(SUM(h.total_score), 0)
+                    FROM interview_history h {join}
+                    {where}
+                    GROUP BY h.candidate_id, {category_expr}, {bucket}
+                ''', [granularity] + params)
+                written += cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return written
+    
+    def get_candidate_aggregates(self, candidate_id: str) -> Optional[Dict]:
+        """
+        Get raw performance aggregates for a candidate
+        
+        Candidates whose history predates candidate_stats are backfilled
+        on first read.
+        
+        Returns:
+            Aggregate dict, or None if the candidate has no responses
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM candidate_stats WHERE candidate_id = ?',
+                      (candidate_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row is None:
+            if not self.rebuild_candidate_stats(candidate_id):
+                return None
+            return self.get_candidate_aggregates(candidate_id)
+        
+        return {
+            'candidate_id': row['candidate_id'],
+            'response_count': row['response_count'],
+            'sum_knowledge': row['sum_knowledge'],
+            'sum_speech': row['sum_speech'],
+            'sum_total': row['sum_total'],
+            'min_total': row['min_total'],
+            'max_total': row['max_total'],
+            'recent_scores': json.loads(row['recent_scores']),
+            'recent_sum': row['recent_sum'],
+            'previous_sum': row['previous_sum'],
+            'last_response_at': row['last_response_at']
+        }
+    
+    def get_candidate_statistics(self, candidate_id: str) -> Dict:
+        """Get performance statistics for a candidate"""
+        return self.statistics_from_aggregates(self.get_candidate_aggregates(candidate_id))
+    
+    @staticmethod
+    def statistics_from_aggregates(aggregates: Optional[Dict]) -> Dict:
+        """Format raw aggregates as the public statistics dict"""
+        if not aggregates:
+            return {
+                'total_questions': 0,
+                'avg_knowledge_score': 0,
+                'avg_speech_score': 0,
+                'avg_total_score': 0,
+                'best_score': 0,
+                'worst_score': 0
+            }
+        
+        count = aggregates['response_count']
         return {
-            'total_questions': row['total_questions'],
-            'avg_knowledge_score': round(row['avg_knowledge'], 2) if row['avg_knowledge'] else 0,
-            'avg_speech_score': round(row['avg_speech'], 2) if row['avg_speech'] else 0,
-            'avg_total_score': round(row['avg_total'], 2) if row['avg_total'] else 0,
-            'best_score': round(row['best_score'], 2) if row['best_score'] else 0,
-            'worst_score': round(row['worst_score'], 2) if row['worst_score'] else 0
+            'total_questions': count,
+            'avg_knowledge_score': round(aggregates['sum_knowledge'] / count, 2),
+            'avg_speech_score': round(aggregates['sum_speech'] / count, 2),
+            'avg_total_score': round(aggregates['sum_total'] / count, 2),
+            'best_score': round(aggregates['max_total'], 2) if aggregates['max_total'] else 0,
+            'worst_score': round(aggregates['min_total'], 2) if aggregates['min_total'] else 0
         }
     
+    def rebuild_candidate_stats(self, candidate_id: Optional[str] = None) -> int:
+        """
+        Recompute candidate_stats from interview_history
+        
+        Args:
+            candidate_id: Rebuild one candidate (all candidates if None)
+        
+        Returns:
+            Number of candidates written
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        where = 'WHERE candidate_id = ?' if candidate_id else ''
+        params = (candidate_id,) if candidate_id else ()
+        
+        # Recent windows, newest first
+        cursor.execute(f'''
+            SELECT candidate_id, total_score FROM (
+                SELECT candidate_id, total_score,
+                       ROW_NUMBER() OVER (PARTITION BY candidate_id
+                                          ORDER BY history_id DESC) AS rn
+                FROM interview_history {where}
+            )
+            WHERE rn <= ?
+            ORDER BY candidate_id, rn
+        ''', params + (2 * TREND_WINDOW,))
+        
+        windows = {}
+        for row in cursor.fetchall():
+            windows.setdefault(row['candidate_id'], []).append(row['total_score'] or 0.0)
+        
+        cursor.execute(f'''
+            SELECT candidate_id,
+                   COUNT(*) AS response_count,
+                   COALESCE(SUM(knowledge_score), 0) AS sum_knowledge,
+                   COALESCE(SUM(speech_score), 0) AS sum_speech,
+                   COALESCE(SUM(total_score), 0) AS sum_total,
+                   MIN(total_score) AS min_total,
+                   MAX(total_score) AS max_total,
+                   MAX(timestamp) AS last_response_at
+            FROM interview_history {where}
+            GROUP BY candidate_id
+        ''', params)
+        
+        now = datetime.now().isoformat()
+        rows = []
+        for row in cursor.fetchall():
+            recent = windows.get(row['candidate_id'], [])
+            rows.append((
+                row['candidate_id'],
+                row['response_count'],
+                row['sum_knowledge'],
+                row['sum_speech'],
+                row['sum_total'],
+                row['min_total'],
+                row['max_total'],
+                json.dumps(recent),
+                sum(recent[:TREND_WINDOW]),
+                sum(recent[TREND_WINDOW:]),
+                row['last_response_at'],
+                now
+            ))
+        
+        if candidate_id is None:
+            cursor.execute('DELETE FROM candidate_stats')
+        
+        cursor.executemany('''
+            INSERT OR REPLACE INTO candidate_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        
+        conn.commit()
+        conn.close()
+        return len(rows)
+    
     # ============================================================
     # UTILITY FUNCTIONS
     # ============================================================
@@ -563,6 +1717,144 @@ class DatabaseManager:
         conn.close()
         return deleted
     
+    def purge_expired_cache(self, batch_size: int = 500) -> int:
+        """
+        Delete expired cache rows in small batches
+        
+        Each batch is its own short transaction so request threads are not
+        locked out while a large backlog is cleared.
+        
+        Args:
+            batch_size: Rows deleted per transaction
+        
+        Returns:
+            Number of rows deleted
+        """
+        now = datetime.now().isoformat()
+        deleted = 0
+        
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM retrieval_cache WHERE cache_id IN (
+                    SELECT cache_id FROM retrieval_cache
+                    WHERE expires_at <= ?
+                    LIMIT ?
+                )
+            ''', (now, batch_size))
+            batch = cursor.rowcount
+            conn.commit()
+            conn.close()
+            
+            deleted += batch
+            if batch < batch_size:
+                return deleted
+    
+    def enforce_cache_limits(self, max_per_candidate: int,
+                             max_total: int,
+                             batch_size: int = 500) -> int:
+        """
+        Trim the oldest cache rows beyond per-candidate and overall limits
+        
+        Args:
+            max_per_candidate: Rows kept per candidate
+            max_total: Rows kept overall
+            batch_size: Rows deleted per transaction
+        
+        Returns:
+            Number of rows deleted
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        deleted = 0
+        
+        cursor.execute('''
+            SELECT candidate_id FROM retrieval_cache
+            GROUP BY candidate_id
+            HAVING COUNT(*) > ?
+        ''', (max_per_candidate,))
+        
+        for row in cursor.fetchall():
+            cursor.execute('''
+                DELETE FROM retrieval_cache WHERE cache_id IN (
+                    SELECT cache_id FROM retrieval_cache
+                    WHERE candidate_id = ?
+                    ORDER BY created_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (row['candidate_id'], max_per_candidate))
+            deleted += cursor.rowcount
+            conn.commit()
+        
+        cursor.execute('SELECT COUNT(*) AS count FROM retrieval_cache')
+        overflow = cursor.fetchone()['count'] - max_total
+        
+        while overflow > 0:
+            cursor.execute('''
+                DELETE FROM retrieval_cache WHERE cache_id IN (
+                    SELECT cache_id FROM retrieval_cache
+                    ORDER BY created_at
+                    LIMIT ?
+                )
+            ''', (min(batch_size, overflow),))
+            if cursor.rowcount == 0:
+                break
+            deleted += cursor.rowcount
+            overflow -= cursor.rowcount
+            conn.commit()
+        
+        conn.close()
+        return deleted
+    
+    def get_cache_table_stats(self) -> Dict:
+        """Get retrieval_cache size"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COUNT(*) AS row_count,
+                   COUNT(DISTINCT candidate_id) AS candidates,
+                   COALESCE(SUM(length(retrieved_questions) + length(similarity_scores)), 0) AS payload_bytes
+            FROM retrieval_cache
+        ''')
+        row = cursor.fetchone()
+        
+        cursor.execute('SELECT COUNT(*) AS count FROM retrieval_cache WHERE expires_at <= ?',
+                      (datetime.now().isoformat(),))
+        expired = cursor.fetchone()['count']
+        conn.close()
+        
+        return {
+            'row_count': row['row_count'],
+            'expired_rows': expired,
+            'candidates': row['candidates'],
+            'payload_bytes': row['payload_bytes']
+        }
+    
+    def get_change_versions(self, scopes: List[str]) -> Dict[str, int]:
+        """
+        Current data versions, bumped by triggers on every write
+        
+        Args:
+            scopes: e.g. ['questions', 'candidate:<id>']
+        
+        Returns:
+            Dict of scope -> version (0 if never changed), plus 'epoch'
+        """
+        wanted = list(dict.fromkeys(['epoch'] + list(scopes)))
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT scope, version FROM change_counters
+            WHERE scope IN ({','.join('?' * len(wanted))})
+        ''', wanted)
+        found = {row['scope']: row['version'] for row in cursor.fetchall()}
+        
+        conn.close()
+        return {scope: found.get(scope, 0) for scope in wanted}
+    
     def get_database_stats(self) -> Dict:
         """Get database statistics"""
         conn = self.get_connection()
@@ -570,8 +1862,9 @@ class DatabaseManager:
         
         stats = {}
         
-        cursor.execute('SELECT COUNT(*) as count FROM questions')
-        stats['total_questions'] = cursor.fetchone()['count']
+        cursor.execute("SELECT count FROM question_counts WHERE dimension = 'total'")
+        row = cursor.fetchone()
+        stats['total_questions'] = row['count'] if row else 0
         
         cursor.execute('SELECT COUNT(*) as count FROM candidate_profiles')
         stats['total_candidates'] = cursor.fetchone()['count']
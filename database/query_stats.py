@@ -0,0 +1,267 @@
+"""
+Per-statement timing for every connection DatabaseManager opens
+
+TimedConnection / TimedCursor time execute() plus the fetch*() calls that
+follow it. They keep rolling stats per normalized statement and log any
+statement slower than SLOW_QUERY_MS together with its EXPLAIN QUERY PLAN.
+A slow statement whose plan only looks rows up by key spent that time
+waiting for the database lock, so it is counted as a lock wait instead.
+The stats are per process; GET /api/admin/query-stats shows those of the
+worker serving it.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+from config import (SLOW_QUERY_MS, QUERY_STATS_WINDOW, QUERY_STATS_MAX_STATEMENTS,
+                    SLOW_QUERY_LOG_SIZE)
+from utils.metrics import current_db_method
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\?(\s*,\s*\?)+')
+_PLAIN_INSERT = re.compile(r'\s*(INSERT|REPLACE)\b', re.IGNORECASE)
+OVERFLOW_STATEMENT = '<other statements>'
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(sql: str) -> str:
+    """One line, IN (?, ?, ...) lists of any length folded together"""
+    return _PLACEHOLDER_LIST.sub('?, ...', _WHITESPACE.sub(' ', sql).strip())
+
+
+def lock_bound(plan: Optional[List[str]]) -> bool:
+    """True if the plan cannot make the statement slow (no scan, no sort)"""
+    if plan is None:
+        return False
+    return not any(line.lstrip().startswith(('SCAN', 'USE TEMP B-TREE')) for line in plan)
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class QueryStats:
+    """Rolling timings per statement plus a log of recent slow statements"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, window: int = QUERY_STATS_WINDOW,
+                 max_statements: int = QUERY_STATS_MAX_STATEMENTS,
+                 slow_log_size: int = SLOW_QUERY_LOG_SIZE):
+        self.slow_seconds = slow_ms / 1000
+        self.window = window
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self.since = datetime.now().isoformat(timespec='seconds')
+
+    def record(self, statement: str, seconds: float, method: str, fetch: bool = False) -> None:
+        """
+        Add one execution (or the fetch time of the last one)
+
+        Args:
+            statement: Normalized statement
+            seconds: Elapsed time
+            method: DatabaseManager method that ran it
+            fetch: Time spent fetching rows of an execution already counted
+        """
+        with self._lock:
+            if fetch:
+                entry = self._stats.get(statement) or self._stats.get(OVERFLOW_STATEMENT)
+                if entry is not None and entry['recent']:
+                    entry['total'] += seconds
+                    entry['recent'][-1] += seconds
+                    entry['max'] = max(entry['max'], entry['recent'][-1])
+                return
+            entry = self._stats.get(statement)
+            if entry is None:
+                if len(self._stats) >= self.max_statements:
+                    statement = OVERFLOW_STATEMENT
+                    entry = self._stats.get(statement)
+                if entry is None:
+                    entry = self._stats[statement] = {
+                        'calls': 0, 'total': 0.0, 'max': 0.0, 'lock_waits': 0,
+                        'lock_wait': 0.0, 'recent': deque(maxlen=self.window),
+                        'methods': {}}
+            entry['total'] += seconds
+            entry['calls'] += 1
+            entry['max'] = max(entry['max'], seconds)
+            entry['recent'].append(seconds)
+            entry['methods'][method] = entry['methods'].get(method, 0) + 1
+
+    def log_slow(self, conn: sqlite3.Connection, sql: str, parameters, seconds: float,
+                 method: str, single: bool = True) -> None:
+        """
+        Keep and log a slow statement with its query plan
+
+        The default rollback journal makes statements wait (up to the
+        connection timeout) for another connection's write lock. Without a
+        busy-handler hook that wait cannot be timed on its own, but it is
+        the only way execute() of a keyed lookup or a plain INSERT gets
+        slow, so those are counted as lock waits rather than logged.
+
+        Args:
+            single: The time is one execute() alone; False for
+                executemany and once fetches are included, which is work
+        """
+        statement = normalize_statement(sql)
+        # INSERT ... VALUES has no plan, and EXPLAIN would tell nothing
+        plan = [] if _PLAIN_INSERT.match(sql) and 'SELECT' not in statement.upper() \
+            else explain(conn, sql, parameters)
+        if single and lock_bound(plan):
+            self.record_lock_wait(statement, seconds)
+            logger.debug("Lock wait %.1f ms in %s: %s", seconds * 1000, method, statement)
+            return
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'statement': statement,
+            'method': method,
+            'duration_ms': round(seconds * 1000, 2),
+            'plan': plan
+        }
+        with self._lock:
+            self._slow.append(entry)
+        logger.warning("Slow query", extra=entry)
+
+    def record_lock_wait(self, statement: str, seconds: float) -> None:
+        """Count an execution whose time went on waiting for the lock"""
+        with self._lock:
+            entry = self._stats.get(statement) or self._stats.get(OVERFLOW_STATEMENT)
+            if entry is not None:
+                entry['lock_waits'] += 1
+                entry['lock_wait'] += seconds
+
+    def summary(self, sort: str = 'total', limit: int = 50) -> Dict:
+        """
+        Statements ordered by total, mean, max or calls
+
+        Returns:
+            {'since', 'slow_query_ms', 'lock_wait_ms', 'statements': [...],
+             'slow_queries': [...]}
+        """
+        with self._lock:
+            rows = []
+            for statement, entry in self._stats.items():
+                recent = sorted(entry['recent'])
+                rows.append({
+                    'statement': statement,
+                    'calls': entry['calls'],
+                    'total_ms': round(entry['total'] * 1000, 3),
+                    'mean_ms': round(entry['total'] * 1000 / max(entry['calls'], 1), 3),
+                    'max_ms': round(entry['max'] * 1000, 3),
+                    'lock_waits': entry['lock_waits'],
+                    'lock_wait_ms': round(entry['lock_wait'] * 1000, 3),
+                    'recent_p50_ms': round(_percentile(recent, 0.5) * 1000, 3) if recent else None,
+                    'recent_p95_ms': round(_percentile(recent, 0.95) * 1000, 3) if recent else None,
+                    'methods': dict(entry['methods'])
+                })
+            slow = list(self._slow)
+        key = {'total': 'total_ms', 'mean': 'mean_ms', 'max': 'max_ms', 'calls': 'calls'}[sort]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return {'since': self.since,
+                'slow_query_ms': self.slow_seconds * 1000,
+                'lock_wait_ms': round(sum(row['lock_wait_ms'] for row in rows), 3),
+                'statement_count': len(rows),
+                'statements': rows[:limit],
+                'slow_queries': slow[::-1]}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self.since = datetime.now().isoformat(timespec='seconds')
+
+
+def explain(conn: sqlite3.Connection, sql: str, parameters=()) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN as indented lines, or None if it cannot be planned"""
+    try:
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+query_stats = QueryStats()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor recording each statement in query_stats"""
+
+    _statement = None  # Normalized statement whose fetches are still timed
+    _sql = None
+    _parameters = None
+    _elapsed = 0.0
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._finish_execute(sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._finish_execute(sql, None, time.perf_counter() - started)
+
+    def _finish_execute(self, sql: str, parameters, elapsed: float) -> None:
+        method = current_db_method()
+        self._statement = normalize_statement(sql)
+        self._sql, self._parameters = sql, parameters
+        self._elapsed = elapsed
+        query_stats.record(self._statement, elapsed, method)
+        if elapsed >= query_stats.slow_seconds:
+            # executemany has no single parameter set to plan with
+            query_stats.log_slow(self.connection, sql, parameters or (), elapsed, method,
+                                 single=parameters is not None)
+            self._statement = None
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            if self._statement is not None:
+                elapsed = time.perf_counter() - started
+                query_stats.record(self._statement, elapsed, None, fetch=True)
+                self._elapsed += elapsed
+                if self._elapsed >= query_stats.slow_seconds:
+                    self._statement = None
+                    query_stats.log_slow(self.connection, self._sql, self._parameters or (),
+                                         self._elapsed, current_db_method(), single=False)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute) are TimedCursors"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,44 @@
+"""
+Rebuild materialized aggregates from interview history
+Run after restoring data or upgrading an existing database:
+python -m database.rebuild_aggregates [--candidate CANDIDATE_ID]
+"""
+
+import argparse
+import logging
+from database.init_db import migrate_database
+from database.operations import DatabaseManager
+from utils.logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+def rebuild_aggregates(db_path='interview_system.db', candidate_id=None):
+    """Recompute every materialized aggregate table"""
+    migrate_database(db_path)
+    db = DatabaseManager(db_path)
+    
+    count = db.rebuild_candidate_stats(candidate_id)
+    logger.info("candidate_stats rebuilt", extra={'candidates': count})
+    
+    count = db.rebuild_performance_rollups(candidate_id)
+    logger.info("performance_rollups rebuilt", extra={'buckets': count})
+    
+    db.backfill_question_ordinals()
+    count = db.rebuild_seen_sets(candidate_id)
+    logger.info("candidate_seen rebuilt", extra={'candidates': count})
+    
+    if candidate_id is None:
+        count = db.rebuild_question_counts()
+        logger.info("question_counts rebuilt", extra={'counters': count})
+        
+        count = db.rebuild_resume_signatures()
+        logger.info("resume_signatures rebuilt", extra={'resumes': count})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='interview_system.db', help='Database path')
+    parser.add_argument('--candidate', help='Only rebuild this candidate')
+    args = parser.parse_args()
+    
+    configure_logging(plain=True)
+    rebuild_aggregates(args.db, args.candidate)
@@ -3,14 +3,17 @@ Generate sample data for testing
 Run: python -m database.sample_data
 """
 
+import logging
 from database.operations import DatabaseManager
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 def generate_sample_data():
     """Generate sample questions and candidate for testing"""
     db = DatabaseManager()
     
-    print("🔄 Generating sample data...")
+    logger.info("Generating sample data")
     
     # Sample questions
     sample_questions = [
@@ -44,7 +47,7 @@ def generate_sample_data():
     ]
     
     question_ids = db.bulk_insert_questions(sample_questions)
-    print(f"✅ Inserted {len(question_ids)} sample questions")
+    logger.info("Inserted sample questions", extra={'questions': len(question_ids)})
     
     # Sample candidate
     candidate_id = 'test-candidate-001'
@@ -77,7 +80,7 @@ def generate_sample_data():
     }
     
     db.insert_parsed_resume(candidate_id, resume_data)
-    print(f"✅ Inserted sample candidate: {candidate_id}")
+    logger.info("Inserted sample candidate", extra={'candidate_id': candidate_id})
     
     # Sample profile vector
     profile_vector = np.random.rand(384).tolist()
@@ -88,7 +91,7 @@ def generate_sample_data():
     }
     
     db.insert_candidate_profile(candidate_id, profile_vector, metadata)
-    print(f"✅ Created profile vector for: {candidate_id}")
+    logger.info("Created profile vector", extra={'candidate_id': candidate_id})
     
     # Sample interview response
     db.add_interview_response(
@@ -99,13 +102,13 @@ def generate_sample_data():
         speech_score=0.75,
         total_score=0.80
     )
-    print(f"✅ Added sample interview response")
+    logger.info("Added sample interview response")
     
     # Show stats
     stats = db.get_database_stats()
-    print("\n📊 Database Statistics:")
-    for key, value in stats.items():
-        print(f"   {key}: {value}")
+    logger.info("Database statistics", extra=stats)
 
 if __name__ == "__main__":
+    from utils.logging_setup import configure_logging
+    configure_logging(plain=True)
     generate_sample_data()
\ No newline at end of file
@@ -52,7 +52,7 @@ CREATE TABLE IF NOT EXISTS interview_history (
 
 -- Table 5: Question retrieval cache (optional, for performance)
 CREATE TABLE IF NOT EXISTS retrieval_cache (
-    cache_id TEXT PRIMARY KEY,
+    cache_id TEXT PRIMARY KEY,  -- Cache key: one row per candidate + retrieval parameters
     candidate_id TEXT NOT NULL,
     retrieved_questions TEXT NOT NULL,  -- JSON array of question_ids
     similarity_scores TEXT NOT NULL,  -- JSON array of scores
@@ -60,9 +60,306 @@ CREATE TABLE IF NOT EXISTS retrieval_cache (
     expires_at TEXT NOT NULL
 );
 
+-- Table 6: Running profile-update state (Person B)
+CREATE TABLE IF NOT EXISTS profile_accumulators (
+    candidate_id TEXT PRIMARY KEY,
+    base_vector TEXT NOT NULL,  -- JSON array: profile vector the updates are blended into
+    accumulator TEXT NOT NULL,  -- JSON array: decayed, score-weighted sum of question embeddings
+    weight_sum REAL NOT NULL,  -- Decayed sum of the weights in accumulator
+    last_history_id INTEGER NOT NULL,  -- Newest interview_history row folded in
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY (candidate_id) REFERENCES candidate_profiles(candidate_id)
+);
+
+-- Table 7: Per-candidate performance aggregates, updated with every response
+CREATE TABLE IF NOT EXISTS candidate_stats (
+    candidate_id TEXT PRIMARY KEY,
+    response_count INTEGER NOT NULL DEFAULT 0,
+    sum_knowledge REAL NOT NULL DEFAULT 0,
+    sum_speech REAL NOT NULL DEFAULT 0,
+    sum_total REAL NOT NULL DEFAULT 0,
+    min_total REAL,
+    max_total REAL,
+    recent_scores TEXT NOT NULL DEFAULT '[]',  -- JSON array: last 2 * TREND_WINDOW total scores, newest first
+    recent_sum REAL NOT NULL DEFAULT 0,  -- Sum of the newest TREND_WINDOW scores
+    previous_sum REAL NOT NULL DEFAULT 0,  -- Sum of the TREND_WINDOW scores before those
+    last_response_at TEXT,
+    updated_at TEXT NOT NULL
+);
+
+-- Table 8: Daily/weekly score rollups per candidate and question category
+CREATE TABLE IF NOT EXISTS performance_rollups (
+    candidate_id TEXT NOT NULL,
+    granularity TEXT NOT NULL CHECK(granularity IN ('day', 'week')),
+    category TEXT NOT NULL,  -- Question category, or 'all'
+    bucket_start TEXT NOT NULL,  -- ISO date of the first day in the bucket (weeks start Monday)
+    response_count INTEGER NOT NULL DEFAULT 0,
+    sum_knowledge REAL NOT NULL DEFAULT 0,
+    sum_speech REAL NOT NULL DEFAULT 0,
+    sum_total REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (candidate_id, granularity, category, bucket_start)
+) WITHOUT ROWID;
+
+-- Table 9: Question bank counters, maintained by the triggers below
+CREATE TABLE IF NOT EXISTS question_counts (
+    dimension TEXT NOT NULL,  -- 'total' | 'category' | 'difficulty' | 'topic'
+    value TEXT NOT NULL,  -- '' for 'total'
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_question_counts_insert AFTER INSERT ON questions
+BEGIN
+    INSERT INTO question_counts (dimension, value, count)
+    SELECT dimension, value, 1 FROM (
+        SELECT 'total' AS dimension, '' AS value
+        UNION ALL SELECT 'category', NEW.category
+        UNION ALL SELECT 'difficulty', NEW.difficulty
+        UNION ALL SELECT DISTINCT 'topic', value
+            FROM json_each(CASE WHEN json_valid(NEW.topics) THEN NEW.topics ELSE '[]' END)
+    ) WHERE true
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_question_counts_delete AFTER DELETE ON questions
+BEGIN
+    UPDATE question_counts SET count = count - 1
+    WHERE (dimension = 'total' AND value = '')
+       OR (dimension = 'category' AND value = OLD.category)
+       OR (dimension = 'difficulty' AND value = OLD.difficulty)
+       OR (dimension = 'topic' AND value IN (
+            SELECT value FROM json_each(CASE WHEN json_valid(OLD.topics) THEN OLD.topics ELSE '[]' END)));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_question_counts_update AFTER UPDATE OF category, difficulty, topics ON questions
+BEGIN
+    UPDATE question_counts SET count = count - 1
+    WHERE (dimension = 'category' AND value = OLD.category)
+       OR (dimension = 'difficulty' AND value = OLD.difficulty)
+       OR (dimension = 'topic' AND value IN (
+            SELECT value FROM json_each(CASE WHEN json_valid(OLD.topics) THEN OLD.topics ELSE '[]' END)));
+
+    INSERT INTO question_counts (dimension, value, count)
+    SELECT dimension, value, 1 FROM (
+        SELECT 'category' AS dimension, NEW.category AS value
+        UNION ALL SELECT 'difficulty', NEW.difficulty
+        UNION ALL SELECT DISTINCT 'topic', value
+            FROM json_each(CASE WHEN json_valid(NEW.topics) THEN NEW.topics ELSE '[]' END)
+    ) WHERE true
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+END;
+
+-- Table 10: Dense, stable integer ids for questions (bit positions in seen-sets)
+CREATE TABLE IF NOT EXISTS question_ordinals (
+    ordinal INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL UNIQUE
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_question_ordinals_insert AFTER INSERT ON questions
+BEGIN
+    INSERT OR IGNORE INTO question_ordinals (question_id) VALUES (NEW.question_id);
+END;
+
+-- Table 11: Questions each candidate has answered, as a compact bitset over ordinals
+CREATE TABLE IF NOT EXISTS candidate_seen (
+    candidate_id TEXT PRIMARY KEY,
+    bitmap BLOB NOT NULL,  -- utils.bitset.Bitset.to_compact_bytes()
+    seen_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+
+-- Table 12: Data versions behind cacheable API responses (HTTP ETags)
+-- scope: 'questions' (question bank), 'candidate:<id>' (profile, resume, history), 'epoch'
+CREATE TABLE IF NOT EXISTS change_counters (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Random per-database value, so a replaced database file never reuses old ETags
+INSERT OR IGNORE INTO change_counters (scope, version) VALUES ('epoch', abs(random() % 1000000000));
+
+CREATE TRIGGER IF NOT EXISTS trg_change_questions_insert AFTER INSERT ON questions
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('questions', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_questions_update AFTER UPDATE ON questions
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('questions', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_questions_delete AFTER DELETE ON questions
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('questions', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_profile_insert AFTER INSERT ON candidate_profiles
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || NEW.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_profile_update AFTER UPDATE ON candidate_profiles
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || NEW.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_profile_delete AFTER DELETE ON candidate_profiles
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || OLD.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_resume_insert AFTER INSERT ON parsed_resumes
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || NEW.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_resume_update AFTER UPDATE ON parsed_resumes
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || NEW.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_history_insert AFTER INSERT ON interview_history
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || NEW.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_history_delete AFTER DELETE ON interview_history
+BEGIN
+    INSERT INTO change_counters (scope, version) VALUES ('candidate:' || OLD.candidate_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+-- Table 13: Question change log, read by incremental question index rebuilds
+CREATE TABLE IF NOT EXISTS question_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_question_changes_insert AFTER INSERT ON questions
+BEGIN
+    INSERT INTO question_changes (question_id) VALUES (NEW.question_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_question_changes_update AFTER UPDATE ON questions
+BEGIN
+    INSERT INTO question_changes (question_id) VALUES (OLD.question_id);
+    INSERT INTO question_changes (question_id)
+    SELECT NEW.question_id WHERE NEW.question_id <> OLD.question_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_question_changes_delete AFTER DELETE ON questions
+BEGIN
+    INSERT INTO question_changes (question_id) VALUES (OLD.question_id);
+END;
+
+-- Table 14: Full-text index over question text, ideal keywords and topics
+-- External content: the text lives in questions, FTS5 keeps only the index.
+-- The JSON list columns are indexed as-is (the tokenizer drops the punctuation).
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+    question_text, ideal_keywords, topics,
+    content='questions', content_rowid='rowid',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_fts_insert AFTER INSERT ON questions
+BEGIN
+    INSERT INTO questions_fts (rowid, question_text, ideal_keywords, topics)
+    VALUES (NEW.rowid, NEW.question_text, NEW.ideal_keywords, NEW.topics);
+END;
+
+-- Only text changes re-index (not embedding or timestamp updates)
+CREATE TRIGGER IF NOT EXISTS trg_questions_fts_update
+AFTER UPDATE OF question_text, ideal_keywords, topics ON questions
+BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question_text, ideal_keywords, topics)
+    VALUES ('delete', OLD.rowid, OLD.question_text, OLD.ideal_keywords, OLD.topics);
+    INSERT INTO questions_fts (rowid, question_text, ideal_keywords, topics)
+    VALUES (NEW.rowid, NEW.question_text, NEW.ideal_keywords, NEW.topics);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_questions_fts_delete AFTER DELETE ON questions
+BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, question_text, ideal_keywords, topics)
+    VALUES ('delete', OLD.rowid, OLD.question_text, OLD.ideal_keywords, OLD.topics);
+END;
+
+-- Table 15: Candidate profile change log, read by in-memory candidate index refreshes
+CREATE TABLE IF NOT EXISTS candidate_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    candidate_id TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_candidate_changes_insert AFTER INSERT ON candidate_profiles
+BEGIN
+    INSERT INTO candidate_changes (candidate_id) VALUES (NEW.candidate_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_candidate_changes_update AFTER UPDATE ON candidate_profiles
+BEGIN
+    INSERT INTO candidate_changes (candidate_id) VALUES (OLD.candidate_id);
+    INSERT INTO candidate_changes (candidate_id)
+    SELECT NEW.candidate_id WHERE NEW.candidate_id <> OLD.candidate_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_candidate_changes_delete AFTER DELETE ON candidate_profiles
+BEGIN
+    INSERT INTO candidate_changes (candidate_id) VALUES (OLD.candidate_id);
+END;
+
+-- Table 16: MinHash signatures of resume text for duplicate detection
+CREATE TABLE IF NOT EXISTS resume_signatures (
+    candidate_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL  -- MINHASH_PERMUTATIONS little-endian uint32
+);
+
+-- LSH band buckets (one row per band): a lookup touches only the rows of
+-- the new resume's buckets. Rows of deleted resumes are left behind and
+-- dropped by the join with resume_signatures.
+CREATE TABLE IF NOT EXISTS resume_lsh_bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    candidate_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, candidate_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_resume_signature_delete AFTER DELETE ON parsed_resumes
+BEGIN
+    DELETE FROM resume_signatures WHERE candidate_id = OLD.candidate_id;
+END;
+
+-- Table 17: Interview sessions, shared by every worker process
+CREATE TABLE IF NOT EXISTS interview_sessions (
+    session_id TEXT PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    state TEXT NOT NULL,  -- JSON: question pools per difficulty, asked question ids, last score
+    version INTEGER NOT NULL DEFAULT 0,  -- Bumped by every update (optimistic concurrency)
+    created_at REAL NOT NULL,  -- Unix time
+    last_active REAL NOT NULL
+);
+
 -- Indexes for faster queries
 CREATE INDEX IF NOT EXISTS idx_candidate_history ON interview_history(candidate_id);
 CREATE INDEX IF NOT EXISTS idx_question_difficulty ON questions(difficulty);
 CREATE INDEX IF NOT EXISTS idx_question_category ON questions(category);
-CREATE INDEX IF NOT EXISTS idx_history_timestamp ON interview_history(timestamp DESC);
-CREATE INDEX IF NOT EXISTS idx_cache_candidate ON retrieval_cache(candidate_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_history_candidate_timestamp ON interview_history(candidate_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_cache_candidate_created ON retrieval_cache(candidate_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_cache_expires ON retrieval_cache(expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_created ON retrieval_cache(created_at);
+CREATE INDEX IF NOT EXISTS idx_question_counts_rank ON question_counts(dimension, count DESC);
+CREATE INDEX IF NOT EXISTS idx_session_last_active ON interview_sessions(last_active);
+
+-- Dropped after checking query plans (/api/admin/query-stats): no query reads
+-- interview_history by timestamp alone, and idx_cache_candidate_created serves
+-- every candidate_id lookup idx_cache_candidate did. Each one cost every
+-- insert an extra b-tree write.
+DROP INDEX IF EXISTS idx_history_timestamp;
+DROP INDEX IF EXISTS idx_cache_candidate;
\ No newline at end of file
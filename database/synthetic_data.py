@@ -0,0 +1,498 @@
+"""
+Generate large synthetic datasets for scale and load testing
+Same tables and shapes as database.sample_data, at millions of rows:
+questions with clustered embeddings, candidate resumes and profiles, and
+interview history. Rows are generated and written in batches, so memory
+stays flat. Rows and IDs depend only on the seed (timestamps are relative
+to the time of the run).
+
+Run: python -m database.synthetic_data --db synthetic.db --questions 1000000 \
+         --candidates 20000 --responses 5000000 [--seed 0] [--embeddings synthetic|model]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from config import VECTOR_DIMENSION, KNOWLEDGE_WEIGHT, SPEECH_WEIGHT
+from database.operations import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, stdlib json is used instead
+    orjson = None
+
+# Domains match ProfileCreator.create_metadata; each topic gets its own
+# embedding cluster inside its domain's cluster
+DOMAINS = {
+    'Machine Learning': ['Machine Learning', 'Deep Learning', 'TensorFlow', 'PyTorch',
+                         'NLP', 'Computer Vision', 'Model Evaluation'],
+    'Web Development': ['React', 'Angular', 'Vue', 'Node.js', 'Django', 'Flask',
+                        'CSS', 'Web Performance'],
+    'Data Science': ['Pandas', 'NumPy', 'SQL', 'Data Analysis', 'Statistics',
+                     'Data Visualization'],
+    'Cloud/DevOps': ['AWS', 'Azure', 'GCP', 'Docker', 'Kubernetes', 'CI/CD',
+                     'Monitoring'],
+    'Backend': ['Java', 'Spring', 'Microservices', 'REST API', 'Databases',
+                'Caching', 'System Design'],
+    'General': ['Problem Solving', 'Teamwork', 'Communication', 'Leadership',
+                'Conflict Resolution', 'Time Management']
+}
+DOMAIN_NAMES = list(DOMAINS)
+DOMAIN_WEIGHTS = [0.22, 0.2, 0.16, 0.14, 0.18, 0.1]
+DOMAIN_ROLES = {
+    'Machine Learning': ['ML Engineer', 'Data Scientist', 'Research Engineer'],
+    'Web Development': ['Frontend Developer', 'Full Stack Developer', 'Software Engineer'],
+    'Data Science': ['Data Scientist', 'Data Analyst', 'Analytics Engineer'],
+    'Cloud/DevOps': ['DevOps Engineer', 'Site Reliability Engineer', 'Cloud Engineer'],
+    'Backend': ['Backend Engineer', 'Software Engineer', 'Database Administrator'],
+    'General': ['Software Engineer', 'Product Manager', 'Engineering Manager']
+}
+
+CATEGORIES = ['technical', 'behavioral', 'situational']
+DIFFICULTIES = ['easy', 'medium', 'hard']
+DIFFICULTY_WEIGHTS = [0.3, 0.5, 0.2]
+# Category mix per domain: the General domain is mostly behavioral
+CATEGORY_WEIGHTS = {'General': [0.05, 0.6, 0.35]}
+DEFAULT_CATEGORY_WEIGHTS = [0.7, 0.15, 0.15]
+
+TEMPLATES = {
+    'technical': ['Explain how {a} works and when you would use it.',
+                  'What are the trade-offs between {a} and {b}?',
+                  'How would you debug a performance problem involving {a}?',
+                  'Design a system that uses {a} and {b} at scale.'],
+    'behavioral': ['Tell me about a time you had to learn {a} quickly.',
+                   'Describe a project where {a} was critical to success.',
+                   'Tell me about a disagreement over {a} and how it was resolved.'],
+    'situational': ['What would you do if a release depending on {a} failed?',
+                    'How would you introduce {a} to a team that uses {b}?',
+                    'A stakeholder questions your use of {a}. How do you respond?']
+}
+
+# Easier questions score higher
+DIFFICULTY_OFFSET = np.array([0.1, 0.0, -0.15])
+HISTORY_DAYS = 365
+# Rows generated per random stream; fixed so the data depends on the seed only
+QUESTION_BLOCK = 1000
+CANDIDATE_BLOCK = 500
+
+
+def _dumps(value) -> str:
+    """JSON text for lists and float arrays (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    return json.dumps(value)
+
+
+def _timestamps(now: datetime, seconds_ago: np.ndarray) -> List[str]:
+    """ISO timestamps (second precision) for offsets before now"""
+    times = np.datetime64(now, 's') - seconds_ago.astype('timedelta64[s]')
+    return times.astype(str).tolist()
+
+
+class SyntheticDataGenerator:
+    """Deterministic generator of question, candidate and history rows"""
+
+    def __init__(self, seed: int = 0, embeddings: str = 'synthetic',
+                 domain_spread: float = 0.6, topic_spread: float = 0.5, noise: float = 0.7):
+        """
+        Args:
+            seed: Same seed, same rows and IDs
+            embeddings: 'synthetic' (clustered random vectors) or 'model'
+                        (embed the question text with embedding_service)
+            domain_spread: Distance of topic centroids from their domain centroid
+            topic_spread: Weight of a question's secondary topic
+            noise: Norm of the per-question noise around its topic centroid
+        """
+        if embeddings not in ('synthetic', 'model'):
+            raise ValueError(f"Unknown embeddings mode: {embeddings}")
+        self.seed = seed
+        self.embeddings = embeddings
+        self.topic_spread = topic_spread
+        self.noise = noise
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_URL, f'synthetic-data/{seed}')
+        self.now = datetime.now().replace(microsecond=0)
+
+        rng = self._rng('centroids')
+        self.topics: List[Tuple[int, str]] = [(d, topic) for d, name in enumerate(DOMAIN_NAMES)
+                                              for topic in DOMAINS[name]]
+        topic_domains = np.array([d for d, _ in self.topics])
+        domain_centroids = rng.standard_normal((len(DOMAIN_NAMES), VECTOR_DIMENSION))
+        offsets = rng.standard_normal((len(self.topics), VECTOR_DIMENSION))
+        self.centroids = self._normalize(domain_centroids[topic_domains] + domain_spread * offsets)
+        self.domain_topics = [np.flatnonzero(topic_domains == d) for d in range(len(DOMAIN_NAMES))]
+        # Zipf-like topic popularity within each domain
+        self.topic_weights = [self._zipf(len(t)) for t in self.domain_topics]
+
+    @staticmethod
+    def _zipf(n: int) -> np.ndarray:
+        weights = 1.0 / np.arange(1, n + 1)
+        return weights / weights.sum()
+
+    def _rng(self, stream: str, block: int = 0) -> np.random.Generator:
+        """Independent random stream per (purpose, block)"""
+        return np.random.default_rng([self.seed, zlib.crc32(stream.encode()), block])
+
+    def _noise(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        return self.noise * rng.standard_normal((count, VECTOR_DIMENSION)) / np.sqrt(VECTOR_DIMENSION)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = vectors.astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.round(vectors, 6)
+
+    def question_id(self, index: int) -> str:
+        return str(uuid.uuid5(self.namespace, f'question:{index}'))
+
+    def candidate_id(self, index: int) -> str:
+        return str(uuid.uuid5(self.namespace, f'candidate:{index}'))
+
+    def question_domains(self, count: int) -> np.ndarray:
+        """Domain index of every question (one byte each)"""
+        return self._rng('question-domain').choice(
+            len(DOMAIN_NAMES), size=count, p=DOMAIN_WEIGHTS).astype(np.int8)
+
+    def candidate_domains(self, count: int) -> np.ndarray:
+        """Domain index of every candidate (technical domains only)"""
+        weights = np.array(DOMAIN_WEIGHTS[:-1])
+        return self._rng('candidate-domain').choice(
+            len(DOMAIN_NAMES) - 1, size=count, p=weights / weights.sum()).astype(np.int8)
+
+    def _pick_topics(self, rng: np.random.Generator, domains: np.ndarray) -> np.ndarray:
+        """A popularity-weighted topic from each row's domain"""
+        picks = np.empty(len(domains), dtype=np.int64)
+        for d, topics in enumerate(self.domain_topics):
+            rows = np.flatnonzero(domains == d)
+            picks[rows] = rng.choice(topics, size=len(rows), p=self.topic_weights[d])
+        return picks
+
+    # ============================================================
+    # QUESTIONS
+    # ============================================================
+
+    def question_rows(self, block: int, domains: np.ndarray) -> List[Tuple]:
+        """
+        Rows for question block `block` (QUESTION_BLOCK questions each)
+
+        Args:
+            block: Block number; rows start at block * QUESTION_BLOCK
+            domains: Domain index of each question in the block
+
+        Returns:
+            Tuples in questions column order
+        """
+        rng = self._rng('question', block)
+        count = len(domains)
+        primary = self._pick_topics(rng, domains)
+        secondary = self._pick_topics(rng, domains)
+        has_secondary = (rng.random(count) < 0.6) & (secondary != primary)
+        difficulties = rng.choice(3, size=count, p=DIFFICULTY_WEIGHTS)
+        categories = np.empty(count, dtype=np.int64)
+        for d, name in enumerate(DOMAIN_NAMES):
+            rows = np.flatnonzero(domains == d)
+            categories[rows] = rng.choice(3, size=len(rows),
+                                          p=CATEGORY_WEIGHTS.get(name, DEFAULT_CATEGORY_WEIGHTS))
+        template_picks = rng.integers(1000, size=count)
+        role_picks = rng.integers(3, size=(count, 2))
+        created = _timestamps(self.now, rng.integers(0, HISTORY_DAYS * 86400, size=count))
+
+        texts = []
+        for i in range(count):
+            templates = TEMPLATES[CATEGORIES[categories[i]]]
+            texts.append(templates[template_picks[i] % len(templates)].format(
+                a=self.topics[primary[i]][1], b=self.topics[secondary[i]][1]))
+
+        if self.embeddings == 'model':
+            from utils.embedding_service import embedding_service
+            vectors = self._normalize(np.array(embedding_service.embed_batch(texts)))
+        else:
+            vectors = self._normalize(self.centroids[primary]
+                                      + self.topic_spread * has_secondary[:, None] * self.centroids[secondary]
+                                      + self._noise(rng, count))
+
+        rows = []
+        first = block * QUESTION_BLOCK
+        for i in range(count):
+            topics = [self.topics[primary[i]][1]]
+            if has_secondary[i]:
+                topics.append(self.topics[secondary[i]][1])
+            roles = DOMAIN_ROLES[DOMAIN_NAMES[domains[i]]]
+            job_roles = list(dict.fromkeys(roles[r] for r in role_picks[i]))
+            rows.append((
+                self.question_id(first + i),
+                texts[i],
+                CATEGORIES[categories[i]],
+                DIFFICULTIES[difficulties[i]],
+                _dumps(topics),
+                _dumps(job_roles),
+                _dumps(vectors[i]),
+                _dumps([t.lower() for t in topics]),
+                created[i],
+                created[i]
+            ))
+        return rows
+
+    # ============================================================
+    # CANDIDATES
+    # ============================================================
+
+    def candidate_rows(self, block: int, domains: np.ndarray) -> Tuple[List[Tuple], List[Tuple]]:
+        """
+        Rows for candidate block `block` (CANDIDATE_BLOCK candidates each)
+
+        Returns:
+            (parsed_resumes rows, candidate_profiles rows)
+        """
+        rng = self._rng('candidate', block)
+        count = len(domains)
+        created = _timestamps(self.now, rng.integers(0, HISTORY_DAYS * 86400, size=count))
+        resumes, profiles = [], []
+        for i in range(count):
+            domain = domains[i]
+            own = self.domain_topics[domain]
+            topic_rows = rng.choice(own, size=min(4, len(own)), replace=False,
+                                    p=self.topic_weights[domain])
+            # A couple of skills from another domain
+            other = self.domain_topics[rng.integers(len(DOMAIN_NAMES) - 1)]
+            extra = rng.choice(other, size=2, replace=False)
+            skills = list(dict.fromkeys(self.topics[t][1] for t in [*topic_rows, *extra]))
+            roles = DOMAIN_ROLES[DOMAIN_NAMES[domain]]
+            experience = [{'company': f'Company {rng.integers(1000)}',
+                           'role': roles[rng.integers(len(roles))],
+                           'duration': f'{2014 + 2 * j}-{2016 + 2 * j}',
+                           'description': f'Worked on {skills[j % len(skills)]} systems'}
+                          for j in range(int(rng.choice(6, p=[0.2, 0.25, 0.2, 0.15, 0.1, 0.1])))]
+            projects = [{'name': f'{skills[j]} Project',
+                         'technologies': skills[j:j + 3],
+                         'description': f'Built a {skills[j]} application'}
+                        for j in range(int(rng.integers(1, 4)))]
+            education = [{'degree': 'B.Tech Computer Engineering', 'institution': 'PICT',
+                          'year': str(2010 + int(rng.integers(14)))}]
+
+            index = block * CANDIDATE_BLOCK + i
+            candidate_id = self.candidate_id(index)
+            name = f'Candidate {index}'
+            raw_text = ' '.join([name, *skills] + [e['description'] for e in experience])
+            vector = (self.centroids[topic_rows].mean(axis=0)
+                      + 0.3 * self.centroids[extra].mean(axis=0)
+                      + self._noise(rng, 1)[0])
+            exp_count = len(experience)
+            metadata = {
+                'skills': skills,
+                'experience_level': ('Fresher' if exp_count == 0 else 'Junior' if exp_count <= 2
+                                     else 'Mid' if exp_count <= 4 else 'Senior'),
+                'primary_domain': DOMAIN_NAMES[domain],
+                'total_projects': len(projects),
+                'total_experience': exp_count
+            }
+
+            resumes.append((candidate_id,
+                            _dumps({'name': name, 'email': f'candidate{index}@example.com'}),
+                            _dumps(skills), _dumps(experience), _dumps(projects),
+                            _dumps(education), raw_text, created[i]))
+            profiles.append((candidate_id, _dumps(self._normalize(vector[None, :])[0]),
+                             _dumps(metadata), 1, created[i], created[i]))
+        return resumes, profiles
+
+    # ============================================================
+    # INTERVIEW HISTORY
+    # ============================================================
+
+    def responses_per_candidate(self, candidates: int, responses: int) -> np.ndarray:
+        """Long-tailed split of responses over candidates (sums to responses)"""
+        rng = self._rng('responses')
+        weights = rng.lognormal(mean=0.0, sigma=1.0, size=candidates)
+        return rng.multinomial(responses, weights / weights.sum())
+
+    def history_rows(self, block: int, counts: np.ndarray, domains: np.ndarray,
+                     questions_by_domain: List[np.ndarray],
+                     question_difficulty: np.ndarray) -> Iterator[Tuple]:
+        """
+        interview_history rows for candidate block `block`
+
+        Most answers go to questions from the candidate's domain; scores
+        follow the candidate's ability and the question's difficulty, and
+        timestamps increase per candidate.
+
+        Args:
+            counts: Responses for each candidate in the block
+            domains: Domain index of each candidate in the block
+            questions_by_domain: Question indices per domain
+            question_difficulty: Difficulty index of every question
+        """
+        rng = self._rng('history', block)
+        total_questions = len(question_difficulty)
+        for i, n in enumerate(counts.tolist()):
+            if n == 0:
+                continue
+            candidate_id = self.candidate_id(block * CANDIDATE_BLOCK + i)
+            picks = rng.integers(total_questions, size=n)
+            pool = questions_by_domain[domains[i]]
+            if len(pool):
+                own = rng.random(n) < 0.8
+                picks[own] = pool[rng.integers(len(pool), size=int(own.sum()))]
+            ability = rng.beta(5, 3) + DIFFICULTY_OFFSET[question_difficulty[picks]]
+            knowledge = np.clip(ability + rng.normal(0, 0.12, n), 0, 1).round(3)
+            speech = np.clip(ability + rng.normal(0.05, 0.1, n), 0, 1).round(3)
+            total = (knowledge * KNOWLEDGE_WEIGHT + speech * SPEECH_WEIGHT).round(4)
+            timestamps = _timestamps(self.now, np.sort(rng.integers(0, HISTORY_DAYS * 86400, size=n))[::-1])
+            for j, (k, s, t) in enumerate(zip(knowledge.tolist(), speech.tolist(), total.tolist())):
+                yield (candidate_id, self.question_id(int(picks[j])), 'Synthetic answer',
+                       k, s, t, timestamps[j])
+
+
+def _progress(label: str, done: int, total: int, started: float) -> None:
+    """Per-batch progress at DEBUG, the finished table at INFO"""
+    level = logging.INFO if done >= total else logging.DEBUG
+    if logger.isEnabledFor(level):
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        logger.log(level, "Generated %s", label,
+                   extra={'done': done, 'total': total, 'rows_per_s': round(rate)})
+
+
+def _insert_history(conn, rows: List[Tuple]) -> int:
+    if rows:
+        with conn:
+            conn.executemany('''
+                INSERT INTO interview_history
+                (candidate_id, question_id, answer_text, knowledge_score,
+                 speech_score, total_score, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    return len(rows)
+
+
+def generate_synthetic_data(db_path: Optional[str] = None,
+                            questions: int = 10000,
+                            candidates: int = 1000,
+                            responses: int = 50000,
+                            seed: int = 0,
+                            embeddings: str = 'synthetic',
+                            batch_size: int = 5000,
+                            rebuild: bool = True) -> Dict:
+    """
+    Write a synthetic dataset into a new or existing database
+
+    Args:
+        db_path: Database to fill (created if missing; default DATABASE_PATH)
+        questions: Number of questions
+        candidates: Number of candidates (resume + profile)
+        responses: Number of interview_history rows
+        seed: Random seed; the same seed gives the same rows and IDs
+        embeddings: 'synthetic' or 'model'
+        batch_size: Rows per transaction
+        rebuild: Rebuild materialized aggregates afterwards
+
+    Returns:
+        Database stats and timings
+    """
+    from database.init_db import init_database, migrate_database
+    from database.rebuild_aggregates import rebuild_aggregates
+
+    db = DatabaseManager(db_path)
+    if os.path.exists(db.db_path):
+        migrate_database(db.db_path)
+    else:
+        init_database(db.db_path)
+    generator = SyntheticDataGenerator(seed=seed, embeddings=embeddings)
+    timings = {}
+
+    conn = db.get_connection()
+    # Generated data can always be regenerated: skip the fsync per transaction
+    conn.execute('PRAGMA synchronous = OFF')
+
+    started = time.perf_counter()
+    question_domains = generator.question_domains(questions)
+    question_difficulty = np.empty(questions, dtype=np.int8)
+    rows = []
+    done = 0
+    for block, first in enumerate(range(0, questions, QUESTION_BLOCK)):
+        block_rows = generator.question_rows(block, question_domains[first:first + QUESTION_BLOCK])
+        question_difficulty[first:first + len(block_rows)] = [DIFFICULTIES.index(r[3]) for r in block_rows]
+        rows.extend(block_rows)
+        if len(rows) >= batch_size or first + QUESTION_BLOCK >= questions:
+            with conn:
+                conn.executemany('INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            done += len(rows)
+            rows = []
+            _progress('questions', done, questions, started)
+    timings['questions_s'] = round(time.perf_counter() - started, 1)
+    questions_by_domain = [np.flatnonzero(question_domains == d) for d in range(len(DOMAIN_NAMES))]
+
+    started = time.perf_counter()
+    candidate_domains = generator.candidate_domains(candidates)
+    resumes, profiles = [], []
+    done = 0
+    for block, first in enumerate(range(0, candidates, CANDIDATE_BLOCK)):
+        block_resumes, block_profiles = generator.candidate_rows(
+            block, candidate_domains[first:first + CANDIDATE_BLOCK])
+        resumes.extend(block_resumes)
+        profiles.extend(block_profiles)
+        if len(resumes) >= batch_size or first + CANDIDATE_BLOCK >= candidates:
+            with conn:
+                conn.executemany('INSERT INTO parsed_resumes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', resumes)
+                conn.executemany('INSERT INTO candidate_profiles VALUES (?, ?, ?, ?, ?, ?)', profiles)
+            done += len(resumes)
+            resumes, profiles = [], []
+            _progress('candidates', done, candidates, started)
+    timings['candidates_s'] = round(time.perf_counter() - started, 1)
+
+    if responses and candidates and questions:
+        started = time.perf_counter()
+        counts = generator.responses_per_candidate(candidates, responses)
+        rows = []
+        done = 0
+        for block, first in enumerate(range(0, candidates, CANDIDATE_BLOCK)):
+            end = first + CANDIDATE_BLOCK
+            for row in generator.history_rows(block, counts[first:end], candidate_domains[first:end],
+                                              questions_by_domain, question_difficulty):
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    done += _insert_history(conn, rows)
+                    rows = []
+                    _progress('responses', done, responses, started)
+        done += _insert_history(conn, rows)
+        _progress('responses', done, responses, started)
+        timings['responses_s'] = round(time.perf_counter() - started, 1)
+    conn.close()
+
+    if rebuild:
+        started = time.perf_counter()
+        rebuild_aggregates(db.db_path)
+        timings['aggregates_s'] = round(time.perf_counter() - started, 1)
+
+    stats = db.get_database_stats()
+    logger.info("Database statistics", extra=stats)
+    return {**stats, **timings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='Database path (default: DATABASE_PATH)')
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--candidates', type=int, default=1000)
+    parser.add_argument('--responses', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--embeddings', choices=['synthetic', 'model'], default='synthetic',
+                        help='synthetic clustered vectors, or the real embedding model')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per transaction')
+    parser.add_argument('--no-rebuild', action='store_true',
+                        help='Skip rebuilding aggregates (run database.rebuild_aggregates later)')
+    args = parser.parse_args()
+
+    from utils.logging_setup import configure_logging
+    configure_logging(plain=True)
+    generate_synthetic_data(args.db, args.questions, args.candidates, args.responses,
+                            seed=args.seed, embeddings=args.embeddings,
+                            batch_size=args.batch_size, rebuild=not args.no_rebuild)
@@ -0,0 +1,87 @@
+"""
+Gunicorn configuration (pre-fork production server)
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Settings can be overridden with environment variables:
+    BIND, WEB_CONCURRENCY (workers), GUNICORN_THREADS, GUNICORN_TIMEOUT,
+    TORCH_NUM_THREADS (intra-op threads per worker), METRICS_DIR
+"""
+
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+# Workers publish metrics snapshots here so any worker's /metrics has the totals.
+# Set before the app (and config) is imported by preload_app.
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='interview-metrics-'))
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# Load the app (model, spaCy, question index) in the master before forking
+preload_app = True
+
+# Recycle workers now and then so copy-on-write drift stays bounded
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout
+errorlog = '-'
+
+
+def on_starting(server):
+    """Drop snapshots (and exited totals) left by a previous master's workers"""
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], 'metrics-*.json')):
+        os.remove(path)
+
+
+def when_ready(server):
+    """Master loaded the app: keep the GC from touching (and so copying) its pages"""
+    gc.freeze()
+    server.log.info("App preloaded; %d objects frozen for copy-on-write sharing",
+                    gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    """Per-worker setup: threads do not survive fork, so start them here"""
+    try:
+        import torch
+        torch.set_num_threads(int(os.getenv('TORCH_NUM_THREADS', 1)))
+    except ImportError:
+        pass
+
+    from utils.metrics import REGISTRY
+    REGISTRY.reset()  # Counted in the master (preloading), not by this worker
+
+    from wsgi import app, start_background_tasks
+    start_background_tasks(app)
+
+
+def post_worker_init(worker):
+    from utils.process_memory import memory_usage
+    usage = memory_usage()
+    worker.log.info("Worker %s ready: rss=%s kB pss=%s kB uss=%s kB", worker.pid,
+                    usage.get('rss_kb'), usage.get('pss_kb'), usage.get('uss_kb'))
+
+
+def worker_exit(server, worker):
+    """
+    Apply queued profile updates (SIGTERM, redeploy, max_requests recycling),
+    then publish the counts since the last periodic snapshot
+    """
+    from wsgi import app, stop_background_tasks
+    stop_background_tasks(app)
+
+    from utils.metrics import REGISTRY
+    REGISTRY.write_snapshot()
+
+
+def child_exit(server, worker):
+    """Keep an exited worker's counts in the totals (recycling is not a counter reset)"""
+    from utils.metrics import REGISTRY
+    REGISTRY.fold_snapshot(worker.pid)
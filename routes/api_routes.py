@@ -2,29 +2,154 @@
 API Routes - Complete REST API
 """
 
-from flask import Blueprint, request, jsonify
+import os
+import time
+import numpy as np
+from functools import wraps
+from flask import Blueprint, Response, request, jsonify, make_response
 from services import (
     ResumeParser,
     ProfileCreator,
+    DuplicateResumeError,
     ProfileUpdater,
     QuestionManager,
-    QuestionRetriever
+    QuestionRetriever,
+    SessionManager,
+    QuestionSearch,
+    CandidateMatcher,
+    MaintenanceScheduler,
+    RetrievalCacheJanitor
 )
 from database import DatabaseManager
+from database.query_stats import query_stats
+from utils.serialization import parse_fields, select_fields, select_question_fields
+from utils.http_cache import version_etag, not_modified, set_revalidate_headers
+from utils.process_memory import memory_usage
+from utils.embedding_service import embedding_service
+from utils.metrics import REGISTRY, CACHE_REQUESTS
+from utils.profiler import profiler, collapsed_text
+from utils.admin import admin_required
+from config import (CACHE_JANITOR_INTERVAL_SECONDS, EXCLUDE_SEEN_QUESTIONS,
+                    REPEAT_COOLDOWN_DAYS, QUESTION_INDEX_CHECK_SECONDS,
+                    METRICS_DIR, METRICS_SNAPSHOT_SECONDS, CANDIDATE_INDEX_CHECK_SECONDS,
+                    CANDIDATE_CHANGES_PRUNE_SECONDS, QUESTION_DUPLICATE_ACTION,
+                    SESSION_PRUNE_SECONDS, DIVERSITY_MAX_GROUPS)
 import traceback
 
-def create_routes():
-    """Create and configure all routes"""
+def create_routes(preload: bool = False, start_background: bool = True):
+    """
+    Create and configure all routes
+    
+    Args:
+        preload: Load the embedding model and question index now, so a
+                 pre-fork server shares them copy-on-write across workers
+        start_background: Start background threads now (a pre-fork server
+                          starts them in each worker after forking instead)
+    """
     api = Blueprint('api', __name__)
     
     # Initialize services
     resume_parser = ResumeParser()
     profile_creator = ProfileCreator()
     profile_updater = ProfileUpdater()
-    question_manager = QuestionManager()
     question_retriever = QuestionRetriever()
+    question_manager = QuestionManager(question_retriever)
+    session_manager = SessionManager(question_retriever)
+    question_search = QuestionSearch(question_retriever)
+    candidate_matcher = CandidateMatcher(question_retriever)
     db = DatabaseManager()
     
+    # Background maintenance
+    cache_janitor = RetrievalCacheJanitor(db)
+    maintenance = MaintenanceScheduler()
+    maintenance.add_task('retrieval_cache_janitor', cache_janitor.run,
+                         CACHE_JANITOR_INTERVAL_SECONDS)
+    if question_retriever.index_store is not None:
+        # One process rebuilds (file lock); every worker attaches to what it publishes
+        maintenance.add_task('question_index_refresh', question_retriever.refresh_index,
+                             QUESTION_INDEX_CHECK_SECONDS, run_immediately=False)
+    maintenance.add_task('interview_session_prune', session_manager.prune,
+                         SESSION_PRUNE_SECONDS, run_immediately=False)
+    maintenance.add_task('candidate_index_refresh', candidate_matcher.refresh_index,
+                         CANDIDATE_INDEX_CHECK_SECONDS)
+    maintenance.add_task('candidate_change_log_prune', candidate_matcher.prune_change_log,
+                         CANDIDATE_CHANGES_PRUNE_SECONDS, run_immediately=False)
+    if METRICS_DIR:
+        # Pre-forked workers publish their metrics for each other's /metrics
+        maintenance.add_task('metrics_snapshot', REGISTRY.write_snapshot,
+                             METRICS_SNAPSHOT_SECONDS)
+    if start_background:
+        maintenance.start()
+    
+    # Exposed to the app (e.g. the gunicorn post_fork hook) as app.extensions['maintenance']
+    api.record_once(lambda state: state.app.extensions.setdefault('maintenance', maintenance))
+    # ... and app.extensions['update_queue'], flushed before a worker exits
+    api.record_once(lambda state: state.app.extensions.setdefault(
+        'update_queue', profile_updater.update_queue))
+    
+    if preload:
+        embedding_service.preload()
+        question_retriever._load_questions()
+    
+    def versioned(scopes, vary=None, index_backed=False):
+        """
+        Conditional GET (ETag / 304) for a view whose output depends only
+        on data versions and the request URL
+        
+        Args:
+            scopes: Function of the view kwargs -> change_counters scopes
+            vary: Optional function returning extra ETag parts
+            index_backed: The view reads the question index, which trails
+                          the database: version it by the index it is served from
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(**kwargs):
+                versions = db.get_change_versions(scopes(**kwargs))
+                if index_backed:
+                    versions['question_index'] = question_retriever.index_source()
+                etag = version_etag(versions, request.path,
+                                    sorted(request.args.items(multi=True)),
+                                    vary() if vary else None)
+                cached = not_modified(etag)
+                CACHE_REQUESTS.inc(cache='etag', result='miss' if cached is None else 'hit')
+                if cached is not None:
+                    return cached
+                
+                response = make_response(view(**kwargs))
+                if response.status_code == 200:
+                    set_revalidate_headers(response, etag)
+                return response
+            return wrapper
+        return decorator
+    
+    def candidate_scope(candidate_id):
+        return [f'candidate:{candidate_id}']
+    
+    def retrieval_scopes(candidate_id):
+        return ['questions', f'candidate:{candidate_id}']
+    
+    def cooldown_bucket():
+        """With a repeat cooldown, answers age out over time: re-validate hourly"""
+        cooldown = request.args.get('repeat_cooldown_days', REPEAT_COOLDOWN_DAYS)
+        return None if cooldown is None else int(time.time() // 3600)
+    
+    def question_fields():
+        """Fields to return per question (?fields=a,b or ?fields=all)"""
+        return parse_fields(request.args.get('fields'))
+    
+    def seen_filter_args(source=None):
+        """exclude_seen / repeat_cooldown_days from query args (or a JSON body)"""
+        source = request.args if source is None else source
+        exclude_seen = source.get('exclude_seen', EXCLUDE_SEEN_QUESTIONS)
+        if isinstance(exclude_seen, str):
+            exclude_seen = exclude_seen.lower() not in ('0', 'false', 'no')
+        cooldown = source.get('repeat_cooldown_days', REPEAT_COOLDOWN_DAYS)
+        return {
+            'exclude_seen': bool(exclude_seen),
+            'repeat_cooldown_days': float(cooldown) if cooldown is not None else None
+        }
+    
     # ==================== PERSON A ROUTES ====================
     
     @api.route('/parse-resume', methods=['POST'])
@@ -72,7 +197,8 @@ def create_routes():
             if not resume_data:
                 return jsonify({'error': 'resume_data required'}), 400
             
-            profile = profile_creator.create_profile(resume_data, candidate_id)
+            profile = profile_creator.create_profile(resume_data, candidate_id,
+                                                     allow_duplicate=bool(data.get('allow_duplicate')))
             
             # Don't return full vector (too large), just metadata
             return jsonify({
@@ -82,6 +208,8 @@ def create_routes():
                 'vector_dimensions': len(profile['profile_vector'])
             })
         
+        except DuplicateResumeError as e:
+            return jsonify({'error': str(e), 'duplicates': e.duplicates}), 409
         except Exception as e:
             return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
     
@@ -98,7 +226,8 @@ def create_routes():
                 return jsonify({'error': 'resume_text required'}), 400
             
             # Step 2: Create profile
-            profile = profile_creator.create_profile(parsed, data.get('candidate_id'))
+            profile = profile_creator.create_profile(parsed, data.get('candidate_id'),
+                                                     allow_duplicate=bool(data.get('allow_duplicate')))
             
             return jsonify({
                 'success': True,
@@ -111,6 +240,8 @@ def create_routes():
                 'metadata': profile['metadata']
             })
         
+        except DuplicateResumeError as e:
+            return jsonify({'error': str(e), 'duplicates': e.duplicates}), 409
         except Exception as e:
             return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
     
@@ -140,6 +271,7 @@ def create_routes():
         """Record interview response and update profile"""
         try:
             data = request.get_json()
+            fields = question_fields()
             
             required = ['candidate_id', 'question_id', 'answer_text', 
                        'knowledge_score', 'speech_score']
@@ -154,12 +286,38 @@ def create_routes():
                 speech_score=data['speech_score']
             )
             
-            return jsonify({'success': success})
+            response = {'success': success}
+            
+            # Within a session, hand back the next question in the same round trip
+            session_id = data.get('session_id')
+            if session_id:
+                total_score = profile_updater.total_score(data['knowledge_score'],
+                                                          data['speech_score'])
+                session, question = session_manager.next_question(
+                    session_id, total_score, answered_question_id=data['question_id'])
+                if not session:
+                    return jsonify({'success': success, 'error': 'Session not found'}), 404
+                
+                response['next_question'] = select_question_fields(question, fields)
+            
+            return jsonify(response)
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/update-queue-stats', methods=['GET'])
+    def update_queue_stats():
+        """Get background profile update queue metrics"""
+        try:
+            return jsonify(profile_updater.update_queue.stats())
         
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @api.route('/performance-summary/<candidate_id>', methods=['GET'])
+    @versioned(candidate_scope)
     def performance_summary(candidate_id):
         """Get performance summary"""
         try:
@@ -169,6 +327,27 @@ def create_routes():
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @api.route('/performance-trend/<candidate_id>', methods=['GET'])
+    @versioned(candidate_scope)
+    def performance_trend(candidate_id):
+        """Get daily/weekly score series"""
+        try:
+            category = request.args.get('category', 'all')
+            
+            trend = profile_updater.get_performance_trend(
+                candidate_id=candidate_id,
+                granularity=request.args.get('granularity', 'day'),
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                category=None if category == 'each' else category
+            )
+            return jsonify(trend)
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     # ==================== PERSON C ROUTES ====================
     
     @api.route('/add-question', methods=['POST'])
@@ -200,7 +379,10 @@ def create_routes():
     
     @api.route('/bulk-add-questions', methods=['POST'])
     def bulk_add_questions():
-        """Add multiple questions"""
+        """
+        Add multiple questions, reporting near-duplicates of each other or
+        of the bank (on_duplicate=flag inserts them, skip does not)
+        """
         try:
             data = request.get_json()
             questions = data.get('questions', [])
@@ -208,18 +390,22 @@ def create_routes():
             if not questions:
                 return jsonify({'error': 'questions array required'}), 400
             
-            question_ids = question_manager.bulk_add_questions(questions)
+            report = question_manager.import_questions(
+                questions, data.get('on_duplicate', QUESTION_DUPLICATE_ACTION))
             
             return jsonify({
                 'success': True,
-                'count': len(question_ids),
-                'question_ids': question_ids
+                'count': len(report['question_ids']),
+                **report
             })
         
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @api.route('/database-summary', methods=['GET'])
+    @versioned(lambda: ['questions'])
     def database_summary():
         """Get question database summary"""
         try:
@@ -232,85 +418,249 @@ def create_routes():
     # ==================== PERSON D ROUTES ====================
     
     @api.route('/retrieve-questions/<candidate_id>', methods=['GET'])
+    @versioned(retrieval_scopes, vary=cooldown_bucket, index_backed=True)
     def retrieve_questions(candidate_id):
         """Retrieve personalized questions"""
         try:
             # Get query parameters
             max_questions = request.args.get('max_questions', 10, type=int)
+            fields = question_fields()
             difficulty = request.args.get('difficulty')
             category = request.args.get('category')
+            mmr_lambda = request.args.get('mmr_lambda', type=float)
             
             questions = question_retriever.retrieve_questions(
                 candidate_id=candidate_id,
                 max_questions=max_questions,
                 difficulty=difficulty,
-                category=category
+                category=category,
+                mmr_lambda=mmr_lambda,
+                **seen_filter_args()
             )
             
             return jsonify({
                 'success': True,
                 'count': len(questions),
-                'questions': questions
+                'questions': select_fields(questions, fields)
             })
         
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @api.route('/adaptive-questions/<candidate_id>', methods=['GET'])
+    @versioned(retrieval_scopes, vary=cooldown_bucket, index_backed=True)
     def adaptive_questions(candidate_id):
         """Get adaptive difficulty questions"""
         try:
             last_score = request.args.get('last_score', type=float)
             max_questions = request.args.get('max_questions', 5, type=int)
+            fields = question_fields()
+            mmr_lambda = request.args.get('mmr_lambda', type=float)
             
             questions = question_retriever.retrieve_adaptive_questions(
                 candidate_id=candidate_id,
                 last_score=last_score,
-                max_questions=max_questions
+                max_questions=max_questions,
+                mmr_lambda=mmr_lambda,
+                **seen_filter_args()
             )
             
             return jsonify({
                 'success': True,
                 'count': len(questions),
-                'questions': questions
+                'questions': select_fields(questions, fields)
             })
         
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @api.route('/diverse-questions/<candidate_id>', methods=['GET'])
+    @versioned(retrieval_scopes, vary=cooldown_bucket, index_backed=True)
     def diverse_questions(candidate_id):
         """Get diverse questions across categories"""
         try:
             per_category = request.args.get('per_category', 3, type=int)
+            fields = question_fields()
+            group_by = request.args.get('group_by', 'category')
+            mmr_lambda = request.args.get('mmr_lambda', type=float)
+            max_groups = request.args.get('max_groups', str(DIVERSITY_MAX_GROUPS))
+            if not max_groups.isdigit() or int(max_groups) < 1:
+                return jsonify({'error': f"max_groups must be a positive integer, got {max_groups!r}"}), 400
             
             questions = question_retriever.get_diverse_questions(
                 candidate_id=candidate_id,
-                questions_per_category=per_category
+                questions_per_category=per_category,
+                group_by=group_by,
+                mmr_lambda=mmr_lambda,
+                max_groups=int(max_groups),
+                **seen_filter_args()
             )
             
             return jsonify({
                 'success': True,
                 'count': len(questions),
-                'questions': questions
+                'questions': select_fields(questions, fields)
             })
         
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @api.route('/recommendations/<candidate_id>', methods=['GET'])
+    @versioned(retrieval_scopes, vary=cooldown_bucket, index_backed=True)
     def recommendations(candidate_id):
         """Get question recommendations"""
         try:
-            recommendations = question_retriever.get_question_recommendations(candidate_id)
+            mmr_lambda = request.args.get('mmr_lambda', type=float)
+            fields = question_fields()
+            recommendations = question_retriever.get_question_recommendations(
+                candidate_id, mmr_lambda=mmr_lambda, **seen_filter_args())
+            if 'top_questions' in recommendations:
+                recommendations['top_questions'] = select_fields(
+                    recommendations['top_questions'], fields)
             return jsonify(recommendations)
         
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/search-questions', methods=['GET'])
+    @versioned(lambda: ['questions'], index_backed=True)
+    def search_questions():
+        """
+        Full-text question search, BM25 fused with embedding similarity
+        
+        Query: q, limit, mode=hybrid|lexical|semantic, category, difficulty, fields
+        """
+        try:
+            questions = question_search.search(
+                request.args.get('q', ''),
+                limit=request.args.get('limit', 10, type=int),
+                mode=request.args.get('mode', 'hybrid'),
+                category=request.args.get('category'),
+                difficulty=request.args.get('difficulty')
+            )
+            
+            return jsonify({
+                'success': True,
+                'count': len(questions),
+                'questions': select_fields(questions, question_fields())
+            })
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/match-candidates', methods=['GET'])
+    def match_candidates():
+        """
+        Candidates whose profiles best match a question, a role or a candidate
+        
+        Query: one of question_id, text, candidate_id; k, min_similarity,
+        experience_level and primary_domain (comma-separated values)
+        """
+        try:
+            def values(name):
+                value = request.args.get(name)
+                return [v.strip() for v in value.split(',') if v.strip()] if value else None
+            
+            candidates = candidate_matcher.match(
+                question_id=request.args.get('question_id'),
+                text=request.args.get('text'),
+                candidate_id=request.args.get('candidate_id'),
+                k=request.args.get('k', 10, type=int),
+                experience_level=values('experience_level'),
+                primary_domain=values('primary_domain'),
+                min_similarity=request.args.get('min_similarity', type=float)
+            )
+            if candidates is None:
+                return jsonify({'error': 'Question or candidate not found'}), 404
+            
+            return jsonify({
+                'success': True,
+                'count': len(candidates),
+                'candidates': candidates
+            })
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/sessions', methods=['POST'])
+    def create_session():
+        """Start an interview session and return its first question"""
+        try:
+            data = request.get_json()
+            candidate_id = data.get('candidate_id') if data else None
+            
+            if not candidate_id:
+                return jsonify({'error': 'candidate_id required'}), 400
+            
+            fields = question_fields()
+            session = session_manager.create(candidate_id, **seen_filter_args(data))
+            if not session:
+                return jsonify({'error': 'Candidate not found'}), 404
+            
+            _, question = session_manager.next_question(session.session_id)
+            return jsonify({
+                'success': True,
+                'session_id': session.session_id,
+                'next_question': select_question_fields(question, fields)
+            })
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/sessions/<session_id>', methods=['GET'])
+    def get_session(session_id):
+        """Get session state"""
+        session = session_manager.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify(session.summary())
+    
+    @api.route('/sessions/<session_id>', methods=['DELETE'])
+    def end_session(session_id):
+        """End a session"""
+        if not session_manager.end(session_id):
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify({'success': True})
+    
+    @api.route('/sessions/<session_id>/next', methods=['GET'])
+    def next_session_question(session_id):
+        """Pop the next adaptive question for a session"""
+        try:
+            last_score = request.args.get('last_score', type=float)
+            fields = question_fields()
+            session, question = session_manager.next_question(session_id, last_score)
+            if not session:
+                return jsonify({'error': 'Session not found'}), 404
+            
+            return jsonify({
+                'success': True,
+                'next_question': select_question_fields(question, fields),
+                'exhausted': question is None
+            })
+        
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     # ==================== COMMON ROUTES ====================
     
     @api.route('/candidate/<candidate_id>', methods=['GET'])
+    @versioned(candidate_scope)
     def get_candidate(candidate_id):
         """Get candidate profile"""
         try:
@@ -344,6 +694,37 @@ def create_routes():
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @api.route('/cache-stats', methods=['GET'])
+    def cache_stats():
+        """Get retrieval cache size and janitor activity"""
+        try:
+            return jsonify({
+                'table': db.get_cache_table_stats(),
+                'janitor': cache_janitor.stats(),
+                'maintenance': maintenance.stats()
+            })
+        
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @api.route('/index-stats', methods=['GET'])
+    def index_stats():
+        """Question index generation attached by this worker and the store's current one"""
+        try:
+            index = question_retriever._load_questions()
+            store = question_retriever.index_store
+            return jsonify({
+                'pid': os.getpid(),
+                'attached_generation': index.generation,
+                'questions': len(index),
+                'matrix_bytes': int(index.matrix.nbytes),
+                'memory_mapped': isinstance(index.matrix, np.memmap),
+                'store': store.stats() if store is not None else None
+            })
+        
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @api.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
@@ -352,4 +733,80 @@ def create_routes():
             'service': 'AI Interview System'
         })
     
+    @api.route('/worker-stats', methods=['GET'])
+    def worker_stats():
+        """Memory and uptime of the worker process serving this request"""
+        return jsonify({
+            'pid': os.getpid(),
+            'parent_pid': os.getppid(),
+            'memory': memory_usage(),
+            'maintenance_running': maintenance.is_running(),
+            'maintenance_tasks': maintenance.stats()
+        })
+    
+    # ==================== ADMIN ROUTES ====================
+    
+    @api.route('/admin/profile', methods=['POST'])
+    @admin_required
+    def start_profile():
+        """
+        Sample this worker's next `requests` requests and/or `seconds` seconds
+        
+        Fetch the result with GET /admin/profile/<profile_id> (any worker).
+        """
+        data = request.get_json(silent=True) or {}
+        try:
+            requests_limit = data.get('requests', request.args.get('requests', type=int))
+            seconds = data.get('seconds', request.args.get('seconds', type=float))
+            if requests_limit is None and seconds is None:
+                requests_limit = 100
+            status = profiler.start(requests=requests_limit, seconds=seconds)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        except RuntimeError as e:
+            return jsonify({'error': str(e), 'status': profiler.status()}), 409
+        return jsonify({'success': True, **status}), 202
+    
+    @api.route('/admin/profile', methods=['GET'])
+    @admin_required
+    def profile_status():
+        """Profile running on the worker serving this request, if any"""
+        return jsonify(profiler.status())
+    
+    @api.route('/admin/profile/<profile_id>', methods=['GET'])
+    @admin_required
+    def get_profile(profile_id):
+        """
+        Finished profile: JSON with top functions and collapsed stacks, or
+        format=collapsed for flamegraph.pl / speedscope input
+        """
+        result = profiler.result(profile_id)
+        if result is None:
+            return jsonify({'error': 'Profile not found or still running'}), 404
+        if request.args.get('format') == 'collapsed':
+            return Response(collapsed_text(result), mimetype='text/plain')
+        return jsonify(result)
+    
+    @api.route('/admin/query-stats', methods=['GET'])
+    @admin_required
+    def get_query_stats():
+        """
+        Per-statement timings and recent slow statements (with query plans)
+        of the worker serving this request
+        
+        Query: sort=total|mean|max|calls, limit
+        """
+        sort = request.args.get('sort', 'total')
+        if sort not in ('total', 'mean', 'max', 'calls'):
+            return jsonify({'error': 'sort must be total, mean, max or calls'}), 400
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({'pid': os.getpid(), **query_stats.summary(sort, limit)})
+    
+    @api.route('/admin/query-stats', methods=['DELETE'])
+    @admin_required
+    def reset_query_stats():
+        """Start a new measurement window"""
+        query_stats.reset()
+        return jsonify({'success': True})
+    
     return api
\ No newline at end of file
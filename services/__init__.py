@@ -1,14 +1,25 @@
 """Services package"""
 from .resume_parser import ResumeParser
-from .profile_creator import ProfileCreator
+from .profile_creator import ProfileCreator, DuplicateResumeError
 from .profile_updater import ProfileUpdater
 from .question_manager import QuestionManager
 from .question_retriever import QuestionRetriever
+from .interview_session import SessionManager, InterviewSession
+from .question_search import QuestionSearch
+from .candidate_matcher import CandidateMatcher
+from .maintenance import MaintenanceScheduler, RetrievalCacheJanitor
 
 __all__ = [
     'ResumeParser',
     'ProfileCreator', 
+    'DuplicateResumeError',
     'ProfileUpdater',
     'QuestionManager',
-    'QuestionRetriever'
+    'QuestionRetriever',
+    'SessionManager',
+    'InterviewSession',
+    'QuestionSearch',
+    'CandidateMatcher',
+    'MaintenanceScheduler',
+    'RetrievalCacheJanitor'
 ]
\ No newline at end of file
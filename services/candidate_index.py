@@ -0,0 +1,222 @@
+"""
+Candidate Index - Reverse lookup
+Profile-vector matrix of every candidate: a published (memory-mapped)
+generation plus the rows appended as profiles change
+"""
+
+import json
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import VECTOR_DIMENSION, CANDIDATE_SUBSET_SCORING_FRACTION
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; parsing vectors dominates index builds
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Metadata fields held as integer codes and usable as match filters
+FILTER_FIELDS = ('experience_level', 'primary_domain')
+
+
+class CandidateIndex:
+    """
+    Candidate profile vectors as rows of one logical matrix
+
+    Rows [0, base_size) are the base: a generation from CandidateIndexStore,
+    memory-mapped read-only and shared by every worker (or empty). Later
+    rows live in this process's tail, appended in blocks (capacity doubles).
+    Rows are never rewritten: a changed profile is appended as a new row and
+    the old one is retired in the same step, so a query scoring concurrently
+    sees either version, never half of each. Dead rows are reclaimed by
+    publishing (or rebuilding) the index.
+    """
+
+    def __init__(self, capacity: int = 1024, base: Optional[np.ndarray] = None):
+        self.base = base if base is not None else np.zeros((0, VECTOR_DIMENSION), dtype=np.float32)
+        self.base_size = len(self.base)
+        capacity = self.base_size + max(capacity, 1)
+        self.tail = np.zeros((capacity - self.base_size, VECTOR_DIMENSION), dtype=np.float32)
+        self.versions = np.zeros(capacity, dtype=np.int64)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.codes = {name: np.full(capacity, -1, dtype=np.int32) for name in FILTER_FIELDS}
+        self.values = {name: [] for name in FILTER_FIELDS}
+        self._vocab = {name: {} for name in FILTER_FIELDS}
+        self.candidate_ids: List[str] = []
+        self.position: Dict[str, int] = {}
+        self.size = 0  # Rows in use, live or dead
+        self.change_seq = 0  # Last candidate_changes entry applied
+        self.generation: Optional[int] = None  # Store generation the base comes from
+
+    @classmethod
+    def from_generation(cls, matrix: np.ndarray, versions: np.ndarray, codes: Dict[str, np.ndarray],
+                        values: Dict[str, List], candidate_ids: List[str], change_seq: int,
+                        generation: int) -> "CandidateIndex":
+        """Index over a published generation (every row live), with an empty tail"""
+        index = cls(base=matrix)
+        size = index.base_size
+        index.versions[:size] = versions
+        index.live[:size] = True
+        for name in FILTER_FIELDS:
+            index.codes[name][:size] = codes[name]
+            index.values[name] = list(values[name])
+            index._vocab[name] = {value: code for code, value in enumerate(index.values[name])}
+        index.candidate_ids = list(candidate_ids)
+        index.position = {candidate_id: row for row, candidate_id in enumerate(index.candidate_ids)}
+        index.size = size
+        index.change_seq = change_seq
+        index.generation = generation
+        return index
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    @property
+    def dead_rows(self) -> int:
+        return self.size - len(self.position)
+
+    @property
+    def tail_rows(self) -> int:
+        """Rows appended since the base was published"""
+        return self.size - self.base_size
+
+    def rows(self, rows: np.ndarray) -> np.ndarray:
+        """Vectors of the given (ascending) rows, from the base and the tail"""
+        split = np.searchsorted(rows, self.base_size)
+        return np.concatenate((self.base[rows[:split]], self.tail[rows[split:] - self.base_size]))
+
+    def _grow(self, needed: int):
+        capacity = len(self.versions)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        # Queries hold the old arrays and keep working on them
+        tail = np.zeros((capacity - self.base_size, VECTOR_DIMENSION), dtype=np.float32)
+        tail[:self.tail_rows] = self.tail[:self.tail_rows]
+        self.tail = tail
+        self.versions = np.resize(self.versions, capacity)
+        live = np.zeros(capacity, dtype=bool)
+        live[:self.size] = self.live[:self.size]
+        self.live = live
+        for name in FILTER_FIELDS:
+            codes = np.full(capacity, -1, dtype=np.int32)
+            codes[:self.size] = self.codes[name][:self.size]
+            self.codes[name] = codes
+
+    def _code(self, name: str, value) -> int:
+        vocab = self._vocab[name]
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(self.values[name])
+            self.values[name].append(value)
+        return code
+
+    def upsert(self, candidate_id: str, vector: Sequence[float], metadata: Dict,
+               version: int) -> bool:
+        """
+        Add or replace one candidate (always as a new row)
+
+        Returns:
+            False if the vector has the wrong size (the candidate is removed)
+        """
+        if len(vector) != VECTOR_DIMENSION:
+            self.remove(candidate_id)
+            return False
+        row = self.size
+        self._grow(row + 1)
+        # The whole row is written before it becomes live
+        for name in FILTER_FIELDS:
+            self.codes[name][row] = self._code(name, metadata.get(name))
+        self.versions[row] = version
+        self.tail[row - self.base_size] = vector
+        self.candidate_ids.append(candidate_id)
+        self.size += 1
+        old_row = self.position.get(candidate_id)
+        self.position[candidate_id] = row
+        if old_row is None:
+            self.live[row] = True
+        else:
+            # One assignment, so a mask copied meanwhile has exactly one of the two
+            self.live[[old_row, row]] = (False, True)
+        return True
+
+    def upsert_row(self, row) -> bool:
+        """Add or replace a raw row from DatabaseManager.iter_candidate_rows"""
+        return self.upsert(row['candidate_id'],
+                           np.asarray(_loads(row['profile_vector']), dtype=np.float32),
+                           _loads(row['metadata']), row['version'])
+
+    def remove(self, candidate_id: str) -> bool:
+        """Drop a candidate (its row stays allocated but never matches)"""
+        row = self.position.pop(candidate_id, None)
+        if row is None:
+            return False
+        self.live[row] = False
+        return True
+
+    def vector(self, candidate_id: str) -> Optional[np.ndarray]:
+        """Indexed profile vector of a candidate, or None"""
+        row = self.position.get(candidate_id)
+        return None if row is None else self.rows(np.array([row]))[0]
+
+    def mask(self, **filters: Optional[Sequence[str]]) -> np.ndarray:
+        """
+        Live rows whose metadata matches every filter
+
+        Args:
+            filters: FILTER_FIELDS name -> accepted values (None = any)
+
+        Returns:
+            Boolean mask over the rows in use
+        """
+        size = self.size
+        mask = self.live[:size].copy()
+        for name, accepted in filters.items():
+            if accepted is None:
+                continue
+            codes = [self._vocab[name][value] for value in accepted if value in self._vocab[name]]
+            mask &= np.isin(self.codes[name][:size], codes)
+        return mask
+
+    def top_k(self, query_vector: Sequence[float], k: int, mask: np.ndarray,
+              min_score: float = -np.inf) -> List[Tuple[int, float]]:
+        """
+        Highest cosine similarities among the masked rows, best first
+
+        When the filters keep only a small share of the rows, only those
+        rows are scored instead of the whole matrix.
+
+        Returns:
+            List of (row index, score)
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        candidates = np.flatnonzero(mask)
+        if k <= 0 or len(candidates) == 0:
+            return []
+
+        if len(candidates) < CANDIDATE_SUBSET_SCORING_FRACTION * len(mask):
+            scores = self.rows(candidates) @ query
+        else:
+            tail = self.tail[:len(mask) - self.base_size]
+            scores = np.concatenate((self.base @ query, tail @ query))[candidates]
+        if min_score > -np.inf:
+            keep = scores >= min_score
+            candidates, scores = candidates[keep], scores[keep]
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def candidate(self, row: int, score: float) -> Dict:
+        """Match dict for a row"""
+        match = {'candidate_id': self.candidate_ids[row],
+                 'similarity_score': round(score, 4)}
+        for name in FILTER_FIELDS:
+            match[name] = self.values[name][self.codes[name][row]]
+        match['profile_version'] = int(self.versions[row])
+        return match
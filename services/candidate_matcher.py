@@ -0,0 +1,217 @@
+"""
+Candidate Matcher - Reverse lookup
+Ranks every candidate by profile-vector similarity to a question, a role
+description or another candidate
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+from utils.embedding_service import embedding_service
+from utils.metrics import StageTimer, RETRIEVAL_STAGE_SECONDS
+from .candidate_index import CandidateIndex
+from .candidate_store import CandidateIndexStore
+from config import (CANDIDATE_INDEX_CHECK_SECONDS, CANDIDATE_CHANGES_KEEP,
+                    CANDIDATE_MATCH_MAX_K, SHARED_CANDIDATE_INDEX,
+                    CANDIDATE_INDEX_COMPACT_FRACTION, CANDIDATE_INDEX_COMPACT_MIN_ROWS)
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateMatcher:
+    """Find the best-matching candidates (uses the retriever's question index)"""
+
+    def __init__(self, retriever):
+        self.retriever = retriever
+        self.db = retriever.db
+        self._index: Optional[CandidateIndex] = None
+        self._next_index_check = 0.0
+        self._refresh_lock = threading.Lock()
+        self.index_store = (CandidateIndexStore.for_database(self.db.db_path)
+                            if SHARED_CANDIDATE_INDEX else None)
+
+    def _load_index(self, force_reload: bool = False) -> CandidateIndex:
+        """
+        Candidate index (built on first use)
+
+        Applies the candidate_changes log at most every
+        CANDIDATE_INDEX_CHECK_SECONDS, so profile updates from any worker
+        show up within that time. One thread refreshes; the others keep
+        querying the index as it is.
+
+        With SHARED_CANDIDATE_INDEX the index is the store's current
+        generation plus the profiles changed since. Once those exceed
+        CANDIDATE_INDEX_COMPACT_FRACTION of the rows, one worker publishes
+        its index as the next generation and every worker re-attaches.
+        """
+        now = time.monotonic()
+        if self._index is not None and not force_reload and now < self._next_index_check:
+            return self._index
+        if self._index is not None and not force_reload:
+            if not self._refresh_lock.acquire(blocking=False):
+                return self._index
+        else:
+            self._refresh_lock.acquire()
+        try:
+            if self._index is None or force_reload:
+                self._index = self._open_index(force_reload)
+            elif time.monotonic() >= self._next_index_check:
+                self._update_index(self._index)
+            self._next_index_check = time.monotonic() + CANDIDATE_INDEX_CHECK_SECONDS
+            return self._index
+        finally:
+            self._refresh_lock.release()
+
+    def _build_index(self) -> CandidateIndex:
+        logger.info("Loading candidate profiles from database")
+        # Read the log position first: changes made during the load are re-applied
+        change_seq = self.db.get_candidate_change_seq()
+        index = CandidateIndex()
+        for rows in self.db.iter_candidate_rows():
+            for row in rows:
+                index.upsert_row(row)
+        index.change_seq = change_seq
+        logger.info("Loaded candidate profiles", extra={'candidates': len(index)})
+        return index
+
+    def _open_index(self, rebuild: bool = False) -> CandidateIndex:
+        """
+        Index built from the database, or attached to the store's current
+        generation (published first if missing, stale past the log, or
+        rebuild is set) and caught up with the change log
+        """
+        if self.index_store is None:
+            return self._build_index()
+        replace = self.index_store.current_generation() if rebuild else None
+        while True:
+            generation = self.index_store.publish_initial(self._build_index, replace)
+            index = self.index_store.load(generation)
+            if self._apply_changes(index):
+                logger.info("Attached candidate index",
+                            extra={'generation': generation, 'candidates': len(index)})
+                return index
+            replace = generation
+
+    def _update_index(self, index: CandidateIndex):
+        """Periodic check: newer generation, change log, compaction"""
+        if self.index_store is None:
+            if not self._apply_changes(index) or index.dead_rows > len(index):
+                # Fell behind the pruned log, or mostly deleted rows: start over
+                self._index = self._build_index()
+            return
+
+        if self.index_store.current_generation() != index.generation:
+            self._index = self._open_index()
+            return
+        if not self._apply_changes(index):
+            self._index = self._open_index(rebuild=True)
+            return
+        if index.tail_rows > max(CANDIDATE_INDEX_COMPACT_MIN_ROWS,
+                                 CANDIDATE_INDEX_COMPACT_FRACTION * len(index)):
+            if self.index_store.compact(index) is not None:
+                self._index = self._open_index()
+
+    def _apply_changes(self, index: CandidateIndex) -> bool:
+        """
+        Patch the index with the profiles changed since its log position
+
+        Returns:
+            False if the log no longer reaches back that far (pruned)
+        """
+        change_seq = self.db.get_candidate_change_seq()
+        if change_seq == index.change_seq:
+            return True
+        changed, complete = self.db.get_candidate_changes(index.change_seq, change_seq)
+        if not complete:
+            return False
+
+        found = set()
+        for rows in self.db.iter_candidate_rows(candidate_ids=changed):
+            for row in rows:
+                index.upsert_row(row)
+                found.add(row['candidate_id'])
+        for candidate_id in changed:
+            if candidate_id not in found:
+                index.remove(candidate_id)
+        index.change_seq = change_seq
+        logger.debug("Applied candidate changes", extra={'changed': len(changed)})
+        return True
+
+    def refresh_index(self) -> int:
+        """
+        Build or patch the index (run periodically off the request path,
+        so the first match request does not pay for the initial load)
+
+        Returns:
+            Candidates indexed
+        """
+        return len(self._load_index())
+
+    def prune_change_log(self) -> int:
+        """Trim the candidate change log (run periodically off the request path)"""
+        return self.db.prune_candidate_changes(CANDIDATE_CHANGES_KEEP)
+
+    def _query_vector(self, index: CandidateIndex, question_id: Optional[str],
+                      text: Optional[str], candidate_id: Optional[str]):
+        """Vector to match against, or None if the question / candidate is unknown"""
+        if question_id is not None:
+            questions = self.retriever._load_questions()
+            row = questions.row_of(question_id)
+            return None if row is None else questions.matrix[row]
+        if candidate_id is not None:
+            return index.vector(candidate_id)
+        return embedding_service.embed_text(text)
+
+    def match(self, question_id: Optional[str] = None, text: Optional[str] = None,
+              candidate_id: Optional[str] = None, k: int = 10,
+              experience_level: Optional[Sequence[str]] = None,
+              primary_domain: Optional[Sequence[str]] = None,
+              min_similarity: Optional[float] = None) -> Optional[List[Dict]]:
+        """
+        Top k candidates by cosine similarity of their profile vectors
+
+        Give exactly one of question_id, text or candidate_id. A candidate
+        is never returned as a match for itself.
+
+        Args:
+            question_id: Match against this question's embedding
+            text: Match against the embedding of a role description
+            candidate_id: Match against this candidate's profile vector
+            k: Number of candidates
+            experience_level: Only candidates with one of these levels
+            primary_domain: Only candidates in one of these domains
+            min_similarity: Drop candidates below this similarity
+
+        Returns:
+            Candidates, best first (candidate_id, similarity_score,
+            experience_level, primary_domain, profile_version), or None if
+            the question or candidate does not exist
+        """
+        if sum(value is not None for value in (question_id, text, candidate_id)) != 1:
+            raise ValueError("Give exactly one of question_id, text or candidate_id")
+        if text is not None and not text.strip():
+            raise ValueError("text must not be empty")
+        if not 1 <= k <= CANDIDATE_MATCH_MAX_K:
+            raise ValueError(f"k must be between 1 and {CANDIDATE_MATCH_MAX_K}")
+
+        stages = StageTimer(RETRIEVAL_STAGE_SECONDS, method='match_candidates')
+        index = self._load_index()
+        stages.lap('index_load')
+
+        query = self._query_vector(index, question_id, text, candidate_id)
+        stages.lap('query_vector')
+        if query is None:
+            return None
+
+        mask = index.mask(experience_level=experience_level, primary_domain=primary_domain)
+        own_row = index.position.get(candidate_id) if candidate_id is not None else None
+        if own_row is not None and own_row < len(mask):
+            mask[own_row] = False
+        stages.lap('filter')
+
+        top = index.top_k(query, k, mask,
+                          min_score=min_similarity if min_similarity is not None else float('-inf'))
+        stages.lap('top_k')
+
+        return [index.candidate(row, score) for row, score in top]
@@ -0,0 +1,118 @@
+"""
+Candidate Index Store - Reverse lookup
+Candidate profile vectors published as memory-mapped generations shared by
+all workers
+"""
+
+import os
+import numpy as np
+from typing import Optional
+from config import (CANDIDATE_INDEX_DIR, CANDIDATE_INDEX_KEEP_GENERATIONS, VECTOR_DIMENSION)
+from utils.string_column import StringColumn
+from .candidate_index import CandidateIndex, FILTER_FIELDS
+from .index_store import GenerationStore
+
+COPY_ROWS = 16384  # Matrix rows copied into a new generation at a time
+
+
+class CandidateIndexStore(GenerationStore):
+    """
+    Candidate index generations
+
+    A generation holds the live rows of a CandidateIndex: profile matrix,
+    versions, filter codes (vocabularies in meta.json) and candidate ids,
+    plus the candidate_changes position it includes. Workers attach to it
+    and keep only the profiles changed since in memory, so N workers cost
+    one copy of the matrix in the page cache instead of N.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str,
+                 keep_generations: int = CANDIDATE_INDEX_KEEP_GENERATIONS):
+        super().__init__(directory, keep_generations)
+
+    @classmethod
+    def for_database(cls, db_path: str) -> "CandidateIndexStore":
+        """Store for a database: CANDIDATE_INDEX_DIR, or '<db_path>.candidates'"""
+        return cls(CANDIDATE_INDEX_DIR or f'{os.path.abspath(db_path)}.candidates')
+
+    def load(self, generation: Optional[int] = None) -> CandidateIndex:
+        """
+        Attach to a generation (the current one by default)
+
+        Raises:
+            FileNotFoundError: if no such generation exists
+        """
+        meta, array = self._open(generation)
+        ids = StringColumn(array('candidate_ids.data'), array('candidate_ids.offsets'))
+        return CandidateIndex.from_generation(
+            array('matrix'), array('versions'), {name: array(name) for name in FILTER_FIELDS},
+            meta['vocab'], list(ids), meta['change_seq'], meta['generation'])
+
+    def publish(self, index: CandidateIndex) -> int:
+        """
+        Write the live rows of an index as a new generation and make it current
+
+        Call with the refresh lock held, from the thread that updates the index.
+
+        Returns:
+            The new generation number
+        """
+        generation, tmp_path = self._new_generation()
+        rows = np.flatnonzero(index.live[:index.size])
+
+        def save(name, value):
+            np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(value))
+
+        # Written in slices: the base is mapped, so no full copy is ever in memory
+        matrix = np.lib.format.open_memmap(os.path.join(tmp_path, 'matrix.npy'), mode='w+',
+                                           dtype=np.float32, shape=(len(rows), VECTOR_DIMENSION))
+        for start in range(0, len(rows), COPY_ROWS):
+            matrix[start:start + COPY_ROWS] = index.rows(rows[start:start + COPY_ROWS])
+        matrix.flush()
+        del matrix
+
+        save('versions', index.versions[rows])
+        for name in FILTER_FIELDS:
+            save(name, index.codes[name][rows])
+        ids = StringColumn.from_strings(index.candidate_ids[row] for row in rows)
+        save('candidate_ids.data', ids.data)
+        save('candidate_ids.offsets', ids.offsets)
+
+        self._commit_generation(generation, tmp_path, {
+            'count': int(len(rows)),
+            'dimension': VECTOR_DIMENSION,
+            'vocab': index.values,
+            'change_seq': index.change_seq
+        })
+        return generation
+
+    def publish_initial(self, build, replace: Optional[int] = None) -> int:
+        """
+        Current generation, publishing build() first if there is none
+
+        One process builds while the others wait for its generation.
+
+        Args:
+            build: Returns a CandidateIndex built from the database
+            replace: Also build if this is still the current generation
+                (it can no longer be caught up)
+        """
+        with self._refresh_lock(blocking=True):
+            generation = self.current_generation()
+            if generation is None or generation == replace:
+                generation = self.publish(build())
+            return generation
+
+    def compact(self, index: CandidateIndex) -> Optional[int]:
+        """
+        Publish an index that has moved on from its generation
+
+        Skipped (None) while another process publishes, or once a newer
+        generation exists.
+        """
+        with self._refresh_lock(blocking=False) as acquired:
+            if not acquired or self.current_generation() != index.generation:
+                return None
+            return self.publish(index)
@@ -0,0 +1,359 @@
+"""
+Question Index Store - Person D
+Question index published as memory-mapped generations shared by all workers
+(GenerationStore is also used for the candidate index)
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from config import (QUESTION_INDEX_DIR, QUESTION_INDEX_KEEP_GENERATIONS,
+                    QUESTION_INDEX_INCREMENTAL_MAX_FRACTION, VECTOR_DIMENSION)
+from utils.string_column import StringColumn
+from .question_index import (QuestionIndex, columns_from_database, merge_columns,
+                             STRING_COLUMNS, CODED_COLUMNS, LOOKUP_COLUMNS)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pre-fork workers, single refresher anyway
+    fcntl = None
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'refresh.lock'
+META_FILE = 'meta.json'
+LOCK_POLL_SECONDS = 0.05
+
+
+class GenerationStore:
+    """
+    Directory of immutable generations plus a CURRENT pointer
+
+    A generation is a directory of .npy files and a meta.json. Readers
+    memory-map them read-only, so every process attached to the same
+    generation shares one copy in the page cache. Publishing writes a new
+    generation next to the old one and swaps CURRENT atomically; readers
+    move over when they next check.
+    """
+
+    FORMAT_VERSION = 1  # Generations written by another format are ignored
+
+    def __init__(self, directory: str, keep_generations: int):
+        self.directory = directory
+        self.keep_generations = keep_generations
+        os.makedirs(directory, exist_ok=True)
+
+    # ---------------------------------------------------------------- reading
+
+    def _generation_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f'gen-{generation:08d}')
+
+    def current(self) -> Optional[Dict]:
+        """Metadata of the current generation (None if nothing published)"""
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                generation = int(f.read().strip())
+            with open(os.path.join(self._generation_dir(generation), META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != self.FORMAT_VERSION:
+            return None
+        return meta
+
+    def current_generation(self) -> Optional[int]:
+        meta = self.current()
+        return meta['generation'] if meta else None
+
+    def _open(self, generation: Optional[int]):
+        """
+        Metadata and an array loader (memory-mapped) for a generation
+
+        Raises:
+            FileNotFoundError: if no such generation exists
+        """
+        if generation is None:
+            generation = self.current_generation()
+            if generation is None:
+                raise FileNotFoundError(f"Nothing published in {self.directory}")
+
+        path = self._generation_dir(generation)
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        return meta, array
+
+    # ---------------------------------------------------------------- writing
+
+    @contextmanager
+    def _refresh_lock(self, blocking: bool, timeout: Optional[float] = None):
+        """
+        Cross-process lock so only one process builds a generation at a time
+
+        Args:
+            blocking: Wait for the lock (False: give up at once)
+            timeout: Give up after this many seconds (polls the lock)
+        """
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as f:
+            deadline = time.monotonic() + timeout if blocking and timeout is not None else None
+            try:
+                if deadline is None:
+                    fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                else:
+                    while True:
+                        try:
+                            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            if time.monotonic() >= deadline:
+                                raise
+                            time.sleep(LOCK_POLL_SECONDS)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _new_generation(self):
+        """
+        Number and temporary directory for the next generation
+
+        Returns:
+            (generation, directory to write the .npy files into)
+        """
+        current = self.current_generation() or 0
+        generation = max([current] + self._generations()) + 1
+        tmp_path = f'{self._generation_dir(generation)}.tmp-{os.getpid()}'
+        os.makedirs(tmp_path)
+        return generation, tmp_path
+
+    def _commit_generation(self, generation: int, tmp_path: str, meta: Dict) -> None:
+        """Write meta.json, move the generation in place and make it current"""
+        meta = {'format': self.FORMAT_VERSION, 'generation': generation, **meta,
+                'published_at': datetime.now().isoformat()}
+        with open(os.path.join(tmp_path, META_FILE), 'w') as f:
+            json.dump(meta, f)
+
+        os.rename(tmp_path, self._generation_dir(generation))
+
+        pointer = os.path.join(self.directory, f'{CURRENT_FILE}.tmp-{os.getpid()}')
+        with open(pointer, 'w') as f:
+            f.write(str(generation))
+        os.replace(pointer, os.path.join(self.directory, CURRENT_FILE))
+
+        self._prune(generation)
+
+    def _generations(self) -> List[int]:
+        generations = []
+        for name in os.listdir(self.directory):
+            if name.startswith('gen-') and '.tmp-' not in name:
+                try:
+                    generations.append(int(name[4:]))
+                except ValueError:
+                    pass
+        return sorted(generations)
+
+    def _prune(self, current: int):
+        """Delete all but the newest keep_generations generations"""
+        for generation in self._generations():
+            if generation <= current - self.keep_generations:
+                # Processes still mapping it keep their pages until they move on
+                shutil.rmtree(self._generation_dir(generation), ignore_errors=True)
+
+    def stats(self) -> Dict:
+        meta = self.current()
+        return {
+            'directory': self.directory,
+            'generation': meta['generation'] if meta else None,
+            'count': meta['count'] if meta else 0,
+            'published_at': meta['published_at'] if meta else None,
+            'generations_on_disk': self._generations()
+        }
+
+
+class QuestionIndexStore(GenerationStore):
+    """
+    Question index generations
+
+    A generation holds the embedding matrix, ordinals, coded columns,
+    StringColumn blobs/offsets and the question id lookup.
+
+    The store persists across restarts: a generation built from the
+    database's current 'questions' version is attached as-is (no SQL, no
+    JSON decoding), and a stale one is patched with only the questions in
+    the question_changes log since it was built.
+    """
+
+    FORMAT_VERSION = 2  # 2: question id lookup columns
+
+    def __init__(self, directory: str,
+                 keep_generations: int = QUESTION_INDEX_KEEP_GENERATIONS):
+        super().__init__(directory, keep_generations)
+
+    @classmethod
+    def for_database(cls, db_path: str) -> "QuestionIndexStore":
+        """Store for a database: QUESTION_INDEX_DIR, or '<db_path>.index'"""
+        return cls(QUESTION_INDEX_DIR or f'{os.path.abspath(db_path)}.index')
+
+    def load(self, generation: Optional[int] = None) -> QuestionIndex:
+        """
+        Attach to a generation (the current one by default), zero-copy
+
+        Raises:
+            FileNotFoundError: if no such generation exists
+        """
+        meta, array = self._open(generation)
+        columns = {'matrix': array('matrix'), 'ordinals': array('ordinals')}
+        for name in CODED_COLUMNS + LOOKUP_COLUMNS:
+            columns[name] = array(name)
+        for name in STRING_COLUMNS:
+            columns[name] = StringColumn(array(f'{name}.data'), array(f'{name}.offsets'))
+
+        return QuestionIndex.from_columns(columns, meta['vocab'], meta['generation'],
+                                          meta['source'])
+
+    def publish(self, columns: Dict, vocab: Dict[str, List[str]],
+                source: Dict, change_seq: int = 0) -> int:
+        """
+        Write columns as a new generation and make it current
+
+        Call with the refresh lock held.
+
+        Args:
+            columns, vocab: As returned by ColumnBuilder.build
+            source: Data versions the columns were built from
+            change_seq: Last question_changes entry the columns include
+
+        Returns:
+            The new generation number
+        """
+        generation, tmp_path = self._new_generation()
+
+        def save(name, value):
+            np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(value))
+
+        save('matrix', np.asarray(columns['matrix'], dtype=np.float32))
+        save('ordinals', np.asarray(columns['ordinals'], dtype=np.int64))
+        for name in CODED_COLUMNS:
+            save(name, np.asarray(columns[name], dtype=np.int32))
+        for name in LOOKUP_COLUMNS:
+            save(name, np.asarray(columns[name], dtype=np.int64))
+        for name in STRING_COLUMNS:
+            save(f'{name}.data', columns[name].data)
+            save(f'{name}.offsets', columns[name].offsets)
+
+        self._commit_generation(generation, tmp_path, {
+            'count': int(len(columns['matrix'])),
+            'dimension': VECTOR_DIMENSION,
+            'vocab': vocab,
+            'source': source,
+            'change_seq': change_seq
+        })
+        return generation
+
+    def refresh(self, db, force: bool = False, wait: Optional[bool] = None,
+                timeout: Optional[float] = None, full: bool = True) -> Optional[int]:
+        """
+        Publish a new generation if the question bank changed since the current one
+
+        Only one process rebuilds at a time; others keep the current
+        generation (or wait, if there is none yet).
+
+        Args:
+            db: DatabaseManager to read questions and change versions from
+            force: Rebuild even if the current generation is up to date
+            wait: Block for another process's rebuild (default: only if
+                  nothing has been published yet)
+            timeout: Stop waiting after this many seconds
+            full: Rebuild from scratch if the current generation cannot be
+                  patched (False: keep it; there is always a full build
+                  when nothing has been published)
+
+        Returns:
+            Current generation after the refresh (None if none exists)
+        """
+        versions = db.get_change_versions(['questions'])
+        meta = self.current()
+        if not force and meta and meta['source'] == versions:
+            return meta['generation']
+
+        if wait is None:
+            wait = meta is None
+        with self._refresh_lock(blocking=wait, timeout=timeout) as acquired:
+            if not acquired:
+                return meta['generation'] if meta else None
+
+            # Another process may have published while we waited
+            meta = self.current()
+            if not force and meta and meta['source'] == versions:
+                return meta['generation']
+
+            started = time.monotonic()
+            change_seq = db.get_question_change_seq()
+            built = None if force else self._apply_changes(db, meta, versions, change_seq)
+            mode = 'incremental'
+            if built is None and not full and meta is not None:
+                logger.info("Question index needs a full rebuild; keeping the current generation",
+                            extra={'generation': meta['generation']})
+                return meta['generation']
+            if built is None:
+                built = columns_from_database(db)
+                mode = 'full'
+            columns, vocab = built
+
+            generation = self.publish(columns, vocab, source=versions, change_seq=change_seq)
+            db.prune_question_changes(change_seq)
+            logger.info("Published question index generation", extra={
+                'generation': generation,
+                'mode': mode,
+                'questions': len(columns['matrix']),
+                'seconds': round(time.monotonic() - started, 2)
+            })
+            return generation
+
+    def _apply_changes(self, db, meta: Optional[Dict], versions: Dict,
+                       change_seq: int):
+        """
+        Patch the current generation with the questions changed since it was built
+
+        Returns:
+            (columns, vocab), or None if a full rebuild is needed (no usable
+            generation, another database, pruned log, or too many changes)
+        """
+        if (not meta or 'change_seq' not in meta
+                or meta['source'].get('epoch') != versions.get('epoch')):
+            return None
+
+        changed, complete = db.get_question_changes(meta['change_seq'], change_seq)
+        limit = max(1000, meta['count'] * QUESTION_INDEX_INCREMENTAL_MAX_FRACTION)
+        if not complete or len(changed) > limit:
+            return None
+
+        base = self.load(meta['generation'])
+        keep = np.ones(len(base), dtype=bool)
+        rows = base.rows_of(changed)
+        keep[rows[rows >= 0]] = False
+
+        # Changed questions that still exist are re-read and appended
+        extra, extra_vocab = columns_from_database(db, question_ids=changed)
+        return merge_columns(base.columns, meta['vocab'], np.flatnonzero(keep),
+                             extra, extra_vocab)
+
+    def stats(self) -> Dict:
+        meta = self.current()
+        return {**super().stats(), 'source': meta['source'] if meta else None}
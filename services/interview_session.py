@@ -0,0 +1,293 @@
+"""
+Interview Session Engine - Person D
+Server-side interview sessions with precomputed adaptive question pools
+"""
+
+import time
+import uuid
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from config import (SIMILARITY_THRESHOLD, SESSION_POOL_SIZE, SESSION_TTL_MINUTES,
+                    MAX_ACTIVE_SESSIONS, EXCLUDE_SEEN_QUESTIONS,
+                    REPEAT_COOLDOWN_DAYS)
+from .question_index import QuestionIndex
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def difficulty_for_score(last_score: Optional[float]) -> str:
+    """
+    Pick the next difficulty from the last answer's score
+
+    Args:
+        last_score: Score from last question (0-1), None at the start
+
+    Returns:
+        'easy' | 'medium' | 'hard'
+    """
+    if last_score is None:
+        return 'medium'  # Start with medium
+    elif last_score >= 0.8:
+        return 'hard'  # Increase difficulty
+    elif last_score >= 0.5:
+        return 'medium'  # Keep same
+    else:
+        return 'easy'  # Decrease difficulty
+
+
+class InterviewSession:
+    """
+    One candidate's interview: ranked pools per difficulty plus asked set
+
+    Pools hold question ids rather than index rows, so the state can be
+    stored (to_state) and resumed by any worker against whatever index
+    generation it has attached (from_state).
+    """
+
+    def __init__(self, candidate_id: str, index: QuestionIndex,
+                 profile_vector: List[float],
+                 min_similarity: float = SIMILARITY_THRESHOLD,
+                 pool_size: int = SESSION_POOL_SIZE,
+                 exclude_mask: Optional[np.ndarray] = None):
+        """
+        Args:
+            candidate_id: Candidate identifier
+            index: Question index the pools are drawn from
+            profile_vector: Candidate profile vector
+            min_similarity: Minimum similarity for pooled questions
+            pool_size: Questions ranked per difficulty
+            exclude_mask: Optional row mask of questions allowed in the pools
+                          (e.g. hiding questions answered in past sessions)
+        """
+        self.session_id = str(uuid.uuid4())
+        self.candidate_id = candidate_id
+        self.index = index
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.last_score = None
+        self.asked_ids = []
+        self._asked = set()
+        self.version = 0
+
+        # Rank every difficulty once, from one similarity pass
+        scores = index.scores(profile_vector)
+        question_ids = index.columns['question_id']
+        self.pools = {}
+        for difficulty in DIFFICULTIES:
+            top = index.top_k(scores, pool_size, min_score=min_similarity,
+                              mask=self._allowed(index.mask(difficulty=difficulty),
+                                                 exclude_mask))
+            self.pools[difficulty] = {
+                'question_ids': [question_ids[row] for row, _ in top],
+                'scores': [score for _, score in top],
+                'cursor': 0
+            }
+
+    @classmethod
+    def from_state(cls, record: Dict, index: QuestionIndex) -> "InterviewSession":
+        """
+        Resume a stored session
+
+        Args:
+            record: As returned by DatabaseManager.get_interview_session
+            index: Question index to serve the remaining questions from
+        """
+        session = cls.__new__(cls)
+        state = record['state']
+        session.session_id = record['session_id']
+        session.candidate_id = record['candidate_id']
+        session.index = index
+        session.created_at = record['created_at']
+        session.last_active = record['last_active']
+        session.version = record['version']
+        session.last_score = state['last_score']
+        session.asked_ids = state['asked_ids']
+        session._asked = set(session.asked_ids)
+        session.pools = state['pools']
+        return session
+
+    def to_state(self) -> Dict:
+        """JSON-serializable state for DatabaseManager.save_interview_session"""
+        return {
+            'pools': self.pools,
+            'asked_ids': self.asked_ids,
+            'last_score': self.last_score
+        }
+
+    @staticmethod
+    def _allowed(mask: Optional[np.ndarray],
+                 exclude_mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if exclude_mask is None:
+            return mask
+        return exclude_mask if mask is None else mask & exclude_mask
+
+    def _pop(self, difficulty: str) -> Optional[Dict]:
+        """Next unasked question of a difficulty (amortized O(1))"""
+        pool = self.pools[difficulty]
+        question_ids = pool['question_ids']
+        while pool['cursor'] < len(question_ids):
+            position = pool['cursor']
+            pool['cursor'] += 1
+            question_id = question_ids[position]
+            row = self.index.row_of(question_id)
+            # Questions deleted since the pools were ranked are skipped
+            if question_id not in self._asked and row is not None:
+                self._mark(question_id)
+                return self.index.question(row, pool['scores'][position])
+        return None
+
+    def _mark(self, question_id: str):
+        self._asked.add(question_id)
+        self.asked_ids.append(question_id)
+
+    def next_question(self, last_score: Optional[float] = None) -> Optional[Dict]:
+        """
+        Pop the next question, adapting difficulty to the last score
+
+        Falls back to the nearest other difficulty once a pool runs dry.
+        Changes only this object: SessionManager stores the result.
+
+        Args:
+            last_score: Score from last question (defaults to the last
+                        score recorded in this session)
+
+        Returns:
+            Question dict (with difficulty and similarity_score), or None
+            when every pool is exhausted
+        """
+        self.last_active = time.time()
+        if last_score is not None:
+            self.last_score = last_score
+
+        target = difficulty_for_score(self.last_score)
+        order = sorted(DIFFICULTIES,
+                       key=lambda d: abs(DIFFICULTIES.index(d) - DIFFICULTIES.index(target)))
+
+        for difficulty in order:
+            question = self._pop(difficulty)
+            if question:
+                return question
+        return None
+
+    def mark_asked(self, question_id: str, score: Optional[float] = None):
+        """Record a question answered in this session (even if not popped here)"""
+        self.last_active = time.time()
+        if score is not None:
+            self.last_score = score
+        if question_id not in self._asked:
+            self._mark(question_id)
+
+    def summary(self) -> Dict:
+        """Session state without the question pools"""
+        return {
+            'session_id': self.session_id,
+            'candidate_id': self.candidate_id,
+            'asked_count': len(self.asked_ids),
+            'asked_question_ids': self.asked_ids,
+            'last_score': self.last_score,
+            'next_difficulty': difficulty_for_score(self.last_score),
+            'remaining': {
+                difficulty: sum(1 for question_id in pool['question_ids'][pool['cursor']:]
+                                if question_id not in self._asked)
+                for difficulty, pool in self.pools.items()
+            },
+            'created_at': self.created_at,
+            'last_active': self.last_active
+        }
+
+
+class SessionManager:
+    """
+    Interview sessions stored in the database
+
+    Any worker process can serve any request of a session. Updates are
+    optimistic: a request that loses a race with another request on the
+    same session re-reads it and applies its change again.
+    """
+
+    def __init__(self, retriever, ttl_minutes: float = SESSION_TTL_MINUTES,
+                 max_sessions: int = MAX_ACTIVE_SESSIONS):
+        """
+        Args:
+            retriever: QuestionRetriever used for profiles and the question index
+            ttl_minutes: Idle time after which a session is dropped
+            max_sessions: Oldest idle sessions are evicted beyond this (by prune)
+        """
+        self.retriever = retriever
+        self.db = retriever.db
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_sessions = max_sessions
+
+    def create(self, candidate_id: str,
+               exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+               repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS) -> Optional[InterviewSession]:
+        """
+        Start a session for a candidate
+
+        Args:
+            candidate_id: Candidate identifier
+            exclude_seen: Leave questions answered before this session out of the pools
+            repeat_cooldown_days: Allow answered questions again after this
+                                  many days (None = never)
+
+        Returns:
+            The new session, or None if the candidate has no valid profile
+        """
+        profile_vector = self.retriever._get_profile_vector(candidate_id)
+        if profile_vector is None:
+            return None
+
+        index = self.retriever._load_questions()
+        exclude_mask = self.retriever.unseen_mask(index, candidate_id,
+                                                  exclude_seen, repeat_cooldown_days)
+        session = InterviewSession(candidate_id, index, profile_vector,
+                                   exclude_mask=exclude_mask)
+        self.db.save_interview_session(session.session_id, candidate_id,
+                                       session.to_state(), session.created_at)
+        return session
+
+    def get(self, session_id: str) -> Optional[InterviewSession]:
+        """Look up an active session (read-only: changes are not stored)"""
+        record = self.db.get_interview_session(session_id, time.time() - self.ttl_seconds)
+        if record is None:
+            return None
+        return InterviewSession.from_state(record, self.retriever._load_questions())
+
+    def next_question(self, session_id: str, last_score: Optional[float] = None,
+                      answered_question_id: Optional[str] = None) -> Tuple[Optional[InterviewSession], Optional[Dict]]:
+        """
+        Pop and store the next question of a session
+
+        Args:
+            session_id: Session identifier
+            last_score: Score of the last answer
+            answered_question_id: Question just answered, marked as asked first
+
+        Returns:
+            (session, question): session is None if it does not exist or
+            expired; question is None when every pool is exhausted
+        """
+        while True:
+            session = self.get(session_id)
+            if session is None:
+                return None, None
+            if answered_question_id is not None:
+                session.mark_asked(answered_question_id, last_score)
+            question = session.next_question(last_score)
+            if self.db.update_interview_session(session_id, session.to_state(),
+                                                session.last_active, session.version):
+                session.version += 1
+                return session, question
+
+    def end(self, session_id: str) -> bool:
+        """Drop a session"""
+        return self.db.delete_interview_session(session_id)
+
+    def prune(self) -> int:
+        """Drop expired sessions, then the least recently active over the cap"""
+        return self.db.prune_interview_sessions(time.time() - self.ttl_seconds,
+                                                self.max_sessions)
+
+    def stats(self) -> Dict:
+        """Active session count"""
+        return {'active_sessions': self.db.count_interview_sessions(time.time() - self.ttl_seconds)}
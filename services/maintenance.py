@@ -0,0 +1,158 @@
+"""
+Maintenance Scheduler
+Runs periodic housekeeping (cache janitor, ...) on a background thread
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from database import DatabaseManager
+from config import (CACHE_JANITOR_BATCH_SIZE, CACHE_MAX_ROWS_PER_CANDIDATE,
+                    CACHE_MAX_ROWS)
+
+
+logger = logging.getLogger(__name__)
+
+class RetrievalCacheJanitor:
+    """Keep the retrieval_cache table bounded"""
+
+    def __init__(self, db: Optional[DatabaseManager] = None,
+                 batch_size: int = CACHE_JANITOR_BATCH_SIZE,
+                 max_per_candidate: int = CACHE_MAX_ROWS_PER_CANDIDATE,
+                 max_total: int = CACHE_MAX_ROWS):
+        self.db = db or DatabaseManager()
+        self.batch_size = batch_size
+        self.max_per_candidate = max_per_candidate
+        self.max_total = max_total
+
+        self._runs = 0
+        self._expired_removed = 0
+        self._overflow_removed = 0
+        self._last_run = None
+
+    def run(self) -> Dict:
+        """
+        Delete expired rows, then trim rows over the size limits
+
+        Returns:
+            Rows removed in this run
+        """
+        expired = self.db.purge_expired_cache(self.batch_size)
+        overflow = self.db.enforce_cache_limits(self.max_per_candidate,
+                                                self.max_total,
+                                                self.batch_size)
+
+        self._runs += 1
+        self._expired_removed += expired
+        self._overflow_removed += overflow
+        self._last_run = {
+            'at': datetime.now().isoformat(),
+            'expired_removed': expired,
+            'overflow_removed': overflow
+        }
+        return self._last_run
+
+    def stats(self) -> Dict:
+        """Totals removed since startup"""
+        return {
+            'runs': self._runs,
+            'expired_removed': self._expired_removed,
+            'overflow_removed': self._overflow_removed,
+            'last_run': self._last_run,
+            'limits': {
+                'max_per_candidate': self.max_per_candidate,
+                'max_total': self.max_total
+            }
+        }
+
+
+class MaintenanceScheduler:
+    """Run registered tasks at fixed intervals"""
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self._tick_seconds = tick_seconds
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_task(self, name: str, fn: Callable[[], object],
+                 interval_seconds: float, run_immediately: bool = True):
+        """
+        Register a periodic task
+
+        Args:
+            name: Task name used in stats
+            fn: Callable run on the scheduler thread
+            interval_seconds: Seconds between runs
+            run_immediately: Run on the first tick instead of after one interval
+        """
+        with self._lock:
+            self._tasks[name] = {
+                'fn': fn,
+                'interval': interval_seconds,
+                'next_run': time.monotonic() if run_immediately else time.monotonic() + interval_seconds,
+                'runs': 0,
+                'errors': 0,
+                'last_error': None,
+                'last_duration_seconds': None
+            }
+
+    def run_pending(self):
+        """Run every task that is due"""
+        now = time.monotonic()
+        with self._lock:
+            due = [(name, task) for name, task in self._tasks.items()
+                   if task['next_run'] <= now]
+
+        for name, task in due:
+            started = time.monotonic()
+            try:
+                task['fn']()
+                task['last_error'] = None
+            except Exception as e:
+                task['errors'] += 1
+                task['last_error'] = str(e)
+                logger.exception("Maintenance task failed", extra={'task': name})
+            finally:
+                task['runs'] += 1
+                task['last_duration_seconds'] = round(time.monotonic() - started, 4)
+                task['next_run'] = time.monotonic() + task['interval']
+
+    def _run(self):
+        while not self._stop.wait(self._tick_seconds):
+            self.run_pending()
+
+    def start(self):
+        """Start the scheduler thread (no-op if already running)"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='maintenance-scheduler',
+                                        daemon=True)
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        """Whether the scheduler thread is alive (in this process)"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Stop the scheduler thread"""
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        """Per-task run counts and errors"""
+        with self._lock:
+            return {
+                name: {
+                    'interval_seconds': task['interval'],
+                    'runs': task['runs'],
+                    'errors': task['errors'],
+                    'last_error': task['last_error'],
+                    'last_duration_seconds': task['last_duration_seconds']
+                }
+                for name, task in self._tasks.items()
+            }
@@ -3,12 +3,27 @@ Profile Creator - Person A
 Creates candidate profile vector from parsed resume
 """
 
+import logging
 import uuid
-from typing import Dict, List
+from functools import partial
+import numpy as np
+from typing import Dict, List, Optional
 from database import DatabaseManager
+from utils import minhash
 from utils.embedding_service import embedding_service
 from utils.vector_operations import validate_vector
-from config import VECTOR_DIMENSION
+from config import (CHECK_DUPLICATE_RESUMES, RESUME_DUPLICATE_JACCARD,
+                    RESUME_DUPLICATE_COSINE, RESUME_DUPLICATE_MAX_RESULTS)
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateResumeError(ValueError):
+    """A new resume matches existing candidates (see .duplicates)"""
+    
+    def __init__(self, duplicates: List[Dict]):
+        self.duplicates = duplicates
+        super().__init__(f"Resume is a likely duplicate of {len(duplicates)} existing candidate(s)")
 
 
 class ProfileCreator:
@@ -64,44 +79,113 @@ class ProfileCreator:
             'total_experience': exp_count
         }
     
-    def create_profile(self, resume_data: Dict, candidate_id: str = None) -> Dict:
+    def find_duplicates(self, signature: Optional[np.ndarray], profile_vector: List[float],
+                        exclude_candidate_id: Optional[str] = None,
+                        stored: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """
+        Existing candidates whose resume is a near-duplicate
+        
+        LSH buckets give the candidates without scanning every resume; a
+        match needs both an estimated resume-text Jaccard similarity of
+        RESUME_DUPLICATE_JACCARD and a profile-vector similarity of
+        RESUME_DUPLICATE_COSINE.
+        
+        Args:
+            signature: MinHash signature of the new resume's raw text
+            profile_vector: Profile vector of the new resume
+            exclude_candidate_id: Candidate being re-uploaded (never a duplicate)
+            stored: Resumes sharing an LSH bucket with signature, as
+                    returned by DatabaseManager.get_resume_lsh_candidates
+                    (looked up if not given)
+        
+        Returns:
+            Matches, most similar text first (candidate_id,
+            resume_similarity, profile_similarity)
+        """
+        if signature is None:
+            return []
+        if stored is None:
+            stored = self.db.get_resume_lsh_candidates(signature)
+        
+        similar = []
+        for candidate_id, other in stored.items():
+            resume_similarity = minhash.jaccard(signature, other['signature'])
+            if candidate_id != exclude_candidate_id and resume_similarity >= RESUME_DUPLICATE_JACCARD:
+                similar.append((resume_similarity, candidate_id))
+        
+        duplicates = []
+        for resume_similarity, candidate_id in sorted(similar, reverse=True):
+            other_vector = stored[candidate_id]['profile_vector']
+            if other_vector is None:
+                continue
+            profile_similarity = float(np.dot(other_vector, profile_vector))
+            if profile_similarity >= RESUME_DUPLICATE_COSINE:
+                duplicates.append({
+                    'candidate_id': candidate_id,
+                    'resume_similarity': round(resume_similarity, 4),
+                    'profile_similarity': round(profile_similarity, 4)
+                })
+                if len(duplicates) >= RESUME_DUPLICATE_MAX_RESULTS:
+                    break
+        return duplicates
+    
+    def create_profile(self, resume_data: Dict, candidate_id: str = None,
+                       allow_duplicate: bool = False) -> Dict:
         """
         Create complete candidate profile with vector
         
         Args:
             resume_data: Parsed resume data
             candidate_id: Optional candidate ID (auto-generated if not provided)
+            allow_duplicate: Create the profile even if the resume is a
+                             near-duplicate of an existing candidate's
         
         Returns:
             Dict with candidate_id, profile_vector, metadata
+        
+        Raises:
+            DuplicateResumeError: The resume matches existing candidates
+                                  (nothing is saved)
         """
-        if not candidate_id:
+        new_candidate = not candidate_id
+        if new_candidate:
             candidate_id = str(uuid.uuid4())
         
-        print(f"🔄 Creating profile for candidate: {candidate_id}")
-        
-        # Step 1: Save parsed resume
-        self.db.insert_parsed_resume(candidate_id, resume_data)
-        print("✅ Parsed resume saved")
+        logger.debug("Creating profile", extra={'candidate_id': candidate_id})
         
-        # Step 2: Generate embedding vector
+        # Step 1: Generate embedding vector
         profile_vector = embedding_service.embed_resume(resume_data)
         
         # Validate vector
         try:
             validate_vector(profile_vector, "profile_vector")
-            print(f"✅ Profile vector created ({VECTOR_DIMENSION} dimensions)")
         except ValueError as e:
-            print(f"❌ Vector validation failed: {e}")
+            logger.error("Vector validation failed",
+                         extra={'candidate_id': candidate_id, 'error': str(e)})
             raise
         
-        # Step 3: Create metadata
+        # Step 2: Create metadata
         metadata = self.create_metadata(resume_data)
-        print(f"✅ Metadata created: {metadata['experience_level']} {metadata['primary_domain']}")
         
-        # Step 4: Save to database
-        self.db.insert_candidate_profile(candidate_id, profile_vector, metadata)
-        print("✅ Profile saved to database")
+        # Step 3: Save resume, signature and profile, rejecting near-duplicates
+        # of existing resumes in the same transaction
+        signature = minhash.signature(resume_data.get('raw_text') or '')
+        check = None
+        if CHECK_DUPLICATE_RESUMES and not allow_duplicate:
+            check = partial(self.find_duplicates, signature, profile_vector,
+                            None if new_candidate else candidate_id)
+        duplicates = self.db.create_candidate(candidate_id, resume_data, profile_vector,
+                                              metadata, signature, check)
+        if duplicates:
+            logger.info("Duplicate resume rejected",
+                        extra={'candidate_id': candidate_id,
+                               'duplicates': [d['candidate_id'] for d in duplicates]})
+            raise DuplicateResumeError(duplicates)
+        logger.debug("Profile saved", extra={
+            'candidate_id': candidate_id,
+            'experience_level': metadata['experience_level'],
+            'primary_domain': metadata['primary_domain']
+        })
         
         return {
             'candidate_id': candidate_id,
@@ -109,13 +193,15 @@ class ProfileCreator:
             'metadata': metadata
         }
     
-    def get_or_create_profile(self, resume_data: Dict, candidate_id: str = None) -> Dict:
+    def get_or_create_profile(self, resume_data: Dict, candidate_id: str = None,
+                              allow_duplicate: bool = False) -> Dict:
         """
         Get existing profile or create new one
         
         Args:
             resume_data: Parsed resume data
             candidate_id: Optional candidate ID
+            allow_duplicate: See create_profile
         
         Returns:
             Profile dict
@@ -124,8 +210,8 @@ class ProfileCreator:
             # Check if profile exists
             existing = self.db.get_candidate_profile(candidate_id)
             if existing:
-                print(f"ℹ️  Found existing profile for: {candidate_id}")
+                logger.debug("Found existing profile", extra={'candidate_id': candidate_id})
                 return existing
         
         # Create new profile
-        return self.create_profile(resume_data, candidate_id)
\ No newline at end of file
+        return self.create_profile(resume_data, candidate_id, allow_duplicate)
\ No newline at end of file
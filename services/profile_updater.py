@@ -3,93 +3,144 @@ Profile Updater - Person B
 Updates candidate profile based on interview performance
 """
 
+import logging
+import numpy as np
 from typing import Dict, List, Optional
 from database import DatabaseManager
-from utils.embedding_service import embedding_service
-from utils.vector_operations import weighted_vector_update, validate_vector
-from config import UPDATE_OLD_WEIGHT, UPDATE_NEW_WEIGHT, HISTORY_LIMIT
+from utils.vector_operations import (weighted_vector_update, validate_vector,
+                                     normalize_vector, decayed_weighted_sum)
+from config import (UPDATE_OLD_WEIGHT, UPDATE_NEW_WEIGHT, VECTOR_DIMENSION,
+                    HIGH_PERFORMANCE_SCORE, PROFILE_RECENCY_DECAY,
+                    TREND_WINDOW, ROLLUP_GRANULARITIES,
+                    ASYNC_PROFILE_UPDATES)
+from .update_queue import ProfileUpdateQueue
+
+logger = logging.getLogger(__name__)
 
 class ProfileUpdater:
     """Update candidate profiles based on interview history"""
     
     def __init__(self):
         self.db = DatabaseManager()
+        self.update_queue = ProfileUpdateQueue(self.update_profile)
     
-    def calculate_performance_vector(self, history: List[Dict]) -> List[float]:
+    def fold_responses(self, state: Dict, rows: List[Dict]) -> Dict:
         """
-        Calculate performance-weighted vector from history
+        Fold new responses into the running update state
+        
+        Each response contributes its question's stored embedding, weighted
+        by its score and aged by the responses that came after it.
         
         Args:
-            history: List of interview responses
+            state: Running state (base_vector, accumulator, weight_sum,
+                   last_history_id)
+            rows: New responses with embeddings, oldest first
         
         Returns:
-            Performance vector
+            Updated state
         """
-        if not history:
-            return None
-        
-        # Get recent high-performing questions
-        high_performers = [h for h in history if h['total_score'] >= 0.7]
+        if not rows:
+            return state
+        
+        # Questions without a usable embedding still count towards recency
+        vectors = []
+        weights = []
+        for row in rows:
+            if len(row['embedding']) == VECTOR_DIMENSION:
+                vectors.append(row['embedding'])
+                score = row['total_score'] or 0.0
+                weights.append(score if score >= HIGH_PERFORMANCE_SCORE else 0.0)
+            else:
+                vectors.append(np.zeros(VECTOR_DIMENSION))
+                weights.append(0.0)
+        
+        accumulator, weight_sum = decayed_weighted_sum(
+            state['accumulator'],
+            state['weight_sum'],
+            vectors,
+            weights,
+            decay=PROFILE_RECENCY_DECAY
+        )
         
-        if not high_performers:
-            return None
+        return {
+            'base_vector': state['base_vector'],
+            'accumulator': accumulator,
+            'weight_sum': weight_sum,
+            'last_history_id': rows[-1]['history_id']
+        }
+    
+    def calculate_performance_vector(self, state: Dict) -> Optional[List[float]]:
+        """
+        Calculate performance vector from running update state
         
-        # Get question texts
-        question_texts = []
-        for h in high_performers[:10]:  # Top 10 recent
-            question = self.db.get_question_by_id(h['question_id'])
-            if question:
-                question_texts.append(question['question_text'])
+        Args:
+            state: Running state from fold_responses
         
-        if not question_texts:
+        Returns:
+            Normalized performance vector, or None if no response qualifies
+        """
+        if state['weight_sum'] <= 0:
             return None
         
-        # Create embedding from successful questions
-        combined_text = ' '.join(question_texts)
-        return embedding_service.embed_text(combined_text)
+        return normalize_vector(state['accumulator'])
     
     def update_profile(self, candidate_id: str, 
                       force_recalculate: bool = False) -> Optional[Dict]:
         """
         Update candidate profile based on interview history
         
+        Only responses recorded since the last update are read, so the cost
+        is proportional to the new responses rather than the full history.
+        
         Args:
             candidate_id: Candidate identifier
-            force_recalculate: Force recalculation even if no new history
+            force_recalculate: Rebuild the running state from the full history
         
         Returns:
-            Updated profile or None if no update needed
+            Updated profile or None if the update failed
         """
-        print(f"🔄 Updating profile for: {candidate_id}")
+        logger.debug("Updating profile", extra={'candidate_id': candidate_id})
         
         # Get current profile
         profile = self.db.get_candidate_profile(candidate_id)
         if not profile:
-            print(f"❌ Profile not found for: {candidate_id}")
+            logger.warning("Profile not found", extra={'candidate_id': candidate_id})
             return None
         
-        # Get interview history
-        history = self.db.get_candidate_history(candidate_id, limit=HISTORY_LIMIT)
+        # Get running state (the first update blends into the current vector)
+        state = self.db.get_profile_accumulator(candidate_id)
+        if state is None or force_recalculate:
+            state = {
+                'base_vector': state['base_vector'] if state else profile['profile_vector'],
+                'accumulator': [0.0] * VECTOR_DIMENSION,
+                'weight_sum': 0.0,
+                'last_history_id': 0
+            }
+        
+        # Get responses not folded in yet
+        rows = self.db.get_scored_embeddings_since(candidate_id,
+                                                   state['last_history_id'])
         
-        if not history:
-            print("ℹ️  No interview history found, no update needed")
+        if not rows and not force_recalculate:
+            logger.debug("No new interview responses", extra={'candidate_id': candidate_id})
             return profile
         
-        print(f"📊 Found {len(history)} interview responses")
+        logger.debug("Folding in new interview responses",
+                     extra={'candidate_id': candidate_id, 'responses': len(rows)})
+        state = self.fold_responses(state, rows)
         
         # Calculate performance vector
-        perf_vector = self.calculate_performance_vector(history)
+        perf_vector = self.calculate_performance_vector(state)
         
         if perf_vector is None:
-            print("ℹ️  Not enough high-performing responses for update")
+            logger.debug("Not enough high-performing responses",
+                         extra={'candidate_id': candidate_id})
+            self.db.save_profile_accumulator(candidate_id, state)
             return profile
         
-        # Get current vector
-        old_vector = profile['profile_vector']
-        
         # Calculate updated vector
         new_vector = weighted_vector_update(
-            old_vector,
+            state['base_vector'],
             perf_vector,
             old_weight=UPDATE_OLD_WEIGHT,
             new_weight=UPDATE_NEW_WEIGHT
@@ -99,7 +150,8 @@ class ProfileUpdater:
         try:
             validate_vector(new_vector, "updated_vector")
         except ValueError as e:
-            print(f"❌ Updated vector validation failed: {e}")
+            logger.error("Updated vector validation failed",
+                         extra={'candidate_id': candidate_id, 'error': str(e)})
             return None
         
         # Update metadata with latest stats
@@ -108,11 +160,13 @@ class ProfileUpdater:
         metadata['avg_score'] = stats['avg_total_score']
         metadata['total_interviews'] = stats['total_questions']
         
-        # Save updated vector
-        success = self.db.update_profile_vector(candidate_id, new_vector, metadata)
+        # Save updated vector and running state together
+        success = self.db.update_profile_vector(candidate_id, new_vector,
+                                                metadata, accumulator=state)
         
         if success:
-            print(f"✅ Profile updated (version {profile['version'] + 1})")
+            logger.debug("Profile updated", extra={'candidate_id': candidate_id,
+                                                   'version': profile['version'] + 1})
             return {
                 'candidate_id': candidate_id,
                 'profile_vector': new_vector,
@@ -120,14 +174,23 @@ class ProfileUpdater:
                 'version': profile['version'] + 1
             }
         else:
-            print("❌ Failed to update profile")
+            logger.error("Failed to update profile", extra={'candidate_id': candidate_id})
             return None
     
+    @staticmethod
+    def total_score(knowledge_score: float, speech_score: float) -> float:
+        """Combine content and delivery scores with the configured weights"""
+        from config import KNOWLEDGE_WEIGHT, SPEECH_WEIGHT
+        
+        return (knowledge_score * KNOWLEDGE_WEIGHT + 
+                speech_score * SPEECH_WEIGHT)
+    
     def update_after_response(self, candidate_id: str,
                             question_id: str,
                             answer_text: str,
                             knowledge_score: float,
-                            speech_score: float) -> bool:
+                            speech_score: float,
+                            async_update: bool = ASYNC_PROFILE_UPDATES) -> bool:
         """
         Record response and trigger profile update
         
@@ -137,15 +200,14 @@ class ProfileUpdater:
             answer_text: Candidate's answer
             knowledge_score: Content score (0-1)
             speech_score: Delivery score (0-1)
+            async_update: Hand the profile update to the background queue
+                          instead of running it before returning
         
         Returns:
-            True if successfully recorded and updated
+            True if successfully recorded and updated (or queued)
         """
-        from config import KNOWLEDGE_WEIGHT, SPEECH_WEIGHT
-        
         # Calculate total score
-        total_score = (knowledge_score * KNOWLEDGE_WEIGHT + 
-                      speech_score * SPEECH_WEIGHT)
+        total_score = self.total_score(knowledge_score, speech_score)
         
         # Record response
         history_id = self.db.add_interview_response(
@@ -157,9 +219,15 @@ class ProfileUpdater:
             total_score=total_score
         )
         
-        print(f"✅ Response recorded (ID: {history_id}, Score: {total_score:.2f})")
+        logger.debug("Response recorded", extra={'candidate_id': candidate_id,
+                                                 'history_id': history_id,
+                                                 'total_score': round(total_score, 2)})
+        
+        # Trigger profile update
+        if async_update:
+            self.update_queue.submit(candidate_id)
+            return True
         
-        # Trigger profile update (async in production)
         updated_profile = self.update_profile(candidate_id)
         
         return updated_profile is not None
@@ -174,16 +242,15 @@ class ProfileUpdater:
         Returns:
             Performance statistics
         """
-        stats = self.db.get_candidate_statistics(candidate_id)
-        history = self.db.get_candidate_history(candidate_id, limit=10)
-        
-        # Calculate trends
-        if len(history) >= 5:
-            recent_scores = [h['total_score'] for h in history[:5]]
-            older_scores = [h['total_score'] for h in history[5:10]] if len(history) > 5 else []
-            
-            recent_avg = sum(recent_scores) / len(recent_scores)
-            older_avg = sum(older_scores) / len(older_scores) if older_scores else recent_avg
+        aggregates = self.db.get_candidate_aggregates(candidate_id)
+        stats = self.db.statistics_from_aggregates(aggregates)
+        recent_count = len(aggregates['recent_scores']) if aggregates else 0
+        
+        # Calculate trends from the materialized recent window
+        if recent_count >= TREND_WINDOW:
+            recent_avg = aggregates['recent_sum'] / TREND_WINDOW
+            older_count = recent_count - TREND_WINDOW
+            older_avg = aggregates['previous_sum'] / older_count if older_count else recent_avg
             
             trend = "improving" if recent_avg > older_avg else "declining" if recent_avg < older_avg else "stable"
         else:
@@ -192,5 +259,42 @@ class ProfileUpdater:
         return {
             **stats,
             'trend': trend,
-            'recent_responses': len(history)
-        }
\ No newline at end of file
+            'recent_responses': recent_count
+        }
+    
+    def get_performance_trend(self, candidate_id: str,
+                              granularity: str = 'day',
+                              start: Optional[str] = None,
+                              end: Optional[str] = None,
+                              category: Optional[str] = 'all') -> Dict:
+        """
+        Get score time series from the daily/weekly rollups
+        
+        Args:
+            candidate_id: Candidate identifier
+            granularity: 'day' or 'week'
+            start: Optional start date (ISO)
+            end: Optional end date (ISO)
+            category: Question category, 'all', or None for one series
+                      per category
+        
+        Returns:
+            Dict with one series per category
+        """
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"granularity must be one of {list(ROLLUP_GRANULARITIES)}")
+        
+        buckets = self.db.get_performance_rollups(candidate_id, granularity,
+                                                  start, end, category)
+        
+        series = {}
+        for bucket in buckets:
+            series.setdefault(bucket.pop('category'), []).append(bucket)
+        
+        return {
+            'candidate_id': candidate_id,
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'series': series
+        }
@@ -0,0 +1,196 @@
+"""
+Question Dedup - Person C
+Near-duplicate detection for question imports: a blocked similarity join
+of the incoming embeddings against themselves and the question bank
+"""
+
+import logging
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from config import (QUESTION_DUPLICATE_SIMILARITY, QUESTION_DEDUP_EXACT_MAX_PAIRS,
+                    QUESTION_DEDUP_PROBES, QUESTION_DEDUP_BLOCK_SIZE)
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_CLUSTER = 40
+
+
+def _update_best(queries: np.ndarray, query_rows: np.ndarray,
+                 bank: np.ndarray, bank_rows: np.ndarray,
+                 best_score: np.ndarray, best_row: np.ndarray,
+                 earlier_only: bool = False):
+    """
+    Fold the best bank match of each query row into best_score / best_row
+
+    Rows are processed in blocks of at most QUESTION_DEDUP_BLOCK_SIZE
+    similarities, so memory stays flat however many rows meet.
+
+    Args:
+        earlier_only: Self-join: only match bank rows before the query row
+    """
+    if len(query_rows) == 0 or len(bank_rows) == 0:
+        return
+    bank_step = max(1, min(len(bank_rows), QUESTION_DEDUP_BLOCK_SIZE // 256))
+    query_step = max(1, QUESTION_DEDUP_BLOCK_SIZE // bank_step)
+    for b in range(0, len(bank_rows), bank_step):
+        b_rows = bank_rows[b:b + bank_step]
+        block = bank[b_rows]
+        for q in range(0, len(query_rows), query_step):
+            q_rows = query_rows[q:q + query_step]
+            scores = queries[q_rows] @ block.T
+            if earlier_only:
+                scores[b_rows[None, :] >= q_rows[:, None]] = -np.inf
+            top = scores.argmax(axis=1)
+            top_score = scores[np.arange(len(q_rows)), top]
+            better = top_score > best_score[q_rows]
+            best_score[q_rows[better]] = top_score[better]
+            best_row[q_rows[better]] = b_rows[top[better]]
+
+
+def _kmeans(vectors: np.ndarray, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means centroids (unit length) of a sample of normalized vectors"""
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assigned = (vectors @ centroids.T).argmax(axis=1)
+        order = np.argsort(assigned, kind='stable')
+        filled, starts = np.unique(assigned[order], return_index=True)
+        sums = np.add.reduceat(vectors[order], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1)
+        # Empty clusters keep their centroid
+        centroids[filled] = sums / np.maximum(norms, 1e-12)[:, None]
+    return centroids
+
+
+def _nearest_clusters(vectors: np.ndarray, centroids: np.ndarray, probes: int) -> np.ndarray:
+    """Indices of the `probes` nearest centroids of every row, nearest first"""
+    nearest = np.empty((len(vectors), probes), dtype=np.int64)
+    step = max(1, QUESTION_DEDUP_BLOCK_SIZE // len(centroids))
+    for start in range(0, len(vectors), step):
+        scores = vectors[start:start + step] @ centroids.T
+        if probes == 1:
+            nearest[start:start + step, 0] = scores.argmax(axis=1)
+            continue
+        top = np.argpartition(-scores, probes - 1, axis=1)[:, :probes]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        nearest[start:start + step] = np.take_along_axis(top, order, axis=1)
+    return nearest
+
+
+def _by_cluster(assignment: np.ndarray, clusters: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions grouped by cluster: positions[bounds[c]:bounds[c + 1]] are in cluster c"""
+    order = np.argsort(assignment, kind='stable')
+    return order, np.searchsorted(assignment[order], np.arange(clusters + 1))
+
+
+def best_matches(queries: np.ndarray, bank: np.ndarray, earlier_only: bool = False,
+                 query_probes: Optional[np.ndarray] = None,
+                 bank_clusters: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Most similar bank row of every query row (cosine, normalized rows)
+
+    Without cluster assignments every pair is compared. With them the join
+    is blocked: each query is compared only with the bank rows of the
+    clusters it probes.
+
+    Args:
+        queries: Query embeddings
+        bank: Bank embeddings (may be the same array as queries)
+        earlier_only: Self-join: match each row only against rows before it
+        query_probes: Clusters searched per query row (rows x probes)
+        bank_clusters: Cluster of every bank row
+
+    Returns:
+        (best_row, best_score): bank row per query (-1 if none) and its
+        similarity (-inf if none)
+    """
+    best_score = np.full(len(queries), -np.inf, dtype=np.float32)
+    best_row = np.full(len(queries), -1, dtype=np.int64)
+    if len(queries) == 0 or len(bank) == 0:
+        return best_row, best_score
+
+    if query_probes is None:
+        _update_best(queries, np.arange(len(queries)), bank, np.arange(len(bank)),
+                     best_score, best_row, earlier_only)
+        return best_row, best_score
+
+    clusters = int(max(query_probes.max(), bank_clusters.max())) + 1
+    members, member_bounds = _by_cluster(bank_clusters, clusters)
+    probes = query_probes.shape[1]
+    visits, visit_bounds = _by_cluster(query_probes.ravel(), clusters)
+    for cluster in range(clusters):
+        _update_best(queries, visits[visit_bounds[cluster]:visit_bounds[cluster + 1]] // probes,
+                     bank, members[member_bounds[cluster]:member_bounds[cluster + 1]],
+                     best_score, best_row, earlier_only)
+    return best_row, best_score
+
+
+def find_duplicates(embeddings: np.ndarray, bank: Optional[np.ndarray],
+                    threshold: float = QUESTION_DUPLICATE_SIMILARITY,
+                    probes: int = QUESTION_DEDUP_PROBES,
+                    seed: int = 0) -> List[Optional[Dict]]:
+    """
+    Near-duplicate of each incoming question, in the bank or earlier in
+    the batch
+
+    Joins with more than QUESTION_DEDUP_EXACT_MAX_PAIRS pairs are blocked
+    by cluster. Spherical k-means centroids are trained on a sample of both
+    sides; every bank row (and incoming row, for the self-join) is put in
+    its nearest cluster, and each incoming row is compared with the rows
+    of its `probes` nearest clusters. sqrt(incoming * probes) clusters
+    balance assigning the bank against comparing within clusters. A
+    near-duplicate sits by the same centroids as its original, so it is
+    found; pairs far below the threshold may be skipped, which is the point.
+
+    Args:
+        embeddings: Normalized embeddings of the incoming questions, in order
+        bank: Normalized embeddings of the existing questions (or None)
+        threshold: Minimum cosine similarity
+        probes: Clusters searched per incoming question
+        seed: Seed of the k-means sample and initialization
+
+    Returns:
+        Per incoming question None, or {'bank_row' | 'batch_index',
+        'similarity'}; a bank match wins over a batch match
+    """
+    started = time.perf_counter()
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    bank_size = 0 if bank is None else len(bank)
+    incoming = len(embeddings)
+
+    query_probes = None
+    if incoming and incoming * (incoming + bank_size) > QUESTION_DEDUP_EXACT_MAX_PAIRS:
+        rng = np.random.default_rng(seed)
+        clusters = int(np.clip(np.sqrt(incoming * probes), probes, incoming + bank_size))
+        sample_size = min(incoming + bank_size, clusters * KMEANS_SAMPLE_PER_CLUSTER)
+        picks = np.sort(rng.choice(incoming + bank_size, sample_size, replace=False))
+        sample = np.concatenate([embeddings[picks[picks < incoming]],
+                                 np.asarray(bank[picks[picks >= incoming] - incoming]
+                                            if bank_size else embeddings[:0], dtype=np.float32)])
+        centroids = _kmeans(sample, clusters, rng)
+        query_probes = _nearest_clusters(embeddings, centroids, min(probes, clusters))
+
+    matches: List[Optional[Dict]] = [None] * incoming
+    blocked = query_probes is not None and incoming * incoming > QUESTION_DEDUP_EXACT_MAX_PAIRS
+    batch_row, batch_score = best_matches(
+        embeddings, embeddings, earlier_only=True,
+        query_probes=query_probes if blocked else None,
+        bank_clusters=query_probes[:, 0] if blocked else None)
+    for i in np.flatnonzero(batch_score >= threshold):
+        matches[i] = {'batch_index': int(batch_row[i]), 'similarity': float(batch_score[i])}
+
+    if bank_size:
+        blocked = query_probes is not None and incoming * bank_size > QUESTION_DEDUP_EXACT_MAX_PAIRS
+        bank_row, bank_score = best_matches(
+            embeddings, bank,
+            query_probes=query_probes if blocked else None,
+            bank_clusters=_nearest_clusters(bank, centroids, 1)[:, 0] if blocked else None)
+        for i in np.flatnonzero(bank_score >= threshold):
+            matches[i] = {'bank_row': int(bank_row[i]), 'similarity': float(bank_score[i])}
+
+    logger.info("Checked questions for duplicates", extra={
+        'questions': incoming, 'bank': bank_size,
+        'duplicates': sum(match is not None for match in matches),
+        'seconds': round(time.perf_counter() - started, 2)})
+    return matches
@@ -0,0 +1,466 @@
+"""
+Question Index - Person D
+In-memory embedding matrix and columnar metadata for fast retrieval
+"""
+
+import hashlib
+import json
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from config import VECTOR_DIMENSION, MMR_POOL_SIZE
+from utils.vector_operations import mmr_select
+from utils.bitset import Bitset
+from utils.string_column import StringColumn
+
+# Grouping keys supported by group_top_k -> question field
+GROUP_FIELDS = {
+    'category': 'category',
+    'difficulty': 'difficulty',
+    'topic': 'topics',
+    'job_role': 'job_roles'
+}
+
+# Question fields held as StringColumns (JSON-encoded for list fields)
+STRING_COLUMNS = ('question_id', 'question_text', 'topics', 'job_roles',
+                  'ideal_keywords', 'created_at')
+JSON_COLUMNS = ('topics', 'job_roles', 'ideal_keywords')
+# Single-valued fields held as integer codes into a vocabulary
+CODED_COLUMNS = ('category', 'difficulty')
+# question_id lookup: id hashes in ascending order and the row of each
+LOOKUP_COLUMNS = ('id_hash', 'id_rows')
+
+
+def id_hashes(question_ids: Iterable[str]) -> np.ndarray:
+    """Signed 64-bit hash of each question id, the same in every process"""
+    return np.fromiter((int.from_bytes(hashlib.blake2b(qid.encode('utf-8'), digest_size=8).digest(),
+                                       'little', signed=True)
+                        for qid in question_ids), dtype=np.int64)
+
+
+def lookup_columns(hashes: np.ndarray, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """LOOKUP_COLUMNS for question id hashes and their rows"""
+    order = np.argsort(hashes, kind='stable')
+    return {'id_hash': hashes[order], 'id_rows': np.asarray(rows, dtype=np.int64)[order]}
+
+
+class ColumnBuilder:
+    """Accumulate questions into QuestionIndex columns"""
+
+    def __init__(self):
+        self._strings = {name: [] for name in STRING_COLUMNS}
+        self._vocab = {name: {} for name in CODED_COLUMNS}
+        self._codes = {name: [] for name in CODED_COLUMNS}
+        self._embeddings = []
+        self._ordinals = []
+
+    def add(self, embedding: np.ndarray, ordinal: Optional[int],
+            category: str, difficulty: str, **strings: str) -> bool:
+        """
+        Add one question (skipped if its embedding has the wrong size)
+
+        Args:
+            embedding: Question embedding
+            ordinal: Seen-set ordinal, or None if unknown
+            category, difficulty: Coded fields
+            strings: Every STRING_COLUMNS field, list fields JSON-encoded
+
+        Returns:
+            True if the question was added
+        """
+        if len(embedding) != VECTOR_DIMENSION:
+            return False
+        self._embeddings.append(np.asarray(embedding, dtype=np.float32))
+        self._ordinals.append(-1 if ordinal is None else ordinal)
+        for name, value in (('category', category), ('difficulty', difficulty)):
+            vocab = self._vocab[name]
+            self._codes[name].append(vocab.setdefault(value, len(vocab)))
+        for name in STRING_COLUMNS:
+            self._strings[name].append(strings[name])
+        return True
+
+    def add_question(self, question: Dict, ordinal: Optional[int] = None) -> bool:
+        """Add a question dict (as returned by DatabaseManager.get_all_questions)"""
+        embedding = question.get('embedding') or []
+        return self.add(
+            embedding, ordinal, question['category'], question['difficulty'],
+            **{name: (json.dumps(question.get(name) or [])
+                      if name in JSON_COLUMNS else question.get(name) or '')
+               for name in STRING_COLUMNS}
+        )
+
+    def add_row(self, row) -> bool:
+        """Add a raw row from DatabaseManager.iter_question_rows"""
+        embedding = np.asarray(json.loads(row['embedding']), dtype=np.float32)
+        return self.add(
+            embedding, row['ordinal'], row['category'], row['difficulty'],
+            **{name: (row[name] or ('[]' if name in JSON_COLUMNS else ''))
+               for name in STRING_COLUMNS}
+        )
+
+    def build(self) -> Tuple[Dict, Dict[str, List[str]]]:
+        """
+        Returns:
+            (columns, vocab): columns maps 'matrix', 'ordinals', coded and
+            string field names to arrays / StringColumns; vocab maps each
+            coded field to its values in code order
+        """
+        columns = {
+            'matrix': (np.vstack(self._embeddings) if self._embeddings
+                       else np.zeros((0, VECTOR_DIMENSION), dtype=np.float32)),
+            'ordinals': np.asarray(self._ordinals, dtype=np.int64)
+        }
+        for name in CODED_COLUMNS:
+            columns[name] = np.asarray(self._codes[name], dtype=np.int32)
+        for name in STRING_COLUMNS:
+            columns[name] = StringColumn.from_strings(self._strings[name])
+        ids = self._strings['question_id']
+        columns.update(lookup_columns(id_hashes(ids), np.arange(len(ids))))
+        vocab = {name: list(values) for name, values in self._vocab.items()}
+        return columns, vocab
+
+
+def columns_from_database(db, question_ids: Optional[List[str]] = None) -> Tuple[Dict, Dict[str, List[str]]]:
+    """Stream every question (or only question_ids) from a DatabaseManager into index columns"""
+    builder = ColumnBuilder()
+    for rows in db.iter_question_rows(question_ids=question_ids):
+        for row in rows:
+            builder.add_row(row)
+    return builder.build()
+
+
+def merge_columns(base: Dict, base_vocab: Dict[str, List[str]], keep_rows: np.ndarray,
+                  extra: Dict, extra_vocab: Dict[str, List[str]]) -> Tuple[Dict, Dict[str, List[str]]]:
+    """
+    Columns with base's keep_rows followed by every row of extra
+
+    Coded columns are re-coded into one vocabulary (base's values keep
+    their codes). The id lookup is merged from both sides' hashes, so no
+    id is re-hashed.
+    """
+    keep_rows = np.asarray(keep_rows, dtype=np.int64)
+    vocab = {name: list(values) for name, values in base_vocab.items()}
+    columns = {
+        'matrix': np.concatenate([base['matrix'][keep_rows], extra['matrix']]),
+        'ordinals': np.concatenate([base['ordinals'][keep_rows], extra['ordinals']])
+    }
+    for name in CODED_COLUMNS:
+        codes = {value: code for code, value in enumerate(vocab[name])}
+        remap = np.asarray([codes.setdefault(value, len(codes)) for value in extra_vocab[name]],
+                           dtype=np.int32)
+        vocab[name] = list(codes)
+        extra_codes = remap[extra[name]] if len(extra[name]) else np.zeros(0, dtype=np.int32)
+        columns[name] = np.concatenate([base[name][keep_rows], extra_codes])
+    for name in STRING_COLUMNS:
+        columns[name] = StringColumn.concat([base[name].take(keep_rows), extra[name]])
+
+    new_row = np.full(len(base['matrix']), -1, dtype=np.int64)
+    new_row[keep_rows] = np.arange(len(keep_rows))
+    base_rows = new_row[base['id_rows']]
+    kept = base_rows >= 0
+    columns.update(lookup_columns(
+        np.concatenate([base['id_hash'][kept], extra['id_hash']]),
+        np.concatenate([base_rows[kept], extra['id_rows'] + len(keep_rows)])))
+    return columns, vocab
+
+
+class QuestionIndex:
+    """Question bank as one normalized matrix plus per-field columns"""
+
+    def __init__(self, questions: List[Dict],
+                 ordinals: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            questions: Question dicts with embeddings (rows whose embedding
+                       is missing or has the wrong size are skipped)
+            ordinals: Optional question_id -> dense ordinal map, used to
+                      apply per-candidate seen-sets
+        """
+        ordinals = ordinals or {}
+        builder = ColumnBuilder()
+        for q in questions:
+            builder.add_question(q, ordinals.get(q['question_id']))
+        self._set_columns(*builder.build())
+
+    @classmethod
+    def from_columns(cls, columns: Dict, vocab: Dict[str, List[str]],
+                     generation: Optional[int] = None,
+                     source: Optional[Dict] = None) -> "QuestionIndex":
+        """
+        Index over prebuilt (e.g. memory-mapped) columns, without copying them
+
+        Args:
+            columns, vocab: As returned by ColumnBuilder.build
+            generation: Store generation the columns were loaded from
+            source: Data versions the columns were built from
+        """
+        index = cls.__new__(cls)
+        index._set_columns(columns, vocab, generation, source)
+        return index
+
+    def _set_columns(self, columns: Dict, vocab: Dict[str, List[str]],
+                     generation: Optional[int] = None,
+                     source: Optional[Dict] = None):
+        self.generation = generation
+        self.source = source
+        self.columns = columns
+        self.matrix = columns['matrix']
+        self.ordinals = columns['ordinals']
+
+        # Single-valued columns as integer codes for vectorized masks
+        self._values = vocab
+        self._vocab = {name: {value: code for code, value in enumerate(values)}
+                       for name, values in vocab.items()}
+        self._codes = {name: columns[name] for name in CODED_COLUMNS}
+
+        self._groups = {}
+        self._group_rows = {}
+
+    def rows_of(self, question_ids: Sequence[str]) -> np.ndarray:
+        """
+        Row of each question id (-1 if not in the index)
+
+        Binary search over the sorted id hashes, which live in the
+        (memory-mapped) columns like everything else: no per-process dict.
+        """
+        hashes = id_hashes(question_ids)
+        sorted_hashes = self.columns['id_hash']
+        id_rows = self.columns['id_rows']
+        ids = self.columns['question_id']
+        rows = np.full(len(hashes), -1, dtype=np.int64)
+        for i, start in enumerate(np.searchsorted(sorted_hashes, hashes)):
+            # Equal hashes are adjacent; comparing ids rules out collisions
+            for j in range(start, len(sorted_hashes)):
+                if sorted_hashes[j] != hashes[i]:
+                    break
+                if ids[id_rows[j]] == question_ids[i]:
+                    rows[i] = id_rows[j]
+                    break
+        return rows
+
+    def row_of(self, question_id: str) -> Optional[int]:
+        """Row of a question id, or None if it is not in the index"""
+        row = int(self.rows_of([question_id])[0])
+        return None if row < 0 else row
+
+    def iter_questions(self) -> Iterator[Dict]:
+        """Every question as a dict, built one at a time"""
+        for i in range(len(self)):
+            yield self.question(i)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def scores(self, query_vector: List[float]) -> np.ndarray:
+        """Cosine similarity of every question to a normalized query vector"""
+        return self.matrix @ np.asarray(query_vector, dtype=np.float32)
+
+    def mask(self, difficulty: Optional[str] = None,
+             category: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Boolean row mask for metadata filters
+
+        Returns:
+            Mask array, or None if no filter was given
+        """
+        mask = None
+        for column, value in (('difficulty', difficulty), ('category', category)):
+            if value is None:
+                continue
+            code = self._vocab[column].get(value, -1)
+            column_mask = self._codes[column] == code
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+
+    def unseen_mask(self, seen: Bitset) -> np.ndarray:
+        """Boolean row mask that is False for questions in a seen-set"""
+        return ~seen.contains_many(self.ordinals)
+
+    def top_k(self, scores: np.ndarray, k: int,
+              min_score: float = -np.inf,
+              mask: Optional[np.ndarray] = None,
+              mmr_lambda: Optional[float] = None,
+              pool_size: int = MMR_POOL_SIZE) -> List[Tuple[int, float]]:
+        """
+        Highest-scoring rows, best first
+
+        Args:
+            scores: Score per row
+            k: Number of rows to return
+            min_score: Drop rows below this score
+            mask: Optional boolean row mask
+            mmr_lambda: Re-rank the best pool_size rows with maximal
+                        marginal relevance (None keeps pure score order)
+            pool_size: Candidate pool for MMR re-ranking
+
+        Returns:
+            List of (row index, score)
+        """
+        eligible = scores >= min_score
+        if mask is not None:
+            eligible &= mask
+        candidates = np.flatnonzero(eligible)
+
+        return self._select_top(candidates, scores, k, mmr_lambda, pool_size)
+
+    def _select_top(self, candidates: np.ndarray, scores: np.ndarray,
+                    k: int, mmr_lambda: Optional[float] = None,
+                    pool_size: int = MMR_POOL_SIZE) -> List[Tuple[int, float]]:
+        """argpartition the candidate rows, then order only the selection"""
+        if k <= 0 or len(candidates) == 0:
+            return []
+
+        take = k if mmr_lambda is None else max(k, pool_size)
+
+        candidate_scores = scores[candidates]
+        if len(candidates) > take:
+            top = np.argpartition(-candidate_scores, take - 1)[:take]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind='stable')]
+
+        if mmr_lambda is not None:
+            pool = candidates[top]
+            picks = mmr_select(candidate_scores[top], self.matrix[pool], k, mmr_lambda)
+            top = top[picks]
+
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in top]
+
+    def groups(self, group_by: str) -> Dict[str, np.ndarray]:
+        """
+        Row indices per value of a grouping key (built once per key)
+
+        Multi-valued fields (topic, job_role) put a question in every
+        group it lists.
+        """
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"group_by must be one of {list(GROUP_FIELDS)}")
+
+        if group_by not in self._groups:
+            field = GROUP_FIELDS[group_by]
+            if field in self._codes:
+                codes = self._codes[field]
+                self._groups[group_by] = {
+                    value: np.flatnonzero(codes == code)
+                    for code, value in enumerate(self._values[field])
+                }
+            else:
+                members = {}
+                for i, values in enumerate(self.columns[field]):
+                    for value in json.loads(values):
+                        members.setdefault(value, []).append(i)
+                self._groups[group_by] = {
+                    value: np.asarray(rows, dtype=np.int64)
+                    for value, rows in members.items()
+                }
+
+        return self._groups[group_by]
+
+    def _grouped_rows(self, group_by: str) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+        """Position of each group, all member rows concatenated and each group's start"""
+        if group_by not in self._group_rows:
+            groups = self.groups(group_by)
+            position = {value: i for i, value in enumerate(groups)}
+            sizes = np.fromiter((len(rows) for rows in groups.values()), dtype=np.int64,
+                                count=len(groups))
+            starts = np.zeros(len(groups), dtype=np.int64)
+            np.cumsum(sizes[:-1], out=starts[1:])
+            rows = (np.concatenate(list(groups.values())) if groups
+                    else np.zeros(0, dtype=np.int64))
+            self._group_rows[group_by] = (position, rows, starts)
+        return self._group_rows[group_by]
+
+    def group_top_k(self, scores: np.ndarray, group_by: str, k: int,
+                    min_score: float = -np.inf,
+                    group_values: Optional[List[str]] = None,
+                    mask: Optional[np.ndarray] = None,
+                    mmr_lambda: Optional[float] = None,
+                    pool_size: int = MMR_POOL_SIZE,
+                    max_groups: Optional[int] = None) -> Dict[str, List[Tuple[int, float]]]:
+        """
+        Top k rows per group from one score vector
+
+        Groups are ranked by their best eligible score (one vectorized pass)
+        and only the top max_groups are filled. They pick one row per round
+        in rank order, so a question that belongs to several groups is
+        returned once, in the group where it ranks highest (ties go to the
+        better-ranked group).
+
+        Args:
+            scores: Score per row
+            group_by: 'category' | 'difficulty' | 'topic' | 'job_role'
+            k: Rows per group
+            min_score: Drop rows below this score
+            group_values: Groups to consider (all groups if None)
+            mask: Optional boolean row mask
+            mmr_lambda: MMR re-ranking within each group (see top_k)
+            pool_size: Candidate pool per group for MMR re-ranking
+            max_groups: Fill at most this many groups (all if None)
+
+        Returns:
+            Dict of group value -> list of (row index, score), best group
+            first; groups without eligible rows are left out
+        """
+        groups = self.groups(group_by)
+        position, rows, starts = self._grouped_rows(group_by)
+        if group_values is None:
+            group_values = list(groups)
+        group_values = [value for value in group_values if value in position]
+        if k <= 0 or not group_values or max_groups == 0:
+            return {}
+
+        eligible = scores >= min_score
+        if mask is not None:
+            eligible &= mask
+
+        best = np.maximum.reduceat(np.where(eligible, scores, -np.inf)[rows], starts)
+        best = best[[position[value] for value in group_values]]
+        order = np.argsort(-best, kind='stable')
+        order = order[np.isfinite(best[order])][:max_groups]
+        ranked = [group_values[i] for i in order]
+
+        candidates = {}
+        picks = {}
+        for value in ranked:
+            members = groups[value]
+            candidates[value] = members[eligible[members]]
+            picks[value] = self._select_top(candidates[value], scores, k, mmr_lambda, pool_size)
+
+        taken = np.zeros(len(self), dtype=bool)
+        cursor = dict.fromkeys(ranked, 0)
+        selected = {value: [] for value in ranked}
+        for _ in range(k):
+            for value in ranked:
+                pick = picks[value]
+                while True:
+                    if cursor[value] == len(pick):
+                        if len(pick) == len(candidates[value]):
+                            break
+                        # Rows went to other groups: select deeper into this one
+                        pick = picks[value] = self._select_top(
+                            candidates[value], scores, 2 * len(pick), mmr_lambda, pool_size)
+                    row, score = pick[cursor[value]]
+                    cursor[value] += 1
+                    if not taken[row]:
+                        taken[row] = True
+                        selected[value].append((row, score))
+                        break
+
+        return {value: selected[value] for value in ranked if selected[value]}
+
+    def question(self, row: int, score: Optional[float] = None) -> Dict:
+        """Question dict for a row, with similarity_score if given"""
+        strings = self.columns
+        q = {
+            'question_id': strings['question_id'][row],
+            'question_text': strings['question_text'][row],
+            'category': self._values['category'][self._codes['category'][row]],
+            'difficulty': self._values['difficulty'][self._codes['difficulty'][row]],
+            'topics': json.loads(strings['topics'][row]),
+            'job_roles': json.loads(strings['job_roles'][row]),
+            'embedding': self.matrix[row].tolist(),
+            'ideal_keywords': json.loads(strings['ideal_keywords'][row]),
+            'created_at': strings['created_at'][row]
+        }
+        if score is not None:
+            q['similarity_score'] = round(score, 4)
+        return q
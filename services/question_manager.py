@@ -3,20 +3,29 @@ Question Manager - Person C
 Manages question database creation and updates
 """
 
+import logging
 import uuid
 import json
+import numpy as np
 import pandas as pd
 from typing import Dict, List
 from database import DatabaseManager
-from utils import embedding_service
+from utils.embedding_service import embedding_service
 from utils.vector_operations import validate_vector
+from .question_retriever import QuestionRetriever
+from .question_dedup import find_duplicates
+from config import QUESTION_DUPLICATE_ACTION
 
+logger = logging.getLogger(__name__)
+
+DUPLICATE_ACTIONS = ('flag', 'skip')
 
 class QuestionManager:
     """Manage interview questions database"""
     
-    def __init__(self):
+    def __init__(self, retriever: QuestionRetriever = None):
         self.db = DatabaseManager()
+        self.retriever = retriever  # Index of the existing bank (created on first import)
     
     def add_question(self, question_text: str,
                     category: str,
@@ -38,7 +47,6 @@ class QuestionManager:
         Returns:
             question_id
         """
-        print(f"🔄 Adding question: {question_text[:50]}...")
         
         # Generate embedding
         embedding = embedding_service.embed_text(question_text)
@@ -47,7 +55,7 @@ class QuestionManager:
         try:
             validate_vector(embedding, "question_embedding")
         except ValueError as e:
-            print(f"❌ Embedding validation failed: {e}")
+            logger.error("Embedding validation failed", extra={'error': str(e)})
             raise
         
         # Create question data
@@ -63,27 +71,40 @@ class QuestionManager:
         
         # Insert to database
         question_id = self.db.insert_question(question_data)
-        print(f"✅ Question added with ID: {question_id}")
+        logger.debug("Question added", extra={'question_id': question_id})
         
         return question_id
     
-    def bulk_add_questions(self, questions: List[Dict]) -> List[str]:
+    def import_questions(self, questions: List[Dict],
+                         on_duplicate: str = QUESTION_DUPLICATE_ACTION) -> Dict:
         """
-        Add multiple questions efficiently
-        13:30    Args:
-        questions: List of question dicts (without embeddings)
-    
+        Add multiple questions, checking them for near-duplicates first
+        
+        Every incoming question is compared (embedding cosine similarity,
+        see services.question_dedup) with the questions before it in the
+        batch and with the question bank. The bank is
+        QuestionRetriever.current_index(), which first publishes pending
+        question changes on this thread (bounded, see there).
+        
+        Args:
+            questions: List of question dicts (without embeddings)
+            on_duplicate: 'flag' inserts duplicates and reports them;
+                          'skip' reports them and returns the id of the
+                          question they duplicate instead
+        
         Returns:
-            List of question_ids
+            Dict with question_ids (one per input, in order), inserted,
+            skipped and duplicates (index, question_text, duplicate_of,
+            duplicate_text, source 'bank' | 'batch', similarity)
         """
-        print(f"🔄 Bulk adding {len(questions)} questions...")
+        if on_duplicate not in DUPLICATE_ACTIONS:
+            raise ValueError(f"on_duplicate must be one of {list(DUPLICATE_ACTIONS)}")
         
         # Extract texts for batch embedding
         texts = [q['question_text'] for q in questions]
         
         # Generate all embeddings at once (faster)
         embeddings = embedding_service.embed_batch(texts)
-        print(f"✅ Generated {len(embeddings)} embeddings")
         
         # Add embeddings to question dicts
         for q, emb in zip(questions, embeddings):
@@ -91,21 +112,77 @@ class QuestionManager:
             if 'ideal_keywords' not in q:
                 q['ideal_keywords'] = []
         
+        # Blocked similarity join against the batch and the bank
+        if self.retriever is None:
+            self.retriever = QuestionRetriever()
+        index = self.retriever.current_index()
+        matches = find_duplicates(np.asarray(embeddings, dtype=np.float32),
+                                  index.matrix if len(index) else None)
+        
         # Bulk insert
-        question_ids = self.db.bulk_insert_questions(questions)
-        print(f"✅ Inserted {len(question_ids)} questions")
+        keep = [i for i, match in enumerate(matches) if match is None or on_duplicate == 'flag']
+        inserted = self.db.bulk_insert_questions([questions[i] for i in keep])
+        question_ids = [None] * len(questions)
+        for i, question_id in zip(keep, inserted):
+            question_ids[i] = question_id
+        
+        duplicates = []
+        for i, match in enumerate(matches):
+            if match is None:
+                continue
+            if 'bank_row' in match:
+                duplicate_of = index.columns['question_id'][match['bank_row']]
+                duplicate_text = index.columns['question_text'][match['bank_row']]
+            else:
+                # Earlier rows are resolved first, so a skipped one already has its target
+                duplicate_of = question_ids[match['batch_index']]
+                duplicate_text = texts[match['batch_index']]
+            if question_ids[i] is None:
+                question_ids[i] = duplicate_of
+            duplicates.append({
+                'index': i,
+                'question_text': texts[i],
+                'duplicate_of': duplicate_of,
+                'duplicate_text': duplicate_text,
+                'source': 'bank' if 'bank_row' in match else 'batch',
+                'similarity': round(match['similarity'], 4)
+            })
+        
+        logger.info("Bulk inserted questions", extra={'questions': len(inserted),
+                                                      'duplicates': len(duplicates),
+                                                      'on_duplicate': on_duplicate})
+        return {
+            'question_ids': question_ids,
+            'inserted': len(inserted),
+            'skipped': len(questions) - len(inserted),
+            'duplicates': duplicates
+        }
+    
+    def bulk_add_questions(self, questions: List[Dict],
+                           on_duplicate: str = QUESTION_DUPLICATE_ACTION) -> List[str]:
+        """
+        Add multiple questions efficiently
+        
+        Args:
+            questions: List of question dicts (without embeddings)
+            on_duplicate: See import_questions
         
-        return question_ids
+        Returns:
+            List of question_ids
+        """
+        return self.import_questions(questions, on_duplicate)['question_ids']
     
-    def load_questions_from_file(self, filepath: str) -> List[str]:
+    def load_questions_from_file(self, filepath: str,
+                                 on_duplicate: str = QUESTION_DUPLICATE_ACTION) -> Dict:
         """
         Load questions from JSON or CSV file
         
         Args:
             filepath: Path to file
+            on_duplicate: See import_questions
         
         Returns:
-            List of question_ids
+            Import report (see import_questions)
         """
         if filepath.endswith('.json'):
             with open(filepath, 'r') as f:
@@ -116,41 +193,26 @@ class QuestionManager:
         else:
             raise ValueError("Unsupported file format. Use JSON or CSV")
         
-        return self.bulk_add_questions(questions)
+        return self.import_questions(questions, on_duplicate)
     
 
     def get_database_summary(self) -> Dict:
         """
         Get summary of question database
         
+        Served from counters maintained on insert/update, so the cost does
+        not grow with the size of the question bank.
+        
         Returns:
             Statistics dict
         """
-        all_questions = self.db.get_all_questions()
-        
-        # Count by category
-        categories = {}
-        difficulties = {}
-        topics = {}
-        
-        for q in all_questions:
-            # Categories
-            cat = q['category']
-            categories[cat] = categories.get(cat, 0) + 1
-            
-            # Difficulties
-            diff = q['difficulty']
-            difficulties[diff] = difficulties.get(diff, 0) + 1
-            
-            # Topics
-            for topic in q['topics']:
-                topics[topic] = topics.get(topic, 0) + 1
+        counts = self.db.get_question_counts(top_topics=10)
         
         return {
-            'total_questions': len(all_questions),
-            'by_category': categories,
-            'by_difficulty': difficulties,
-            'top_topics': dict(sorted(topics.items(), key=lambda x: x[1], reverse=True)[:10])
+            'total_questions': counts['total'],
+            'by_category': counts['by_category'],
+            'by_difficulty': counts['by_difficulty'],
+            'top_topics': counts['top_topics']
         }
 
     def update_question(self, question_id: str, **kwargs) -> bool:
@@ -167,7 +229,7 @@ class QuestionManager:
         """
         question = self.db.get_question_by_id(question_id)
         if not question:
-            print(f"❌ Question not found: {question_id}")
+            logger.warning("Question not found", extra={'question_id': question_id})
             return False
         
         # If text changed, regenerate embedding
@@ -177,5 +239,5 @@ class QuestionManager:
         
         # Update in database (would need additional DB method)
         # For now, delete and re-insert
-        print(f"⚠️  Update functionality to be implemented")
+        logger.warning("Question update is not implemented", extra={'question_id': question_id})
         return False
\ No newline at end of file
@@ -3,31 +3,182 @@ Question Retriever - Person D
 Retrieves personalized questions based on candidate profile
 """
 
+import time
+import logging
+import numpy as np
+from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from database import DatabaseManager
-from utils import batch_cosine_similarity
 from utils.vector_operations import validate_vector
-from config import SIMILARITY_THRESHOLD, MAX_QUESTIONS_PER_SESSION
+from utils.bitset import Bitset
+from utils.metrics import StageTimer, RETRIEVAL_STAGE_SECONDS, CACHE_REQUESTS
+from .question_index import QuestionIndex, GROUP_FIELDS, columns_from_database
+from .index_store import QuestionIndexStore
+from .interview_session import difficulty_for_score
+from config import (SIMILARITY_THRESHOLD, MAX_QUESTIONS_PER_SESSION,
+                    ENABLE_CACHE, CACHE_EXPIRY_MINUTES,
+                    EXCLUDE_SEEN_QUESTIONS, REPEAT_COOLDOWN_DAYS,
+                    SHARED_QUESTION_INDEX, QUESTION_INDEX_CHECK_SECONDS,
+                    QUESTION_INDEX_IMPORT_WAIT_SECONDS, DIVERSITY_MAX_GROUPS)
+
+logger = logging.getLogger(__name__)
+
+# Groups with a fixed presentation order
+DIVERSITY_GROUPS = {
+    'category': ['technical', 'behavioral', 'situational'],
+    'difficulty': ['easy', 'medium', 'hard']
+}
 
 class QuestionRetriever:
     """Retrieve personalized questions for candidates"""
     
     def __init__(self):
         self.db = DatabaseManager()
-        self._question_cache = None
+        self._index = None
+        self._next_index_check = 0.0
+        self.index_store = (QuestionIndexStore.for_database(self.db.db_path)
+                            if SHARED_QUESTION_INDEX else None)
     
-    def _load_questions(self, force_reload: bool = False):
-        """Load all questions into memory (cache)"""
-        if self._question_cache is None or force_reload:
-            print("🔄 Loading questions from database...")
-            self._question_cache = self.db.get_all_questions()
-            print(f"✅ Loaded {len(self._question_cache)} questions")
+    def _load_questions(self, force_reload: bool = False) -> QuestionIndex:
+        """
+        Question index (cached)
+        
+        With SHARED_QUESTION_INDEX, attaches to the store's current
+        generation and moves to newer ones as they are published (checked
+        at most every QUESTION_INDEX_CHECK_SECONDS).
+        """
+        if self.index_store is None:
+            if self._index is None or force_reload:
+                logger.info("Loading questions from database")
+                # Versions read first: a write during the load only makes them older
+                source = self.db.get_change_versions(['questions'])
+                self._index = QuestionIndex.from_columns(*columns_from_database(self.db),
+                                                         source=source)
+                logger.info("Loaded questions", extra={'questions': len(self._index)})
+            return self._index
+        
+        now = time.monotonic()
+        if self._index is None or force_reload or now >= self._next_index_check:
+            self._next_index_check = now + QUESTION_INDEX_CHECK_SECONDS
+            if self._index is None or force_reload:
+                # Attach the persisted snapshot if current, patch it if stale
+                generation = self.index_store.refresh(self.db, force=force_reload)
+            else:
+                generation = self.index_store.current_generation()
+            if self._index is None or self._index.generation != generation:
+                self._index = self.index_store.load(generation)
+                logger.info("Attached question index",
+                            extra={'generation': generation, 'questions': len(self._index)})
+        return self._index
+    
+    def current_index(self) -> QuestionIndex:
+        """
+        Question index including every question committed so far, as far
+        as that is cheap
+        
+        With a store, publishes pending changes first (a no-op when the
+        current generation is up to date), for callers such as imports that
+        should not work from an index a few seconds old. This runs on the
+        caller's thread, so it is bounded: only an incremental patch is
+        published here, and another process's rebuild is waited for at most
+        QUESTION_INDEX_IMPORT_WAIT_SECONDS. Otherwise the attached
+        generation is returned and the maintenance refresh catches up.
+        """
+        if self.index_store is not None:
+            generation = self.index_store.refresh(self.db, wait=True,
+                                                  timeout=QUESTION_INDEX_IMPORT_WAIT_SECONDS,
+                                                  full=False)
+            if self._index is None or self._index.generation != generation:
+                self._next_index_check = 0.0
+        return self._load_questions()
+    
+    def index_source(self) -> Optional[Dict]:
+        """
+        Data versions of the index retrieval currently serves from
+        
+        The index trails the database by up to QUESTION_INDEX_CHECK_SECONDS
+        (or until the next publish), so responses built from it are
+        versioned by this rather than by the live change counters.
+        """
+        return self._load_questions().source
+    
+    def refresh_index(self) -> Optional[int]:
+        """
+        Publish a new index generation if the question bank changed
+        (run periodically off the request path; a no-op without a store)
+        
+        Returns:
+            Current generation
+        """
+        if self.index_store is None:
+            return None
+        return self.index_store.refresh(self.db)
+    
+    @staticmethod
+    def _check_mmr_lambda(mmr_lambda: Optional[float]):
+        """Reject MMR trade-offs outside [0, 1]"""
+        if mmr_lambda is not None and not 0.0 <= mmr_lambda <= 1.0:
+            raise ValueError(f"mmr_lambda must be between 0 and 1, got {mmr_lambda}")
+    
+    def _get_seen_set(self, candidate_id: str, exclude_seen: bool,
+                      repeat_cooldown_days: Optional[float]) -> Tuple[Optional[Bitset], int]:
+        """
+        Seen-set to exclude from retrieval
+        
+        Returns:
+            (Bitset or None if repeats are allowed, answers it reflects)
+        """
+        if not exclude_seen:
+            return None, 0
+        
+        since = None
+        if repeat_cooldown_days is not None:
+            since = (datetime.now() - timedelta(days=repeat_cooldown_days)).isoformat()
+        
+        return self.db.get_seen_set(candidate_id, since)
+    
+    def unseen_mask(self, index: QuestionIndex, candidate_id: str,
+                    exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+                    repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS) -> Optional[np.ndarray]:
+        """Row mask hiding questions the candidate already answered (None = no filter)"""
+        seen, _ = self._get_seen_set(candidate_id, exclude_seen, repeat_cooldown_days)
+        return index.unseen_mask(seen) if seen is not None else None
+    
+    @staticmethod
+    def _combine_masks(*masks: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """AND together the masks that are set"""
+        combined = None
+        for mask in masks:
+            if mask is not None:
+                combined = mask if combined is None else combined & mask
+        return combined
+    
+    def _get_profile_vector(self, candidate_id: str) -> Optional[List[float]]:
+        """Fetch and validate a candidate's profile vector"""
+        profile = self.db.get_candidate_profile(candidate_id)
+        if not profile:
+            logger.warning("Profile not found", extra={'candidate_id': candidate_id})
+            return None
+        
+        profile_vector = profile['profile_vector']
+        
+        try:
+            validate_vector(profile_vector, "profile_vector")
+        except ValueError as e:
+            logger.error("Invalid profile vector",
+                         extra={'candidate_id': candidate_id, 'error': str(e)})
+            return None
+        
+        return profile_vector
     
     def retrieve_questions(self, candidate_id: str,
                           min_similarity: float = SIMILARITY_THRESHOLD,
                           max_questions: int = MAX_QUESTIONS_PER_SESSION,
                           difficulty: Optional[str] = None,
-                          category: Optional[str] = None) -> List[Dict]:
+                          category: Optional[str] = None,
+                          mmr_lambda: Optional[float] = None,
+                          exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+                          repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS) -> List[Dict]:
         """
         Retrieve personalized questions for candidate
         
@@ -37,81 +188,103 @@ class QuestionRetriever:
             max_questions: Maximum number of questions to return
             difficulty: Optional filter by difficulty
             category: Optional filter by category
+            mmr_lambda: Optional MMR trade-off (1.0 = relevance only,
+                        lower values penalize near-duplicate questions)
+            exclude_seen: Skip questions the candidate already answered
+            repeat_cooldown_days: Allow answered questions again after this
+                                  many days (None = never)
         
         Returns:
             List of matched questions with similarity scores
         """
-        print(f"🔄 Retrieving questions for candidate: {candidate_id}")
+        self._check_mmr_lambda(mmr_lambda)
+        logger.debug("Retrieving questions", extra={'candidate_id': candidate_id})
+        stages = StageTimer(RETRIEVAL_STAGE_SECONDS, method='retrieve_questions')
         
-        # Check cache first
-        cached = self.db.get_cached_retrieval(candidate_id)
-        if cached:
-            print("✅ Using cached results")
-            question_ids = cached['question_ids'][:max_questions]
-            return [self.db.get_question_by_id(qid) for qid in question_ids]
+        # Seen-set is part of the cache key, so new answers invalidate it
+        seen, seen_count = self._get_seen_set(candidate_id, exclude_seen,
+                                              repeat_cooldown_days)
+        stages.lap('seen_set')
         
-        # Get candidate profile
-        profile = self.db.get_candidate_profile(candidate_id)
-        if not profile:
-            print(f"❌ Profile not found for: {candidate_id}")
-            return []
+        # Check cache first (keyed by every parameter that changes the result)
+        cache_key = self.db.retrieval_cache_key(
+            candidate_id,
+            min_similarity=min_similarity,
+            max_questions=max_questions,
+            difficulty=difficulty,
+            category=category,
+            mmr_lambda=mmr_lambda,
+            exclude_seen=exclude_seen,
+            repeat_cooldown_days=repeat_cooldown_days,
+            seen_count=seen_count
+        )
         
-        profile_vector = profile['profile_vector']
+        if ENABLE_CACHE:
+            cached = self.db.get_cached_retrieval(candidate_id, cache_key)
+            stages.lap('cache_lookup')
+            CACHE_REQUESTS.inc(cache='retrieval', result='hit' if cached else 'miss')
+            if cached:
+                logger.debug("Using cached results", extra={'candidate_id': candidate_id})
+                index = self._load_questions()
+                rows = index.rows_of(cached['question_ids'])
+                results = [index.question(int(row), score)
+                           for row, score in zip(rows, cached['similarity_scores'])
+                           if row >= 0]
+                stages.lap('cache_hit_load')
+                return results
         
-        # Validate
-        try:
-            validate_vector(profile_vector, "profile_vector")
-        except ValueError as e:
-            print(f"❌ Invalid profile vector: {e}")
+        # Get candidate profile
+        profile_vector = self._get_profile_vector(candidate_id)
+        stages.lap('profile_fetch')
+        if profile_vector is None:
             return []
         
         # Load questions
-        self._load_questions()
+        index = self._load_questions()
+        stages.lap('index_load')
         
         # Filter by difficulty and category if specified
-        questions = self._question_cache
-        if difficulty:
-            questions = [q for q in questions if q['difficulty'] == difficulty]
-        if category:
-            questions = [q for q in questions if q['category'] == category]
-        
-        print(f"📊 Comparing with {len(questions)} questions...")
-        
-        # Extract embeddings
-        question_embeddings = [q['embedding'] for q in questions]
-        
-        # Compute similarities (vectorized - FAST!)
-        similarities = batch_cosine_similarity(profile_vector, question_embeddings)
-        
-        # Combine questions with scores
-        scored_questions = []
-        for q, sim in zip(questions, similarities):
-            if sim >= min_similarity:
-                q_with_score = q.copy()
-                q_with_score['similarity_score'] = round(sim, 4)
-                scored_questions.append(q_with_score)
+        mask = self._combine_masks(
+            index.mask(difficulty=difficulty, category=category),
+            index.unseen_mask(seen) if seen is not None else None
+        )
+        stages.lap('filter')
         
-        # Sort by similarity (highest first)
-        scored_questions.sort(key=lambda x: x['similarity_score'], reverse=True)
+        # Compute similarities against the whole matrix (vectorized - FAST!)
+        similarities = index.scores(profile_vector)
+        stages.lap('scoring')
         
-        # Limit results
-        results = scored_questions[:max_questions]
+        # Select the best matches without sorting the whole bank
+        top = index.top_k(similarities, max_questions,
+                          min_score=min_similarity, mask=mask,
+                          mmr_lambda=mmr_lambda)
+        results = [index.question(row, score) for row, score in top]
+        stages.lap('top_k')
         
-        print(f"✅ Found {len(results)} matching questions")
-        if results:
-            print(f"   Top score: {results[0]['similarity_score']:.4f}")
-            print(f"   Lowest score: {results[-1]['similarity_score']:.4f}")
+        logger.debug("Found matching questions", extra={
+            'candidate_id': candidate_id,
+            'compared': len(index),
+            'matches': len(results),
+            'top_score': results[0]['similarity_score'] if results else None
+        })
         
         # Cache results
         question_ids = [q['question_id'] for q in results]
         scores = [q['similarity_score'] for q in results]
-        self.db.cache_retrieval_results(candidate_id, question_ids, scores)
+        if ENABLE_CACHE:
+            self.db.cache_retrieval_results(candidate_id, question_ids, scores,
+                                            expiry_minutes=CACHE_EXPIRY_MINUTES,
+                                            cache_key=cache_key)
+            stages.lap('cache_write')
         
         return results
     
     def retrieve_adaptive_questions(self, candidate_id: str,
                                    last_score: Optional[float] = None,
-                                   max_questions: int = 5) -> List[Dict]:
+                                   max_questions: int = 5,
+                                   mmr_lambda: Optional[float] = None,
+                                   exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+                                   repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS) -> List[Dict]:
         """
         Retrieve questions with adaptive difficulty
         
@@ -119,60 +292,113 @@ class QuestionRetriever:
             candidate_id: Candidate identifier
             last_score: Score from last question (0-1)
             max_questions: Number of questions to return
+            mmr_lambda: Optional MMR re-ranking (see retrieve_questions)
+            exclude_seen: Skip questions the candidate already answered
+            repeat_cooldown_days: See retrieve_questions
         
         Returns:
             List of questions adapted to performance
         """
         # Determine difficulty based on last score
-        if last_score is None:
-            difficulty = 'medium'  # Start with medium
-        elif last_score >= 0.8:
-            difficulty = 'hard'  # Increase difficulty
-        elif last_score >= 0.5:
-            difficulty = 'medium'  # Keep same
-        else:
-            difficulty = 'easy'  # Decrease difficulty
+        difficulty = difficulty_for_score(last_score)
         
-        print(f"🎯 Adaptive retrieval - difficulty: {difficulty}")
+        logger.debug("Adaptive retrieval",
+                     extra={'candidate_id': candidate_id, 'difficulty': difficulty})
         
         return self.retrieve_questions(
             candidate_id=candidate_id,
             max_questions=max_questions,
-            difficulty=difficulty
+            difficulty=difficulty,
+            mmr_lambda=mmr_lambda,
+            exclude_seen=exclude_seen,
+            repeat_cooldown_days=repeat_cooldown_days
         )
     
     def get_diverse_questions(self, candidate_id: str,
-                            questions_per_category: int = 3) -> List[Dict]:
+                            questions_per_category: int = 3,
+                            group_by: str = 'category',
+                            min_similarity: float = SIMILARITY_THRESHOLD,
+                            mmr_lambda: Optional[float] = None,
+                            exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+                            repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS,
+                            max_groups: Optional[int] = DIVERSITY_MAX_GROUPS) -> List[Dict]:
         """
-        Get diverse questions across categories
+        Get diverse questions across categories (or another grouping key)
+        
+        Similarities are computed once and the top questions of the
+        best-matching groups are selected from that single score vector.
         
         Args:
             candidate_id: Candidate identifier
-            questions_per_category: Questions per category
+            questions_per_category: Questions per group
+            group_by: 'category' | 'difficulty' | 'topic' | 'job_role'
+            min_similarity: Minimum similarity threshold
+            mmr_lambda: Optional MMR re-ranking within each group
+            exclude_seen: Skip questions the candidate already answered
+            repeat_cooldown_days: See retrieve_questions
+            max_groups: Fill at most this many groups, ranked by their best
+                match (None = every group)
         
         Returns:
-            Diversified question set
+            Diversified question set, grouped in order
         """
-        categories = ['technical', 'behavioral', 'situational']
-        all_questions = []
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"group_by must be one of {list(GROUP_FIELDS)}")
+        if max_groups is not None and max_groups < 1:
+            raise ValueError(f"max_groups must be at least 1, got {max_groups}")
+        self._check_mmr_lambda(mmr_lambda)
+        stages = StageTimer(RETRIEVAL_STAGE_SECONDS, method='get_diverse_questions')
+        
+        profile_vector = self._get_profile_vector(candidate_id)
+        stages.lap('profile_fetch')
+        if profile_vector is None:
+            return []
         
-        for cat in categories:
-            questions = self.retrieve_questions(
-                candidate_id=candidate_id,
-                max_questions=questions_per_category,
-                category=cat
-            )
-            all_questions.extend(questions)
+        index = self._load_questions()
+        stages.lap('index_load')
+        similarities = index.scores(profile_vector)
+        stages.lap('scoring')
+        mask = self.unseen_mask(index, candidate_id, exclude_seen, repeat_cooldown_days)
+        stages.lap('filter')
+        
+        group_values = DIVERSITY_GROUPS.get(group_by)
+        selected = index.group_top_k(similarities, group_by,
+                                     questions_per_category,
+                                     min_score=min_similarity,
+                                     group_values=group_values,
+                                     mask=mask,
+                                     mmr_lambda=mmr_lambda,
+                                     max_groups=max_groups)
+        
+        # Fixed group orders are kept, other keys list the best groups first
+        groups = list(selected)
+        if group_values is not None:
+            groups.sort(key=group_values.index)
+        
+        all_questions = []
+        for value in groups:
+            for row, score in selected[value]:
+                question = index.question(row, score)
+                question['diversity_group'] = value
+                all_questions.append(question)
+        stages.lap('top_k')
         
-        print(f"✅ Retrieved {len(all_questions)} diverse questions")
+        logger.debug("Retrieved diverse questions",
+                     extra={'candidate_id': candidate_id, 'count': len(all_questions)})
         return all_questions
     
-    def get_question_recommendations(self, candidate_id: str) -> Dict:
+    def get_question_recommendations(self, candidate_id: str,
+                                     mmr_lambda: Optional[float] = None,
+                                     exclude_seen: bool = EXCLUDE_SEEN_QUESTIONS,
+                                     repeat_cooldown_days: Optional[float] = REPEAT_COOLDOWN_DAYS) -> Dict:
         """
         Get question recommendations with explanations
         
         Args:
             candidate_id: Candidate identifier
+            mmr_lambda: Optional MMR re-ranking (see retrieve_questions)
+            exclude_seen: Skip questions the candidate already answered
+            repeat_cooldown_days: See retrieve_questions
         
         Returns:
             Recommendations dict
@@ -184,7 +410,10 @@ class QuestionRetriever:
         metadata = profile['metadata']
         
         # Get questions
-        questions = self.retrieve_questions(candidate_id, max_questions=10)
+        questions = self.retrieve_questions(candidate_id, max_questions=10,
+                                            mmr_lambda=mmr_lambda,
+                                            exclude_seen=exclude_seen,
+                                            repeat_cooldown_days=repeat_cooldown_days)
         
         # Analyze recommendations
         recommended_topics = {}
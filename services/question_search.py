@@ -0,0 +1,152 @@
+"""
+Question Search - Person D
+Text search over the question bank: FTS5 BM25 fused with embedding similarity
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from utils.embedding_service import embedding_service
+from utils.metrics import StageTimer, RETRIEVAL_STAGE_SECONDS
+from config import SEARCH_CANDIDATES, SEARCH_RRF_K, SEARCH_MAX_RESULTS
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ('hybrid', 'lexical', 'semantic')
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+# Dropped from the lexical query (they match most of the bank and only slow
+# BM25 down); the semantic side still sees the full text
+STOPWORDS = frozenset('''
+    a an and are as at be by can describe do does for from how i if in is it
+    me of on or should tell that the this to was what when where which who
+    why with would you your
+'''.split())
+
+
+def build_match(query: str, any_term: bool = False) -> Optional[str]:
+    """
+    FTS5 MATCH expression for free text
+
+    Every term is quoted (so user input cannot inject FTS5 syntax) and the
+    last one matches as a prefix, for search-as-you-type.
+
+    Args:
+        query: User text
+        any_term: OR the terms instead of requiring all of them
+
+    Returns:
+        Expression, or None if the text has no searchable terms
+    """
+    tokens = _TOKEN_PATTERN.findall(query.lower())
+    terms = [t for t in tokens if t not in STOPWORDS] or tokens
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return (' OR ' if any_term else ' ').join(quoted)
+
+
+class QuestionSearch:
+    """Search questions by text (uses the retriever's question index)"""
+
+    def __init__(self, retriever):
+        self.retriever = retriever
+        self.db = retriever.db
+
+    def lexical_matches(self, query: str, limit: int,
+                        category: Optional[str] = None,
+                        difficulty: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        BM25 matches, all-terms first, topped up with any-term matches
+
+        Returns:
+            List of (question_id, relevance)
+        """
+        match = build_match(query)
+        if match is None:
+            return []
+        results = self.db.search_questions_text(match, limit, category, difficulty)
+
+        any_match = build_match(query, any_term=True)
+        if len(results) < limit and any_match != match:
+            found = {qid for qid, _ in results}
+            for qid, relevance in self.db.search_questions_text(any_match, limit,
+                                                                category, difficulty):
+                if qid not in found and len(results) < limit:
+                    results.append((qid, relevance))
+        return results
+
+    def search(self, query: str, limit: int = 10, mode: str = 'hybrid',
+               category: Optional[str] = None,
+               difficulty: Optional[str] = None) -> List[Dict]:
+        """
+        Search the question bank
+
+        Hybrid mode ranks the top SEARCH_CANDIDATES lexical (BM25) and
+        semantic (embedding) matches separately and fuses the two rankings
+        with reciprocal rank fusion, so a question that is strong in either
+        list, or fair in both, comes out on top.
+
+        Args:
+            query: Free text
+            limit: Number of results
+            mode: 'hybrid' | 'lexical' | 'semantic'
+            category: Optional category filter
+            difficulty: Optional difficulty filter
+
+        Returns:
+            Questions, best first, with similarity_score, search_score and
+            lexical_rank / semantic_rank (None when not in that list)
+        """
+        if not query or not query.strip():
+            raise ValueError("query must not be empty")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {list(SEARCH_MODES)}")
+        if not 1 <= limit <= SEARCH_MAX_RESULTS:
+            raise ValueError(f"limit must be between 1 and {SEARCH_MAX_RESULTS}")
+
+        stages = StageTimer(RETRIEVAL_STAGE_SECONDS, method='search_questions')
+        index = self.retriever._load_questions()
+        stages.lap('index_load')
+        pool = limit if mode != 'hybrid' else max(limit, SEARCH_CANDIDATES)
+
+        lexical_rows = []
+        if mode != 'semantic':
+            matches = self.lexical_matches(query, pool, category, difficulty)
+            # Questions newer than the index generation show up after its refresh
+            lexical_rows = [int(row) for row in index.rows_of([qid for qid, _ in matches])
+                            if row >= 0]
+            stages.lap('lexical')
+
+        similarities = None
+        semantic_rows = []
+        if mode != 'lexical':
+            similarities = index.scores(embedding_service.embed_text(query))
+            stages.lap('embed')
+            semantic_rows = [row for row, _ in index.top_k(
+                similarities, pool, mask=index.mask(difficulty=difficulty, category=category))]
+            stages.lap('semantic')
+
+        lexical_rank = {row: rank for rank, row in enumerate(lexical_rows, 1)}
+        semantic_rank = {row: rank for rank, row in enumerate(semantic_rows, 1)}
+        fused = {}
+        for ranks in (lexical_rank, semantic_rank):
+            for row, rank in ranks.items():
+                fused[row] = fused.get(row, 0.0) + 1.0 / (SEARCH_RRF_K + rank)
+        ranked = sorted(fused, key=fused.get, reverse=True)[:limit]
+
+        results = []
+        for row in ranked:
+            question = index.question(
+                row, float(similarities[row]) if similarities is not None else None)
+            question['search_score'] = round(fused[row], 6)
+            question['lexical_rank'] = lexical_rank.get(row)
+            question['semantic_rank'] = semantic_rank.get(row)
+            results.append(question)
+        stages.lap('fusion')
+
+        logger.debug("Searched questions", extra={'mode': mode, 'results': len(results),
+                                                  'lexical': len(lexical_rows),
+                                                  'semantic': len(semantic_rows)})
+        return results
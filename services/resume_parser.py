@@ -3,12 +3,15 @@ Resume Parser - Person A
 Extracts structured information from resume
 """
 
+import logging
 import re
 import spacy
 from typing import Dict, List
 import PyPDF2
 from io import BytesIO
 
+logger = logging.getLogger(__name__)
+
 class ResumeParser:
     """Parse resumes and extract structured data"""
     
@@ -17,7 +20,7 @@ class ResumeParser:
         try:
             self.nlp = spacy.load("en_core_web_sm")
         except OSError:
-            print("⚠️  Downloading spaCy model...")
+            logger.warning("Downloading spaCy model")
             import os
             os.system("python -m spacy download en_core_web_sm")
             self.nlp = spacy.load("en_core_web_sm")
@@ -55,7 +58,7 @@ class ResumeParser:
             
             return text
         except Exception as e:
-            print(f"❌ Error parsing PDF: {e}")
+            logger.error("Error parsing PDF", extra={'error': str(e)})
             return ""
     
     def extract_email(self, text: str) -> str:
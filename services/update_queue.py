@@ -0,0 +1,164 @@
+"""
+Profile Update Queue - Person B
+Background worker that recomputes candidate profiles off the request path
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from config import UPDATE_COALESCE_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+class ProfileUpdateQueue:
+    """Coalescing background queue for profile updates"""
+
+    def __init__(self, update_fn: Callable[[str], Optional[Dict]],
+                 coalesce_seconds: float = UPDATE_COALESCE_SECONDS):
+        """
+        Args:
+            update_fn: Called with a candidate_id to recompute the profile
+            coalesce_seconds: How long a job waits for more responses from
+                              the same candidate before it runs
+        """
+        self._update_fn = update_fn
+        self._coalesce_seconds = coalesce_seconds
+
+        # candidate_id -> time the oldest unprocessed response was queued
+        self._pending = OrderedDict()
+        self._in_flight = None
+        self._cond = threading.Condition()
+        self._worker = None
+
+        self._submitted = 0
+        self._coalesced = 0
+        self._processed = 0
+        self._failed = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run,
+                name='profile-update-worker',
+                daemon=True
+            )
+            self._worker.start()
+
+    def submit(self, candidate_id: str) -> bool:
+        """
+        Queue a profile update for candidate
+
+        Args:
+            candidate_id: Candidate identifier
+
+        Returns:
+            True if a new job was queued, False if merged into a pending one
+        """
+        with self._cond:
+            self._ensure_worker()
+            self._submitted += 1
+
+            if candidate_id in self._pending:
+                self._coalesced += 1
+                return False
+
+            self._pending[candidate_id] = time.monotonic()
+            self._cond.notify()
+            return True
+
+    def _next_job(self) -> str:
+        """Block until the oldest pending job is due, then claim it"""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+
+                candidate_id, queued_at = next(iter(self._pending.items()))
+                wait = queued_at + self._coalesce_seconds - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                del self._pending[candidate_id]
+                self._in_flight = candidate_id
+
+                lag = time.monotonic() - queued_at
+                self._last_lag = lag
+                self._max_lag = max(self._max_lag, lag)
+                return candidate_id
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            candidate_id = self._next_job()
+            try:
+                self._update_fn(candidate_id)
+                failed = False
+            except Exception:
+                logger.exception("Background profile update failed",
+                                 extra={'candidate_id': candidate_id})
+                failed = True
+
+            with self._cond:
+                self._in_flight = None
+                if failed:
+                    self._failed += 1
+                else:
+                    self._processed += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued update has been applied
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True if the queue drained before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            # Pending jobs become due immediately while flushing
+            saved_window = self._coalesce_seconds
+            self._coalesce_seconds = 0
+            self._cond.notify_all()
+            try:
+                while self._pending or self._in_flight is not None:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._coalesce_seconds = saved_window
+
+    def stats(self) -> Dict:
+        """
+        Queue depth and lag metrics
+
+        Returns:
+            Statistics dict
+        """
+        with self._cond:
+            now = time.monotonic()
+            oldest = next(iter(self._pending.values()), None)
+            return {
+                'queue_depth': len(self._pending),
+                'in_flight': 1 if self._in_flight is not None else 0,
+                'oldest_pending_seconds': round(now - oldest, 4) if oldest is not None else 0,
+                'last_lag_seconds': round(self._last_lag, 4),
+                'max_lag_seconds': round(self._max_lag, 4),
+                'submitted': self._submitted,
+                'coalesced': self._coalesced,
+                'processed': self._processed,
+                'failed': self._failed,
+                'worker_alive': self._worker is not None and self._worker.is_alive()
+            }
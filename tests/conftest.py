@@ -0,0 +1,32 @@
+"""
+Shared fixtures: a fresh database per test
+"""
+
+import pytest
+from database.init_db import init_database
+from database.operations import DatabaseManager
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """
+    Factory for an initialized database in tmp_path
+
+    Args (of the factory):
+        add_rows: Optional row maker, called with the DatabaseManager
+        name: Database file name
+    """
+    def make(add_rows=None, name='test.db'):
+        path = str(tmp_path / name)
+        init_database(path)
+        db = DatabaseManager(path)
+        if add_rows is not None:
+            add_rows(db)
+        return db
+    return make
+
+
+@pytest.fixture
+def db(request, make_db):
+    """Database filled by the test module's add_rows(db), empty if it has none"""
+    return make_db(getattr(request.module, 'add_rows', None))
@@ -0,0 +1,106 @@
+"""
+Candidate index: shared generations plus change-log tails match a fresh build
+"""
+
+import sqlite3
+import numpy as np
+import pytest
+from config import VECTOR_DIMENSION
+from services import candidate_matcher as matcher_module
+from services.candidate_index import CandidateIndex
+from services.candidate_matcher import CandidateMatcher
+
+LEVELS = ('junior', 'mid', 'senior')
+
+
+class Retriever:
+    def __init__(self, db):
+        self.db = db
+
+
+def profile(rng):
+    vector = rng.standard_normal(VECTOR_DIMENSION)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def add_rows(db):
+    rng = np.random.default_rng(0)
+    for i in range(300):
+        db.insert_candidate_profile(f'c{i}', profile(rng), {
+            'experience_level': LEVELS[i % 3], 'primary_domain': 'backend'})
+
+
+@pytest.fixture
+def small_tail(monkeypatch):
+    monkeypatch.setattr(matcher_module, 'CANDIDATE_INDEX_COMPACT_MIN_ROWS', 20)
+    monkeypatch.setattr(matcher_module, 'SHARED_CANDIDATE_INDEX', True)
+
+
+def refresh(matcher):
+    matcher._next_index_check = 0.0
+    matcher.refresh_index()
+
+
+def fresh_matches(db, candidate_id, **filters):
+    matcher = CandidateMatcher(Retriever(db))
+    matcher.index_store = None
+    return matcher.match(candidate_id=candidate_id, k=20, **filters)
+
+
+def test_upsert_appends_and_retires_the_old_row():
+    index = CandidateIndex(capacity=2)
+    first, second = np.eye(2, VECTOR_DIMENSION, dtype=np.float32)
+    index.upsert('a', first, {'experience_level': 'junior'}, 1)
+    index.upsert('a', second, {'experience_level': 'senior'}, 2)
+
+    assert index.size == 2 and len(index) == 1
+    assert index.live[:2].tolist() == [False, True]
+    # The retired row is untouched for queries that already selected it
+    assert index.candidate(0, 1.0)['experience_level'] == 'junior'
+    assert np.array_equal(index.vector('a'), second)
+    assert index.top_k(second, 5, index.mask()) == [(1, 1.0)]
+
+
+def test_workers_share_a_generation_and_see_updates(db, small_tail):
+    first, second = CandidateMatcher(Retriever(db)), CandidateMatcher(Retriever(db))
+    refresh(first)
+    refresh(second)
+    generation = first._index.generation
+    assert generation is not None and second._index.generation == generation
+    assert isinstance(first._index.base, np.memmap)
+
+    rng = np.random.default_rng(1)
+    for i in range(10):
+        db.update_profile_vector(f'c{i}', profile(rng), {
+            'experience_level': 'senior', 'primary_domain': 'data'})
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("DELETE FROM candidate_profiles WHERE candidate_id = 'c299'")
+    refresh(first)
+    refresh(second)
+
+    assert first._index.generation == generation  # below the compaction threshold
+    for matcher in (first, second):
+        assert matcher.match(candidate_id='c0', k=20) == fresh_matches(db, 'c0')
+        assert matcher.match(candidate_id='c5', k=20, primary_domain=['data']) == \
+            fresh_matches(db, 'c5', primary_domain=['data'])
+        assert 'c299' not in matcher._index.position
+
+
+def test_compaction_publishes_and_workers_reattach(db, small_tail):
+    first, second = CandidateMatcher(Retriever(db)), CandidateMatcher(Retriever(db))
+    refresh(first)
+    refresh(second)
+    generation = first._index.generation
+
+    rng = np.random.default_rng(2)
+    for i in range(40):
+        db.update_profile_vector(f'c{i}', profile(rng), {
+            'experience_level': 'mid', 'primary_domain': 'backend'})
+    refresh(first)
+    assert first._index.generation == generation + 1
+    assert first._index.tail_rows == 0 and first._index.dead_rows == 0
+
+    refresh(second)
+    assert second._index.generation == generation + 1
+    for matcher in (first, second):
+        assert matcher.match(candidate_id='c3', k=20) == fresh_matches(db, 'c3')
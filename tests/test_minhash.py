@@ -0,0 +1,122 @@
+"""
+Resume near-duplicates: MinHash signatures, LSH buckets and the checked insert
+"""
+
+import threading
+import time
+from functools import partial
+import numpy as np
+import pytest
+from config import VECTOR_DIMENSION, MINHASH_PERMUTATIONS, MINHASH_BANDS
+from services.profile_creator import ProfileCreator
+from utils import minhash
+
+RESUME = ' '.join(
+    f'Built service {i} in Python with Flask and PostgreSQL, cutting latency by {i * 3} percent.'
+    for i in range(40))
+
+
+def edited(text, every=25):
+    """The text with one word in `every` replaced"""
+    words = text.split()
+    return ' '.join('changed' if i % every == 0 else word for i, word in enumerate(words))
+
+
+def unit_vector(seed):
+    vector = np.random.default_rng(seed).standard_normal(VECTOR_DIMENSION)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+@pytest.fixture
+def creator(db):
+    creator = ProfileCreator()
+    creator.db = db
+    return creator
+
+
+def test_signature_is_deterministic():
+    first, second = minhash.signature(RESUME), minhash.signature(RESUME)
+    assert first.dtype == np.uint32 and len(first) == MINHASH_PERMUTATIONS
+    assert np.array_equal(first, second)
+    assert minhash.jaccard(first, second) == 1.0
+
+
+@pytest.mark.parametrize('text', ['', '   ', '... !!! ---'])
+def test_text_without_words_has_no_signature(text):
+    assert minhash.signature(text) is None
+
+
+def test_jaccard_tracks_similarity():
+    original = minhash.signature(RESUME)
+    near = minhash.signature(edited(RESUME))
+    other = minhash.signature(' '.join(f'Taught course {i} on medieval history.' for i in range(40)))
+    assert minhash.jaccard(original, near) > 0.6
+    assert minhash.jaccard(original, other) < 0.1
+
+
+def test_near_duplicates_share_a_bucket():
+    original = minhash.band_buckets(minhash.signature(RESUME))
+    near = minhash.band_buckets(minhash.signature(edited(RESUME)))
+    assert len(original) == MINHASH_BANDS
+    assert set(enumerate(original)) & set(enumerate(near))
+
+
+def test_bytes_round_trip():
+    sig = minhash.signature(RESUME)
+    assert np.array_equal(minhash.from_bytes(minhash.to_bytes(sig)), sig)
+    assert len(minhash.to_bytes(sig)) == 4 * MINHASH_PERMUTATIONS
+
+
+def test_saved_signature_is_found_and_replaced(db):
+    sig = minhash.signature(RESUME)
+    db.insert_candidate_profile('a', unit_vector(0), {})
+    db.save_resume_signature('a', sig)
+
+    found = db.get_resume_lsh_candidates(minhash.signature(edited(RESUME)))
+    assert list(found) == ['a']
+    assert np.array_equal(found['a']['signature'], sig)
+    assert np.allclose(found['a']['profile_vector'], unit_vector(0))
+
+    # Re-saving drops the old buckets
+    other = minhash.signature('A completely different resume about gardening and bees.')
+    db.save_resume_signature('a', other)
+    assert db.get_resume_lsh_candidates(sig) == {}
+    assert list(db.get_resume_lsh_candidates(other)) == ['a']
+
+
+def test_checked_insert_rejects_duplicates(db, creator):
+    sig, vector = minhash.signature(RESUME), unit_vector(0)
+    check = partial(creator.find_duplicates, sig, vector, None)
+    assert db.create_candidate('a', {'raw_text': RESUME}, vector, {}, sig, check) == []
+
+    duplicates = db.create_candidate('b', {'raw_text': RESUME}, vector, {}, sig, check)
+    assert [d['candidate_id'] for d in duplicates] == ['a']
+    assert db.get_candidate_profile('b') is None and db.get_parsed_resume('b') is None
+
+    # A different profile vector is not a duplicate even for the same text
+    assert db.create_candidate('c', {'raw_text': RESUME}, unit_vector(1), {}, sig,
+                               partial(creator.find_duplicates, sig, unit_vector(1), None)) == []
+
+
+def test_concurrent_uploads_of_one_resume_save_one(db, creator):
+    sig, vector = minhash.signature(RESUME), unit_vector(0)
+    results = {}
+
+    def check(stored):
+        time.sleep(0.2)  # The other upload starts while this one is checking
+        return creator.find_duplicates(sig, vector, None, stored)
+
+    def upload(candidate_id):
+        results[candidate_id] = db.create_candidate(
+            candidate_id, {'raw_text': RESUME}, vector, {}, sig, check)
+
+    threads = [threading.Thread(target=upload, args=(cid,)) for cid in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert sorted(len(duplicates) for duplicates in results.values()) == [0, 1]
+    saved = [cid for cid in ('a', 'b') if db.get_candidate_profile(cid) is not None]
+    assert len(saved) == 1
@@ -0,0 +1,86 @@
+"""
+Query stats: waits for another connection's lock are not reported as slow plans
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from database.query_stats import QueryStats, TimedConnection, lock_bound
+import database.query_stats as query_stats_module
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = QueryStats(slow_ms=20)
+    monkeypatch.setattr(query_stats_module, 'query_stats', stats)
+    return stats
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, score REAL)')
+    conn.executemany('INSERT INTO items (name, score) VALUES (?, ?)',
+                     [(f'item {i}', i) for i in range(200)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def hold_write_lock(path, seconds):
+    """Keep an exclusive lock for a while from another thread"""
+    locked = threading.Event()
+
+    def run():
+        conn = sqlite3.connect(path)
+        conn.execute('BEGIN EXCLUSIVE')
+        locked.set()
+        time.sleep(seconds)
+        conn.commit()
+        conn.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    locked.wait()
+    return thread
+
+
+@pytest.mark.parametrize('plan, expected', [
+    ([], True),
+    (['SEARCH items USING INTEGER PRIMARY KEY (rowid=?)'], True),
+    (['SCAN items'], False),
+    (['SEARCH items USING INTEGER PRIMARY KEY (rowid=?)', 'USE TEMP B-TREE FOR ORDER BY'], False),
+    (None, False),
+])
+def test_lock_bound(plan, expected):
+    assert lock_bound(plan) is expected
+
+
+@pytest.mark.parametrize('sql, parameters', [
+    ('SELECT name FROM items WHERE id = ?', (5,)),
+    ('INSERT INTO items (name, score) VALUES (?, ?)', ('new', 1.0)),
+    ('UPDATE items SET score = ? WHERE id = ?', (2.0, 5)),
+])
+def test_lock_wait_is_counted_not_logged(stats, path, sql, parameters):
+    conn = sqlite3.connect(path, factory=TimedConnection)
+    thread = hold_write_lock(path, 0.1)
+    conn.execute(sql, parameters).fetchall()
+    conn.commit()
+    thread.join()
+    summary = stats.summary()
+    assert summary['slow_queries'] == []
+    assert summary['statements'][0]['lock_waits'] == 1
+    assert summary['lock_wait_ms'] >= 50
+
+
+def test_slow_scan_is_logged_with_plan(stats, path):
+    conn = sqlite3.connect(path, factory=TimedConnection)
+    thread = hold_write_lock(path, 0.1)
+    conn.execute('SELECT name FROM items WHERE score > ? ORDER BY name', (10,)).fetchall()
+    thread.join()
+    summary = stats.summary()
+    slow, = summary['slow_queries']
+    assert any(line.startswith('SCAN items') for line in slow['plan'])
+    assert summary['statements'][0]['lock_waits'] == 0
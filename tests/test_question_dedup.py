@@ -0,0 +1,138 @@
+"""
+Question dedup: the blocked join finds what the exact join finds, and
+imports resolve duplicate chains
+"""
+
+import numpy as np
+import pytest
+from config import VECTOR_DIMENSION
+from services import question_dedup, question_manager
+from services.question_dedup import find_duplicates
+from services.question_index import QuestionIndex, columns_from_database
+from services.question_manager import QuestionManager
+
+SIMILAR = 0.95  # Planted duplicates: above QUESTION_DUPLICATE_SIMILARITY, twice removed is below
+
+
+def orthonormal(rng, count):
+    """count orthonormal rows"""
+    q, _ = np.linalg.qr(rng.standard_normal((VECTOR_DIMENSION, count)))
+    return q.T.astype(np.float32)
+
+
+def near(vector, direction, similarity=SIMILAR):
+    """Unit vector at `similarity` to vector, moved towards an orthogonal direction"""
+    return similarity * vector + np.sqrt(1 - similarity ** 2) * direction
+
+
+def random_unit(rng, count):
+    vectors = rng.standard_normal((count, VECTOR_DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def planted_batch(rng, bank, count=400):
+    """Random questions, a quarter near bank rows and an eighth near earlier batch rows"""
+    embeddings = random_unit(rng, count)
+    directions = random_unit(rng, count)
+    for i in range(0, count, 4):
+        embeddings[i] = near(bank[rng.integers(len(bank))], directions[i])
+    for i in range(10, count, 8):
+        embeddings[i] = near(embeddings[rng.integers(i)], directions[i])
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def test_blocked_join_matches_the_exact_join(monkeypatch):
+    rng = np.random.default_rng(0)
+    bank = random_unit(rng, 3000)
+    embeddings = planted_batch(rng, bank)
+
+    exact = find_duplicates(embeddings, bank)
+    monkeypatch.setattr(question_dedup, 'QUESTION_DEDUP_EXACT_MAX_PAIRS', 100)
+    blocked = find_duplicates(embeddings, bank)
+
+    assert sum(match is not None for match in exact) >= 140
+    assert sum('batch_index' in match for match in exact if match) >= 40
+    for exact_match, blocked_match in zip(exact, blocked):
+        if exact_match is None:
+            assert blocked_match is None
+            continue
+        assert blocked_match is not None
+        assert blocked_match.keys() == exact_match.keys()
+        key = 'bank_row' if 'bank_row' in exact_match else 'batch_index'
+        assert blocked_match[key] == exact_match[key]
+        assert blocked_match['similarity'] == pytest.approx(exact_match['similarity'], abs=1e-5)
+
+
+def test_blocked_self_join_without_a_bank(monkeypatch):
+    rng = np.random.default_rng(1)
+    embeddings = planted_batch(rng, random_unit(rng, 50))
+
+    exact = find_duplicates(embeddings, None)
+    monkeypatch.setattr(question_dedup, 'QUESTION_DEDUP_EXACT_MAX_PAIRS', 100)
+    blocked = find_duplicates(embeddings, None)
+
+    assert sum(match is not None for match in exact) >= 40
+    assert [m and m['batch_index'] for m in blocked] == [m and m['batch_index'] for m in exact]
+
+
+class Retriever:
+    def __init__(self, db):
+        self.db = db
+
+    def current_index(self):
+        return QuestionIndex.from_columns(*columns_from_database(self.db))
+
+
+def question(text, embedding=None):
+    q = {'question_text': text, 'category': 'technical', 'difficulty': 'easy',
+         'topics': [], 'job_roles': []}
+    if embedding is not None:
+        q['embedding'] = embedding.tolist()
+    return q
+
+
+@pytest.fixture
+def chains(db, monkeypatch):
+    """
+    Importer plus a batch with duplicate chains:
+
+    1 is near 0 and 2 is near 1 (but not 0); 3 is near the bank question
+    and 4 is near 3 (but not the bank question); 5 is new.
+    """
+    u, a, b, c, d, e, f, g = orthonormal(np.random.default_rng(2), 8)
+    bank_id = db.insert_question(question('bank', u))
+    db.insert_question(question('other', g))
+
+    vectors = [a, near(a, b), near(near(a, b), c), near(u, d), near(near(u, d), e), f]
+    texts = [f'question {i}' for i in range(len(vectors))]
+    embeddings = dict(zip(texts, (v.tolist() for v in vectors)))
+    monkeypatch.setattr(question_manager.embedding_service, 'embed_batch',
+                        lambda batch: [embeddings[text] for text in batch])
+
+    manager = QuestionManager(Retriever(db))
+    manager.db = db
+    return manager, texts, bank_id
+
+
+def test_skip_resolves_chains_to_the_first_question(chains):
+    manager, texts, bank_id = chains
+    report = manager.import_questions([question(text) for text in texts], on_duplicate='skip')
+
+    ids = report['question_ids']
+    assert report['inserted'] == 2 and report['skipped'] == 4
+    assert ids[1] == ids[2] == ids[0] and ids[3] == ids[4] == bank_id
+    assert len({ids[0], ids[5], bank_id}) == 3
+    assert [(d['index'], d['source'], d['duplicate_of']) for d in report['duplicates']] == [
+        (1, 'batch', ids[0]), (2, 'batch', ids[0]), (3, 'bank', bank_id), (4, 'batch', bank_id)]
+    assert manager.db.get_question_by_id(ids[2]) is not None
+
+
+def test_flag_inserts_and_points_at_the_nearest_question(chains):
+    manager, texts, bank_id = chains
+    report = manager.import_questions([question(text) for text in texts], on_duplicate='flag')
+
+    ids = report['question_ids']
+    assert report['inserted'] == 6 and report['skipped'] == 0
+    assert len(set(ids)) == 6 and bank_id not in ids
+    assert [(d['index'], d['source'], d['duplicate_of']) for d in report['duplicates']] == [
+        (1, 'batch', ids[0]), (2, 'batch', ids[1]), (3, 'bank', bank_id), (4, 'batch', ids[3])]
@@ -0,0 +1,223 @@
+"""
+Question index: incremental generations must equal a full rebuild
+"""
+
+import json
+import time
+import numpy as np
+import pytest
+from config import VECTOR_DIMENSION
+from services.index_store import QuestionIndexStore
+from services.question_index import QuestionIndex, columns_from_database, STRING_COLUMNS
+
+CATEGORIES = ('technical', 'behavioral')  # 'situational' first appears in an update
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def make_question(rng, i, category=None):
+    embedding = rng.standard_normal(VECTOR_DIMENSION)
+    return {
+        'question_text': f'Question {i}: explain topic {i % 7}',
+        'category': category or CATEGORIES[i % 2],
+        'difficulty': DIFFICULTIES[i % 3],
+        'topics': [f'topic-{i % 7}'],
+        'job_roles': ['engineer'] if i % 2 else [],
+        'embedding': (embedding / np.linalg.norm(embedding)).tolist(),
+        'ideal_keywords': [f'kw{i}']
+    }
+
+
+def add_rows(db):
+    rng = np.random.default_rng(0)
+    for i in range(60):
+        db.insert_question(make_question(rng, i))
+
+
+def by_question_id(index: QuestionIndex):
+    """Every row as comparable values, keyed by question_id (row order may differ)"""
+    rows = {}
+    for row, question in enumerate(index.iter_questions()):
+        question['ordinal'] = int(index.ordinals[row])
+        rows[question['question_id']] = question
+    return rows
+
+
+def assert_same_index(actual: QuestionIndex, expected: QuestionIndex):
+    assert len(actual) == len(expected)
+    assert by_question_id(actual) == by_question_id(expected)
+    # The id lookup resolves every id to its own row, and nothing else
+    ids = list(actual.columns['question_id'])
+    assert actual.rows_of(ids).tolist() == list(range(len(ids)))
+    assert actual.row_of('no-such-question') is None
+
+
+def execute(db, sql, params=()):
+    conn = db.get_connection()
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def refresh(store, db):
+    """Publish pending changes; returns the generation and whether it was incremental"""
+    meta = store.current()
+    versions = db.get_change_versions(['questions'])
+    incremental = store._apply_changes(db, meta, versions, db.get_question_change_seq()) is not None
+    return store.refresh(db), incremental
+
+
+def full_index(db):
+    return QuestionIndex.from_columns(*columns_from_database(db))
+
+
+def test_incremental_matches_full_rebuild(db, tmp_path):
+    store = QuestionIndexStore(str(tmp_path / 'index'))
+    store.refresh(db)
+    assert_same_index(store.load(), full_index(db))
+
+    rng = np.random.default_rng(1)
+    ids = [q['question_id'] for q in db.get_all_questions()]
+
+    # Insert, including a category the current generation has never seen
+    for i in range(100, 105):
+        db.insert_question(make_question(rng, i))
+    db.insert_question(make_question(rng, 105, category='situational'))
+    generation, incremental = refresh(store, db)
+    assert incremental
+    assert_same_index(store.load(generation), full_index(db))
+
+    # Update text, metadata and embedding
+    changed = make_question(rng, 200)
+    execute(db, '''
+        UPDATE questions SET question_text = ?, difficulty = ?, topics = ?, embedding = ?
+        WHERE question_id = ?
+    ''', (changed['question_text'], 'hard', json.dumps(['updated']),
+          json.dumps(changed['embedding']), ids[3]))
+    execute(db, "UPDATE questions SET ideal_keywords = '[]' WHERE question_id = ?", (ids[40],))
+    generation, incremental = refresh(store, db)
+    assert incremental
+    assert_same_index(store.load(generation), full_index(db))
+
+    # Delete first, middle and last rows of the generation
+    for question_id in (ids[0], ids[30], ids[-1]):
+        execute(db, 'DELETE FROM questions WHERE question_id = ?', (question_id,))
+    generation, incremental = refresh(store, db)
+    assert incremental
+    index = store.load(generation)
+    assert_same_index(index, full_index(db))
+    assert index.row_of(ids[30]) is None
+
+    # Mixed batch: a question inserted, updated and deleted between refreshes
+    new_id = db.insert_question(make_question(rng, 300))
+    execute(db, "UPDATE questions SET category = 'behavioral' WHERE question_id = ?", (new_id,))
+    execute(db, 'DELETE FROM questions WHERE question_id = ?', (new_id,))
+    execute(db, "UPDATE questions SET category = 'situational' WHERE question_id = ?", (ids[5],))
+    db.insert_question(make_question(rng, 301))
+    generation, incremental = refresh(store, db)
+    assert incremental
+    assert_same_index(store.load(generation), full_index(db))
+
+
+def test_incremental_to_empty_and_back(db, tmp_path):
+    store = QuestionIndexStore(str(tmp_path / 'index'))
+    store.refresh(db)
+
+    execute(db, 'DELETE FROM questions')
+    generation, incremental = refresh(store, db)
+    assert incremental
+    index = store.load(generation)
+    assert len(index) == 0
+    assert all(len(index.columns[name]) == 0 for name in STRING_COLUMNS)
+
+    db.insert_question(make_question(np.random.default_rng(2), 1))
+    generation, incremental = refresh(store, db)
+    assert incremental
+    assert_same_index(store.load(generation), full_index(db))
+
+
+def test_stale_generation_is_patched_on_warm_start(db, tmp_path):
+    directory = str(tmp_path / 'index')
+    QuestionIndexStore(directory).refresh(db)
+    db.insert_question(make_question(np.random.default_rng(3), 500))
+
+    # A new process attaching to the persisted store sees the stale generation
+    store = QuestionIndexStore(directory)
+    generation, incremental = refresh(store, db)
+    assert incremental
+    assert_same_index(store.load(generation), full_index(db))
+
+
+def test_question_changes_range_and_pruning(db):
+    start = db.get_question_change_seq()
+    rng = np.random.default_rng(4)
+    first = db.insert_question(make_question(rng, 600))
+    middle = db.get_question_change_seq()
+    second = db.insert_question(make_question(rng, 601))
+    execute(db, "UPDATE questions SET difficulty = 'hard' WHERE question_id = ?", (first,))
+    end = db.get_question_change_seq()
+
+    changed, complete = db.get_question_changes(start, end)
+    assert complete and sorted(changed) == sorted([first, second])
+    changed, complete = db.get_question_changes(middle, end)
+    assert complete and sorted(changed) == sorted([first, second])
+    assert db.get_question_changes(end, end) == ([], True)
+
+    # Entries folded into a published generation are gone: older readers must rebuild
+    db.prune_question_changes(middle)
+    assert db.get_question_changes(start, end)[1] is False
+    assert db.get_question_changes(middle, end)[1] is True
+
+
+def test_bounded_refresh_keeps_the_current_generation(db, tmp_path):
+    store = QuestionIndexStore(str(tmp_path / 'index'))
+    generation = store.refresh(db)
+    db.insert_question(make_question(np.random.default_rng(5), 700))
+
+    # Another process holds the refresh lock: give up after the timeout
+    started = time.monotonic()
+    with store._refresh_lock(blocking=True):
+        assert store.refresh(db, wait=True, timeout=0.2) == generation
+    assert time.monotonic() - started < 2
+
+    # The log no longer reaches the generation: only a full rebuild would do
+    db.prune_question_changes(db.get_question_change_seq())
+    assert store.refresh(db, full=False) == generation
+    assert store.refresh(db) == generation + 1
+    assert_same_index(store.load(), full_index(db))
+
+
+def test_group_top_k_fills_only_the_best_groups(db):
+    index = full_index(db)
+    scores = np.random.default_rng(6).random(len(index)).astype(np.float32)
+    groups = index.groups('topic')
+    best = {value: scores[rows].max() for value, rows in groups.items()}
+    ranked = sorted(best, key=best.get, reverse=True)
+
+    selected = index.group_top_k(scores, 'topic', 2, max_groups=3)
+    assert list(selected) == ranked[:3]
+    for value, top in selected.items():
+        rows = groups[value][np.argsort(-scores[groups[value]])[:2]]
+        assert [row for row, _ in top] == rows.tolist()
+
+    # Groups without an eligible row are never filled
+    cutoff = best[ranked[1]]
+    assert list(index.group_top_k(scores, 'topic', 2, min_score=cutoff)) == ranked[:2]
+    assert index.group_top_k(scores, 'topic', 2, max_groups=0) == {}
+
+
+def test_shared_question_goes_to_the_group_where_it_ranks_highest(db):
+    rng = np.random.default_rng(7)
+    ids = []
+    for i, topics in enumerate((['alpha'], ['alpha', 'beta'])):
+        question = make_question(rng, 800 + i)
+        question['topics'] = topics
+        ids.append(db.insert_question(question))
+    index = full_index(db)
+    leader, shared = index.rows_of(ids).tolist()
+    scores = np.zeros(len(index), dtype=np.float32)
+    scores[[leader, shared]] = [0.9, 0.8]
+
+    # 'alpha' ranks first but the shared question is only its second pick
+    selected = index.group_top_k(scores, 'topic', 2, min_score=0.5)
+    assert selected == {'alpha': [(leader, pytest.approx(0.9))],
+                        'beta': [(shared, pytest.approx(0.8))]}
@@ -0,0 +1,166 @@
+"""
+Question search: MATCH expressions, FTS triggers and reciprocal rank fusion
+"""
+
+import pytest
+from config import SEARCH_RRF_K, VECTOR_DIMENSION
+from services.question_index import QuestionIndex, columns_from_database
+from services.question_search import QuestionSearch, build_match
+from utils.embedding_service import EmbeddingService, embedding_service
+
+QUESTIONS = [
+    ('How would you scale a PostgreSQL database under heavy write load?',
+     ['postgresql', 'scaling'], ['sharding', 'replication']),
+    ('Explain how Kubernetes schedules pods onto nodes.',
+     ['kubernetes'], ['scheduler', 'taints']),
+    ('Tell me about a time you resolved a conflict within your team.',
+     ['teamwork'], ['conflict', 'communication']),
+    ('Describe how you would design a rate limiter for a public API.',
+     ['system-design'], ['token bucket', 'redis']),
+    ('What is the difference between a process and a thread?',
+     ['operating-systems'], ['memory', 'scheduling']),
+    ('How do you prioritise work when every deadline is urgent?',
+     ['prioritisation'], ['deadlines', 'stakeholders']),
+]
+
+
+class Retriever:
+    def __init__(self, db):
+        self.db = db
+
+    def _load_questions(self):
+        return QuestionIndex.from_columns(*columns_from_database(self.db))
+
+
+@pytest.fixture(autouse=True)
+def hashing_embeddings(monkeypatch):
+    monkeypatch.setattr(EmbeddingService, 'backend', 'hashing')
+
+
+def add_rows(db):
+    for text, topics, keywords in QUESTIONS:
+        db.insert_question({
+            'question_text': text, 'category': 'technical', 'difficulty': 'medium',
+            'topics': topics, 'job_roles': [], 'ideal_keywords': keywords,
+            'embedding': embedding_service.embed_text(text)
+        })
+
+
+def execute(db, sql, params=()):
+    conn = db.get_connection()
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+def search_ids(db, query):
+    return [qid for qid, _ in db.search_questions_text(build_match(query), 10)]
+
+
+def question_id(db, text):
+    conn = db.get_connection()
+    row = conn.execute('SELECT question_id FROM questions WHERE question_text = ?',
+                       (text,)).fetchone()
+    conn.close()
+    return row['question_id']
+
+
+def assert_fts_consistent(db):
+    """FTS5 compares its index against the questions table (raises if stale)"""
+    execute(db, "INSERT INTO questions_fts (questions_fts, rank) VALUES ('integrity-check', 1)")
+
+
+@pytest.mark.parametrize('query, any_term, expected', [
+    ('How would you scale Postgres?', False, '"scale" "postgres"*'),
+    ('scale postgres', True, '"scale" OR "postgres"*'),
+    # Only stopwords: search them rather than nothing
+    ('What is it?', False, '"what" "is" "it"*'),
+    # FTS5 syntax is quoted away
+    ('NEAR(kubernetes "pods") OR sched*', False, '"near" "kubernetes" "pods" "sched"*'),
+    ('... !!! ---', False, None),
+    ('', False, None),
+])
+def test_build_match(query, any_term, expected):
+    assert build_match(query, any_term) == expected
+
+
+@pytest.mark.parametrize('query', ['NEAR(kubernetes "pods") OR sched*', 'What is it?', 'sched'])
+def test_match_expressions_are_valid_fts5(db, query):
+    db.search_questions_text(build_match(query), 10)
+
+
+def test_triggers_keep_the_index_current(db):
+    text = QUESTIONS[1][0]
+    kubernetes = question_id(db, text)
+    assert search_ids(db, 'kubernetes') == [kubernetes]
+    assert search_ids(db, 'taints') == [kubernetes]
+
+    # Inserted questions are searchable at once
+    new_id = db.insert_question({
+        'question_text': 'How does Kafka guarantee message ordering?', 'category': 'technical',
+        'difficulty': 'hard', 'topics': ['kafka'], 'job_roles': [],
+        'embedding': [0.0] * VECTOR_DIMENSION, 'ideal_keywords': ['partitions']})
+    assert search_ids(db, 'kafka ordering') == [new_id]
+    assert search_ids(db, 'partitions') == [new_id]
+
+    # A text update re-indexes: the old terms stop matching, the new ones match
+    execute(db, 'UPDATE questions SET question_text = ?, topics = ? WHERE question_id = ?',
+            ('Explain how Nomad places jobs onto clients.', '["nomad"]', kubernetes))
+    assert search_ids(db, 'kubernetes') == []
+    assert search_ids(db, 'nomad clients') == [kubernetes]
+    assert search_ids(db, 'taints') == [kubernetes]
+    assert_fts_consistent(db)
+
+    # Other columns do not touch the index
+    execute(db, "UPDATE questions SET difficulty = 'hard', embedding = '[]' WHERE question_id = ?",
+            (kubernetes,))
+    assert search_ids(db, 'nomad') == [kubernetes]
+    assert_fts_consistent(db)
+
+    execute(db, 'DELETE FROM questions WHERE question_id = ?', (kubernetes,))
+    assert search_ids(db, 'nomad') == []
+    assert search_ids(db, 'taints') == []
+    assert_fts_consistent(db)
+
+
+def test_all_terms_first_then_any_term(db):
+    search = QuestionSearch(Retriever(db))
+    postgres = question_id(db, QUESTIONS[0][0])
+    matches = search.lexical_matches('scale postgresql kubernetes', 10)
+    # No question has every term: the any-term top-up finds both halves
+    assert {qid for qid, _ in matches} == {postgres, question_id(db, QUESTIONS[1][0])}
+    assert [qid for qid, _ in search.lexical_matches('scale postgresql', 10)] == [postgres]
+
+
+def test_hybrid_fuses_the_two_rankings(db):
+    search = QuestionSearch(Retriever(db))
+    query = 'how would you scale a database with replication'
+    limit = len(QUESTIONS)
+    lexical = [q['question_id'] for q in search.search(query, limit, mode='lexical')]
+    semantic = [q['question_id'] for q in search.search(query, limit, mode='semantic')]
+    assert lexical and len(semantic) == limit
+
+    expected = {}
+    for ranking in (lexical, semantic):
+        for rank, qid in enumerate(ranking, 1):
+            expected[qid] = expected.get(qid, 0.0) + 1.0 / (SEARCH_RRF_K + rank)
+
+    results = search.search(query, limit, mode='hybrid')
+    assert {q['question_id'] for q in results} == set(expected)
+    scores = [q['search_score'] for q in results]
+    assert scores == sorted(scores, reverse=True)
+    for question in results:
+        qid = question['question_id']
+        assert question['search_score'] == pytest.approx(expected[qid], abs=1e-6)
+        assert question['lexical_rank'] == (lexical.index(qid) + 1 if qid in lexical else None)
+        assert question['semantic_rank'] == semantic.index(qid) + 1
+
+    # Strong in both lists beats strong in one
+    assert results[0]['question_id'] == question_id(db, QUESTIONS[0][0])
+
+
+@pytest.mark.parametrize('kwargs', [{'query': '  '}, {'query': 'x', 'mode': 'fuzzy'},
+                                    {'query': 'x', 'limit': 0}])
+def test_search_rejects_bad_arguments(db, kwargs):
+    with pytest.raises(ValueError):
+        QuestionSearch(Retriever(db)).search(**kwargs)
@@ -0,0 +1,96 @@
+"""
+Seen-sets: compact Bitset encoding and the incrementally maintained candidate_seen
+"""
+
+import numpy as np
+import pytest
+from config import VECTOR_DIMENSION
+from utils.bitset import Bitset
+
+
+def bitset(ids):
+    bits = Bitset()
+    bits.update(ids)
+    return bits
+
+
+@pytest.mark.parametrize('ids', [
+    [],
+    [0],
+    [7, 8],
+    [3, 1000, 70000],  # sparse: stored as a uint32 array
+    list(range(0, 4096, 2)),  # dense: stored as the bitmap
+    list(range(64)),
+    [2 ** 20 + 5],
+])
+def test_compact_round_trip(ids):
+    original = bitset(ids)
+    data = original.to_compact_bytes()
+    loaded = Bitset.from_compact_bytes(data)
+    assert loaded.ids().tolist() == sorted(set(ids))
+    assert len(loaded) == len(set(ids))
+    assert loaded.to_compact_bytes() == data
+
+
+def test_compact_picks_the_smaller_encoding():
+    sparse = bitset([5, 100000]).to_compact_bytes()
+    assert sparse[0] == 1 and len(sparse) == 1 + 2 * 4
+
+    dense = bitset(range(100)).to_compact_bytes()
+    assert dense[0] == 0 and len(dense) == 1 + 13
+
+
+def test_missing_or_empty_data_is_an_empty_set():
+    for data in (None, b'', Bitset().to_compact_bytes()):
+        assert len(Bitset.from_compact_bytes(data)) == 0
+
+
+def test_contains_many_outside_the_bitmap():
+    bits = bitset([1, 9])
+    assert bits.contains_many(np.asarray([-1, 0, 1, 9, 10, 10 ** 6])).tolist() == \
+        [False, False, True, True, False, False]
+    assert Bitset().contains_many(np.asarray([0, 5])).tolist() == [False, False]
+
+
+def test_discard_then_encode():
+    bits = bitset([3, 200])
+    bits.discard(200)
+    bits.discard(10 ** 6)  # Beyond the bitmap: a no-op
+    assert Bitset.from_compact_bytes(bits.to_compact_bytes()).ids().tolist() == [3]
+
+
+def test_incremental_seen_set_matches_rebuild(db):
+    rng = np.random.default_rng(0)
+    question_ids = [db.insert_question({
+        'question_text': f'Question {i}',
+        'category': 'technical',
+        'difficulty': 'easy',
+        'topics': [],
+        'job_roles': [],
+        'embedding': rng.standard_normal(VECTOR_DIMENSION).tolist()
+    }) for i in range(300)]
+    ordinals = db.get_question_ordinals()
+
+    # Sparse enough for the array encoding at first, dense by the end, with repeats
+    answered = [question_ids[i] for i in (250, 3, 3, 120)] + question_ids[:200]
+    for question_id in answered:
+        db.add_interview_response('c1', question_id, 'answer', 0.5, 0.5, 0.5)
+    db.add_interview_response('c2', question_ids[7], 'answer', 0.5, 0.5, 0.5)
+    db.add_interview_response('c1', 'not-a-question', 'answer', 0.5, 0.5, 0.5)
+
+    incremental = {cid: db.get_seen_set(cid) for cid in ('c1', 'c2', 'c3')}
+    expected = sorted({ordinals[qid] for qid in answered})
+    assert incremental['c1'][0].ids().tolist() == expected
+    assert incremental['c1'][1] == len(expected)
+    assert incremental['c2'][0].ids().tolist() == [ordinals[question_ids[7]]]
+    assert incremental['c3'][1] == 0 and len(incremental['c3'][0]) == 0
+
+    assert db.rebuild_seen_sets() == 2
+    for cid, (bits, count) in incremental.items():
+        rebuilt, rebuilt_count = db.get_seen_set(cid)
+        assert rebuilt.ids().tolist() == bits.ids().tolist()
+        assert rebuilt_count == count
+
+    # The cooldown path reads history directly and must agree on membership
+    window, _ = db.get_seen_set('c1', since='1970-01-01')
+    assert window.ids().tolist() == expected
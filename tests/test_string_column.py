@@ -0,0 +1,52 @@
+"""
+StringColumn: take / concat round trips
+"""
+
+import numpy as np
+from utils.string_column import StringColumn
+
+STRINGS = ['alpha', '', 'βeta', 'gamma', '', 'delta-ε', 'x']
+
+
+def test_round_trip():
+    column = StringColumn.from_strings(STRINGS)
+    assert len(column) == len(STRINGS)
+    assert list(column) == STRINGS
+
+
+def test_take_keeps_requested_rows_in_order():
+    column = StringColumn.from_strings(STRINGS)
+    for rows in ([0, 1, 2], [6, 0, 3], [1, 4], [2, 3, 5, 6], [5, 5, 0],
+                 list(range(len(STRINGS)))[::-1]):
+        assert list(column.take(np.asarray(rows))) == [STRINGS[i] for i in rows]
+
+
+def test_take_no_rows():
+    taken = StringColumn.from_strings(STRINGS).take(np.zeros(0, dtype=np.int64))
+    assert len(taken) == 0
+    assert list(taken) == []
+    assert taken.offsets.tolist() == [0]
+
+
+def test_take_only_empty_strings():
+    taken = StringColumn.from_strings(STRINGS).take(np.asarray([1, 4]))
+    assert list(taken) == ['', '']
+    assert len(taken.data) == 0
+
+
+def test_empty_column():
+    column = StringColumn.from_strings([])
+    assert len(column) == 0
+    assert list(column.take(np.zeros(0, dtype=np.int64))) == []
+    assert list(StringColumn.concat([column, column])) == []
+
+
+def test_take_of_take_and_concat():
+    column = StringColumn.from_strings(STRINGS)
+    middle = column.take(np.arange(2, 6))
+    assert list(middle.take(np.asarray([3, 0]))) == [STRINGS[5], STRINGS[2]]
+
+    # concat rebases offsets of columns that do not start at zero
+    combined = StringColumn.concat([middle, StringColumn.from_strings([]), column.take(np.asarray([6, 1]))])
+    assert list(combined) == STRINGS[2:6] + ['x', '']
+    assert list(combined.take(np.arange(len(combined)))) == list(combined)
@@ -0,0 +1,97 @@
+"""
+Profile update queue: coalescing, lag accounting and flush
+"""
+
+import threading
+import time
+from services.update_queue import ProfileUpdateQueue
+
+
+class Recorder:
+    """update_fn recording its calls, optionally blocking until released"""
+
+    def __init__(self, block: bool = False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, candidate_id):
+        self.started.set()
+        self.release.wait()
+        self.calls.append(candidate_id)
+
+
+def test_burst_for_one_candidate_runs_once():
+    update = Recorder()
+    queue = ProfileUpdateQueue(update, coalesce_seconds=0.2)
+    results = [queue.submit('a') for _ in range(10)]
+    queue.submit('b')
+
+    assert results == [True] + [False] * 9
+    assert queue.flush(timeout=5)
+    assert sorted(update.calls) == ['a', 'b']
+    stats = queue.stats()
+    assert stats['submitted'] == 11 and stats['coalesced'] == 9
+    assert stats['processed'] == 2 and stats['queue_depth'] == 0
+
+
+def test_jobs_wait_for_the_coalescing_window():
+    update = Recorder()
+    queue = ProfileUpdateQueue(update, coalesce_seconds=0.3)
+    queue.submit('a')
+    time.sleep(0.1)
+    assert update.calls == []
+    deadline = time.monotonic() + 5
+    while not update.calls and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert update.calls == ['a']
+    assert queue.stats()['last_lag_seconds'] >= 0.3
+
+
+def test_flush_drains_pending_jobs_without_waiting_out_the_window():
+    update = Recorder()
+    queue = ProfileUpdateQueue(update, coalesce_seconds=60)
+    for candidate_id in ('a', 'b', 'c'):
+        queue.submit(candidate_id)
+
+    started = time.monotonic()
+    assert queue.flush(timeout=5)
+    assert time.monotonic() - started < 5
+    assert update.calls == ['a', 'b', 'c']
+    # The window applies again afterwards
+    queue.submit('d')
+    time.sleep(0.1)
+    assert update.calls == ['a', 'b', 'c']
+
+
+def test_flush_waits_for_the_job_in_flight():
+    update = Recorder(block=True)
+    queue = ProfileUpdateQueue(update, coalesce_seconds=0)
+    queue.submit('a')
+    assert update.started.wait(5)
+    assert queue.stats()['in_flight'] == 1
+
+    # Times out while the update is still running
+    assert queue.flush(timeout=0.1) is False
+    threading.Timer(0.1, update.release.set).start()
+    assert queue.flush(timeout=5)
+    assert update.calls == ['a'] and queue.stats()['in_flight'] == 0
+
+
+def test_failed_update_is_counted_and_the_worker_keeps_going():
+    calls = []
+
+    def update(candidate_id):
+        calls.append(candidate_id)
+        if candidate_id == 'bad':
+            raise RuntimeError('boom')
+
+    queue = ProfileUpdateQueue(update, coalesce_seconds=0)
+    queue.submit('bad')
+    queue.submit('good')
+    assert queue.flush(timeout=5)
+    assert calls == ['bad', 'good']
+    stats = queue.stats()
+    assert stats['failed'] == 1 and stats['processed'] == 1 and stats['worker_alive']
@@ -0,0 +1,28 @@
+"""
+Admin-only endpoints
+Shared by ALL team members
+
+Admin requests carry the ADMIN_TOKEN in an X-Admin-Token header. Without
+ADMIN_TOKEN configured every admin endpoint answers 403.
+"""
+
+import hmac
+from functools import wraps
+from flask import jsonify, request
+from config import ADMIN_TOKEN
+
+
+def is_admin_request(token: str = ADMIN_TOKEN) -> bool:
+    """Request carries the configured admin token"""
+    given = request.headers.get('X-Admin-Token')
+    return bool(token) and given is not None and hmac.compare_digest(given, token)
+
+
+def admin_required(view):
+    """Decorator: 403 unless is_admin_request()"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin token required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,104 @@
+"""
+Compact bitset over dense integer ids
+Shared by ALL team members
+"""
+
+import numpy as np
+from typing import Iterable, Optional
+
+
+class Bitset:
+    """Growable bitset stored as little-endian bytes (bit i = byte i//8, bit i%8)"""
+
+    def __init__(self, size: int = 0, data: Optional[bytes] = None):
+        """
+        Args:
+            size: Number of bits to reserve
+            data: Existing bytes (e.g. from to_bytes) to load
+        """
+        self._bytes = bytearray(data or b'')
+        self._reserve(size)
+
+    def _reserve(self, size: int):
+        needed = (size + 7) // 8
+        if needed > len(self._bytes):
+            self._bytes.extend(b'\x00' * (needed - len(self._bytes)))
+
+    def add(self, i: int):
+        """Set bit i"""
+        self._reserve(i + 1)
+        self._bytes[i >> 3] |= 1 << (i & 7)
+
+    def update(self, ids: Iterable[int]):
+        """Set every bit in ids"""
+        for i in ids:
+            self.add(i)
+
+    def discard(self, i: int):
+        """Clear bit i"""
+        if (i >> 3) < len(self._bytes):
+            self._bytes[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def __contains__(self, i: int) -> bool:
+        return (i >> 3) < len(self._bytes) and bool(self._bytes[i >> 3] & (1 << (i & 7)))
+
+    def __len__(self) -> int:
+        """Number of set bits"""
+        return int(np.unpackbits(np.frombuffer(bytes(self._bytes), dtype=np.uint8)).sum())
+
+    def contains_many(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Vectorized membership test
+
+        Args:
+            ids: Integer array of bit positions
+
+        Returns:
+            Boolean array, True where the bit is set
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        bits = np.unpackbits(np.frombuffer(bytes(self._bytes), dtype=np.uint8),
+                             bitorder='little')
+        inside = (ids >= 0) & (ids < len(bits))
+        result = np.zeros(len(ids), dtype=bool)
+        result[inside] = bits[ids[inside]].astype(bool)
+        return result
+
+    def to_bytes(self) -> bytes:
+        """Serialized form (trailing zero bytes trimmed)"""
+        return bytes(self._bytes).rstrip(b'\x00')
+
+    def to_compact_bytes(self) -> bytes:
+        """
+        Smallest of two encodings, roaring-style
+
+        Sparse sets are stored as a sorted uint32 array (tag 1), dense ones
+        as the raw bitmap (tag 0).
+        """
+        bitmap = self.to_bytes()
+        ids = self.ids()
+        if len(ids) * 4 < len(bitmap):
+            return b'\x01' + ids.astype('<u4').tobytes()
+        return b'\x00' + bitmap
+
+    @classmethod
+    def from_compact_bytes(cls, data: Optional[bytes]) -> 'Bitset':
+        """Load a bitset written by to_compact_bytes"""
+        if not data:
+            return cls()
+        if data[0] == 1:
+            bitset = cls()
+            ids = np.frombuffer(data[1:], dtype='<u4')
+            if len(ids):
+                bitset._reserve(int(ids.max()) + 1)
+                bits = np.zeros(len(bitset._bytes) * 8, dtype=np.uint8)
+                bits[ids] = 1
+                bitset._bytes = bytearray(np.packbits(bits, bitorder='little').tobytes())
+            return bitset
+        return cls(data=data[1:])
+
+    def ids(self) -> np.ndarray:
+        """Sorted positions of the set bits"""
+        bits = np.unpackbits(np.frombuffer(bytes(self._bytes), dtype=np.uint8),
+                             bitorder='little')
+        return np.flatnonzero(bits)
@@ -3,28 +3,90 @@ Centralized embedding service
 Shared by ALL team members
 """
 
-from sentence_transformers import SentenceTransformer
+import logging
+import re
+import hashlib
+from functools import lru_cache
 from typing import List
-from config import EMBEDDING_MODEL, VECTOR_DIMENSION
+import numpy as np
+from config import EMBEDDING_MODEL, EMBEDDING_BACKEND, VECTOR_DIMENSION
 from .vector_operations import normalize_vector
+from .metrics import EMBEDDING_CALLS, EMBEDDING_BATCH_SIZE, EMBEDDING_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+
+@lru_cache(maxsize=100000)
+def token_vector(token: str) -> np.ndarray:
+    """Signed one-hot pair for a token, stable across processes and runs"""
+    digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+    vector = np.zeros(VECTOR_DIMENSION, dtype=np.float32)
+    for chunk in (digest[:4], digest[4:]):
+        value = int.from_bytes(chunk, 'little')
+        vector[(value >> 1) % VECTOR_DIMENSION] += 1.0 if value & 1 else -1.0
+    vector.flags.writeable = False
+    return vector
+
+
+def hashing_embedding(text: str) -> np.ndarray:
+    """
+    Hashed bag-of-words vector (unnormalized)
+
+    Texts sharing words get similar vectors, which is enough to exercise
+    retrieval without loading a model.
+    """
+    vector = np.zeros(VECTOR_DIMENSION, dtype=np.float32)
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        vector += token_vector(token)
+    return vector
+
 
 class EmbeddingService:
     """Singleton service for text embeddings"""
 
     _instance = None
-    _model = None
+    _loaded_model = None
+    backend = EMBEDDING_BACKEND
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(EmbeddingService, cls).__new__(cls)
-            cls._instance._initialize_model()
         return cls._instance
 
+    @property
+    def _model(self):
+        """Model, loaded on first use so importing utils stays cheap"""
+        if self._loaded_model is None:
+            self._initialize_model()
+        return self._loaded_model
+
     def _initialize_model(self):
         """Load the embedding model once"""
-        print(f"🔄 Loading embedding model: {EMBEDDING_MODEL}")
-        self._model = SentenceTransformer(EMBEDDING_MODEL)
-        print("✅ Model loaded successfully")
+        from sentence_transformers import SentenceTransformer
+
+        logger.info("Loading embedding model", extra={'model': EMBEDDING_MODEL})
+        EmbeddingService._loaded_model = SentenceTransformer(EMBEDDING_MODEL)
+        logger.info("Embedding model loaded", extra={'model': EMBEDDING_MODEL})
+
+    def preload(self) -> "EmbeddingService":
+        """Load the model now (e.g. before forking worker processes)"""
+        if self.backend != 'hashing':
+            self._model
+        return self
+
+    def use_backend(self, backend: str) -> "EmbeddingService":
+        """
+        Switch embedding backend for the whole process
+
+        Args:
+            backend: 'sentence-transformers' or 'hashing'
+        """
+        if backend not in ('sentence-transformers', 'hashing'):
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        EmbeddingService.backend = backend
+        return self
 
     def embed_text(self, text: str) -> List[float]:
         """
@@ -33,8 +95,13 @@ class EmbeddingService:
         if not text or not text.strip():
             return [0.0] * VECTOR_DIMENSION
 
-        embedding = self._model.encode(text, convert_to_numpy=True)
-        return normalize_vector(embedding.tolist())
+        EMBEDDING_CALLS.inc(kind='text', backend=self.backend)
+        with EMBEDDING_SECONDS.time(kind='text', backend=self.backend):
+            if self.backend == 'hashing':
+                return normalize_vector(hashing_embedding(text).tolist())
+
+            embedding = self._model.encode(text, convert_to_numpy=True)
+            return normalize_vector(embedding.tolist())
 
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """
@@ -43,13 +110,21 @@ class EmbeddingService:
         if not texts:
             return []
 
-        embeddings = self._model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=True
-        )
-
-        return [normalize_vector(emb.tolist()) for emb in embeddings]
+        EMBEDDING_CALLS.inc(kind='batch', backend=self.backend)
+        EMBEDDING_BATCH_SIZE.observe(len(texts), kind='batch')
+        with EMBEDDING_SECONDS.time(kind='batch', backend=self.backend):
+            if self.backend == 'hashing':
+                return [normalize_vector(hashing_embedding(text).tolist())
+                        if text and text.strip() else [0.0] * VECTOR_DIMENSION
+                        for text in texts]
+
+            embeddings = self._model.encode(
+                texts,
+                convert_to_numpy=True,
+                show_progress_bar=logger.isEnabledFor(logging.DEBUG)
+            )
+
+            return [normalize_vector(emb.tolist()) for emb in embeddings]
 
     def embed_resume(self, resume_data: dict) -> List[float]:
         """
@@ -0,0 +1,95 @@
+"""
+HTTP caching helpers: version ETags, conditional GET and compression
+Shared by ALL team members
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Dict, Optional
+from flask import current_app, request
+from config import COMPRESSION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip is used instead
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain',
+    'text/javascript', 'application/javascript', 'image/svg+xml'
+}
+
+
+def version_etag(versions: Dict[str, int], *parts) -> str:
+    """
+    ETag for a response that depends only on data versions and request parts
+
+    Args:
+        versions: From DatabaseManager.get_change_versions
+        parts: Anything else the response depends on (path, query string, ...)
+    """
+    key = json.dumps([versions, parts], sort_keys=True, default=str)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+
+def set_revalidate_headers(response, etag: str):
+    """Tag a response and make clients revalidate it before reuse"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag: str):
+    """
+    304 response if the request's If-None-Match already has this ETag
+
+    Returns:
+        Response, or None if the client needs the full body
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return set_revalidate_headers(current_app.response_class(status=304), etag)
+
+
+def choose_encoding() -> Optional[str]:
+    """Best content encoding the client accepts ('br', 'gzip' or None)"""
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offers)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, min_bytes: int = COMPRESSION_MIN_BYTES):
+    """
+    after_request hook: compress text/JSON bodies above min_bytes
+
+    Streamed and file responses (direct_passthrough) are left alone.
+    """
+    if (response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    body = compress(data, encoding)
+    if len(body) >= len(data):
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
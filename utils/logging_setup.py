@@ -0,0 +1,75 @@
+"""
+Leveled, structured logging for the app and CLI scripts
+Shared by ALL team members
+
+Modules log through logging.getLogger(__name__) and pass fields with
+extra={...}; the formatter appends them as key=value (text) or writes one
+JSON object per line (json). Per-request messages are DEBUG, so at the
+default INFO level they cost one level check.
+"""
+
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+from config import LOG_LEVEL, LOG_FORMAT
+
+# Attributes every LogRecord has; anything else came in through extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """time level logger: message key=value ..."""
+
+    def __init__(self, plain: bool = False):
+        super().__init__('%(message)s' if plain else '%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _fields(record)
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **_fields(record)
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      plain: bool = False) -> None:
+    """
+    Install a stderr handler on the root logger (once)
+
+    Leaves logging alone if the host (e.g. gunicorn, a test runner) has
+    already configured handlers.
+
+    Args:
+        level: Level name (default LOG_LEVEL)
+        fmt: 'text' or 'json' (default LOG_FORMAT)
+        plain: Message only, for command-line scripts
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if (fmt or LOG_FORMAT) == 'json' else TextFormatter(plain))
+    root.addHandler(handler)
+    root.setLevel((level or LOG_LEVEL).upper())
@@ -0,0 +1,480 @@
+"""
+Application metrics in the Prometheus text exposition format
+Shared by ALL team members
+
+Metrics are kept in process memory. Under the pre-fork server every worker
+also writes a snapshot to METRICS_DIR, and /metrics merges the snapshots,
+so a scrape that lands on any worker sees the totals of all of them.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from functools import wraps
+from inspect import isfunction, isgeneratorfunction
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from config import METRICS_DIR
+
+# Seconds; spans a cached lookup to a cold model load
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Running totals of exited workers, in METRICS_DIR next to the live snapshots
+EXITED_SNAPSHOT = 'metrics-exited.json'
+EXITED_INSTANCES_KEPT = 1000  # Folded worker instances remembered (see fold_snapshot)
+
+
+class Metric:
+    """Base for one metric name with a fixed set of label names"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> List:
+        """[[label values], value] pairs (JSON-friendly)"""
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def _label_text(self, key: Sequence[str], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    @staticmethod
+    def merge(values: Iterable) -> float:
+        return sum(values)
+
+    def render(self, merged: Dict) -> List[str]:
+        return [f'{self.name}{self._label_text(key)} {_number(value)}'
+                for key, value in sorted(merged.items())]
+
+
+class Histogram(Metric):
+    """Distribution over fixed buckets, with sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+        if _traces:  # Empty unless some request asked for ?trace=1
+            trace = _traces.get(threading.get_ident())
+            if trace is not None:
+                trace.append((time.perf_counter(), self.name, labels, value))
+
+    def time(self, **labels) -> 'Timer':
+        """Context manager observing the elapsed seconds"""
+        return Timer(self, labels)
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(values: Iterable) -> List:
+        counts, total = None, 0.0
+        for bucket_counts, value_sum in values:
+            counts = list(bucket_counts) if counts is None else [a + b for a, b in zip(counts, bucket_counts)]
+            total += value_sum
+        return [counts, total]
+
+    def render(self, merged: Dict) -> List[str]:
+        lines = []
+        for key, (counts, value_sum) in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(bound)
+                le_label = f'le="{le}"'
+                lines.append(f'{self.name}_bucket{self._label_text(key, le_label)} {cumulative}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {_number(value_sum)}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {cumulative}')
+        return lines
+
+
+class Timer:
+    """Observes elapsed wall time into a histogram on exit"""
+
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram: Histogram, labels: Dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class StageTimer:
+    """
+    Laps through the stages of one call
+
+    Each lap() observes the time since the previous lap (or creation)
+    under its stage label, so a method marks the end of each stage instead
+    of nesting a context manager per stage.
+    """
+
+    __slots__ = ('histogram', 'labels', 'last', 'stages')
+
+    def __init__(self, histogram: Histogram, **labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.last = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        self.histogram.observe(elapsed, stage=stage, **self.labels)
+        self.stages.append((stage, elapsed))
+        return elapsed
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._derived: List[Tuple[str, str, Callable[[Dict], Dict]]] = []
+        self._instance = uuid.uuid4().hex
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def derived_gauge(self, name: str, documentation: str, fn: Callable[[Dict], Dict]) -> None:
+        """
+        Gauge computed at render time from the merged values
+
+        Args:
+            fn: merged {metric name: {label values: value}} ->
+                {label text (e.g. 'cache="retrieval"'): value}
+        """
+        self._derived.append((name, documentation, fn))
+
+    def reset(self) -> None:
+        """Forget all values (a forked worker must not re-count its parent's)"""
+        for metric in self._metrics.values():
+            with metric._lock:
+                metric._values.clear()
+        self._instance = uuid.uuid4().hex  # Pids are reused; instances are not
+
+    def snapshot(self) -> Dict:
+        return {'pid': os.getpid(), 'instance': self._instance,
+                'metrics': {name: metric.snapshot() for name, metric in self._metrics.items()}}
+
+    def write_snapshot(self, directory: Optional[str] = METRICS_DIR) -> None:
+        """Publish this process's values for the other workers' /metrics"""
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def _snapshots(self, directory: Optional[str]) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        This process live, plus the latest snapshot of every other process
+
+        Returns:
+            (live snapshots, exited workers' totals or None)
+        """
+        snapshots = [self.snapshot()]
+        if not directory:
+            return snapshots, None
+        own = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            if path in (own, exited_path):
+                continue
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+
+        # Read after the workers: a worker file read above whose instance is
+        # already folded into these totals must not be counted twice
+        exited = _read_snapshot(exited_path)
+        if exited is not None:
+            folded = set(exited['folded'])
+            snapshots = [s for s in snapshots if s.get('instance') not in folded]
+        return snapshots, exited
+
+    def fold_snapshot(self, pid: int, directory: Optional[str] = METRICS_DIR) -> None:
+        """
+        Add an exited worker's last snapshot to the exited totals, then drop it
+
+        Like prometheus_client's multiprocess mode: a recycled worker's
+        counters and histograms stay in the totals instead of disappearing,
+        which Prometheus would read as a counter reset. Called by one
+        process only (the gunicorn master).
+        """
+        if not directory:
+            return
+        path = os.path.join(directory, f'metrics-{pid}.json')
+        snapshot = _read_snapshot(path)
+        if snapshot is not None:
+            exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+            exited = _read_snapshot(exited_path) or {'folded': [], 'metrics': {}}
+            for name, values in snapshot['metrics'].items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                merged = {tuple(key): value for key, value in exited['metrics'].get(name, [])}
+                for key, value in values:
+                    key = tuple(key)
+                    merged[key] = value if key not in merged else metric.merge([merged[key], value])
+                exited['metrics'][name] = [[list(key), value] for key, value in merged.items()]
+            if snapshot.get('instance'):
+                exited['folded'] = (exited['folded'] + [snapshot['instance']])[-EXITED_INSTANCES_KEPT:]
+            with open(exited_path + '.tmp', 'w') as f:
+                json.dump(exited, f)
+            os.replace(exited_path + '.tmp', exited_path)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def render(self, directory: Optional[str] = METRICS_DIR) -> str:
+        """Text exposition format of every metric, merged across processes"""
+        live, exited = self._snapshots(directory)
+        snapshots = live + ([exited] if exited is not None else [])
+        merged_all = {}
+        lines = []
+        for name, metric in self._metrics.items():
+            grouped: Dict[Tuple[str, ...], List] = {}
+            for snapshot in snapshots:
+                for key, value in snapshot['metrics'].get(name, []):
+                    grouped.setdefault(tuple(key), []).append(value)
+            merged = {key: metric.merge(values) for key, values in grouped.items()}
+            merged_all[name] = merged
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render(merged))
+        for name, documentation, fn in self._derived:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.extend(f'{name}{{{labels}}} {_number(value)}'
+                         for labels, value in sorted(fn(merged_all).items()))
+        lines.append('# HELP metrics_processes Live processes whose metrics are included')
+        lines.append('# TYPE metrics_processes gauge')
+        lines.append(f'metrics_processes {len(live)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _read_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # Being replaced or removed
+
+
+# ============================================================
+# APPLICATION METRICS
+# ============================================================
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ('method', 'route', 'status'))
+RETRIEVAL_STAGE_SECONDS = REGISTRY.histogram(
+    'retrieval_stage_duration_seconds', 'Time spent in each stage of question retrieval',
+    ('method', 'stage'))
+EMBEDDING_CALLS = REGISTRY.counter(
+    'embedding_calls_total', 'Calls into the embedding service', ('kind', 'backend'))
+EMBEDDING_BATCH_SIZE = REGISTRY.histogram(
+    'embedding_batch_size', 'Texts per embedding call', ('kind',), buckets=SIZE_BUCKETS)
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    'embedding_duration_seconds', 'Embedding call latency', ('kind', 'backend'))
+DB_CALL_SECONDS = REGISTRY.histogram(
+    'db_call_duration_seconds', 'DatabaseManager method latency', ('method',))
+DB_STATEMENTS = REGISTRY.counter(
+    'db_statements_total', 'SQL statements executed, by the DatabaseManager method running them',
+    ('method',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'cache_requests_total', 'Cache lookups (retrieval cache, HTTP ETag revalidation)',
+    ('cache', 'result'))
+
+
+def _hit_ratios(merged: Dict) -> Dict:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in merged.get(CACHE_REQUESTS.name, {}).items():
+        hits_and_total = totals.setdefault(cache, [0.0, 0.0])
+        hits_and_total[1] += value
+        if result == 'hit':
+            hits_and_total[0] += value
+    return {f'cache="{_escape(cache)}"': hits / total
+            for cache, (hits, total) in totals.items() if total}
+
+
+REGISTRY.derived_gauge('cache_hit_ratio', 'Hits / lookups since start, per cache', _hit_ratios)
+
+
+# ============================================================
+# PER-REQUEST TRACES
+# ============================================================
+
+# Thread ident -> observations made on that thread while it is traced
+_traces: Dict[int, List[Tuple[float, str, Dict, float]]] = {}
+
+
+def begin_trace() -> None:
+    """Record every histogram observation made on this thread"""
+    _traces[threading.get_ident()] = []
+
+
+def end_trace(started: float) -> List[Dict]:
+    """
+    Stop recording and return the observations as a timeline
+
+    Args:
+        started: perf_counter() at the start of the traced work
+
+    Returns:
+        [{'metric', <labels>, 'start_ms', 'duration_ms'}] of the latency
+        histograms, in completion order
+    """
+    trace = _traces.pop(threading.get_ident(), [])
+    return [{'metric': name, **labels,
+             'start_ms': round((ended - value - started) * 1000, 3),
+             'duration_ms': round(value * 1000, 3)}
+            for ended, name, labels, value in trace if name.endswith('_seconds')]
+
+
+# ============================================================
+# DATABASE INSTRUMENTATION
+# ============================================================
+
+_current = threading.local()
+
+
+def current_db_method() -> str:
+    """Outermost DatabaseManager method running on this thread"""
+    return getattr(_current, 'method', None) or 'other'
+
+
+def count_statement(statement: str) -> None:
+    """sqlite3 trace callback: one SQL statement started"""
+    if not statement.startswith('--'):  # Trigger bodies are reported as comments
+        DB_STATEMENTS.inc(method=current_db_method())
+
+
+def instrument_methods(cls):
+    """
+    Class decorator timing every public method into DB_CALL_SECONDS
+
+    Nested calls are timed too; statements are attributed to the outermost
+    method. Static methods and generator methods are left alone (the
+    latter do their work after the call returns).
+    """
+    for name, fn in list(vars(cls).items()):
+        if name.startswith('_') or not isfunction(fn) or isgeneratorfunction(fn):
+            continue
+        setattr(cls, name, _timed_method(name, fn))
+    return cls
+
+
+def _timed_method(name: str, fn: Callable) -> Callable:
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        outermost = getattr(_current, 'method', None) is None
+        if outermost:
+            _current.method = name
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            DB_CALL_SECONDS.observe(time.perf_counter() - started, method=name)
+            if outermost:
+                _current.method = None
+    return wrapper
+
+
+# ============================================================
+# FLASK HOOKS
+# ============================================================
+
+def start_request_timer() -> None:
+    """before_request hook"""
+    from flask import g
+    g.metrics_started = time.perf_counter()
+
+
+def observe_request(response):
+    """after_request hook: latency per route template (not per URL)"""
+    from flask import g, request
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                     route=route, status=response.status_code)
+    return response
@@ -0,0 +1,75 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text
+Shared by ALL team members
+
+A signature keeps, for each of MINHASH_PERMUTATIONS hash functions, the
+smallest hash over the text's word shingles; the share of positions on
+which two signatures agree estimates the Jaccard similarity of their
+shingle sets. LSH cuts a signature into MINHASH_BANDS bands and hashes
+each band to a bucket: similar texts almost surely share at least one
+bucket, so candidates are found by bucket lookups instead of comparing
+against every stored signature.
+"""
+
+import hashlib
+import re
+import zlib
+import numpy as np
+from typing import List, Optional
+from config import (MINHASH_PERMUTATIONS, MINHASH_BANDS, MINHASH_SHINGLE_WORDS,
+                    MINHASH_SEED)
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed permutations: signatures are stored and compared across processes
+_state = np.random.RandomState(MINHASH_SEED)
+_A = _state.randint(1, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_B = _state.randint(0, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingle_hashes(text: str, size: int = MINHASH_SHINGLE_WORDS) -> np.ndarray:
+    """32-bit hashes of the distinct lowercase word shingles of a text"""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < size:
+        shingles = {' '.join(tokens)} if tokens else set()
+    else:
+        shingles = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+def signature(text: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature of a text
+
+    Returns:
+        uint32 array of MINHASH_PERMUTATIONS values, or None for text
+        without words
+    """
+    hashes = shingle_hashes(text)
+    if len(hashes) == 0:
+        return None
+    permuted = (hashes[:, None] * _A + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return float(np.mean(a == b))
+
+
+def band_buckets(sig: np.ndarray, bands: int = MINHASH_BANDS) -> List[int]:
+    """Bucket (signed 64-bit, fits an SQLite INTEGER) of each band, in band order"""
+    return [int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(),
+                           'little', signed=True)
+            for band in np.split(sig.astype('<u4'), bands)]
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype('<u4').tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<u4')
@@ -0,0 +1,67 @@
+"""
+Per-process memory usage from /proc
+Shared by ALL team members
+"""
+
+import sys
+from typing import Dict, Union
+
+# smaps_rollup field -> key in the returned dict
+_SMAPS_FIELDS = {
+    'Rss': 'rss_kb',
+    'Pss': 'pss_kb',
+    'Shared_Clean': 'shared_clean_kb',
+    'Shared_Dirty': 'shared_dirty_kb',
+    'Private_Clean': 'private_clean_kb',
+    'Private_Dirty': 'private_dirty_kb',
+    'Swap': 'swap_kb'
+}
+
+
+def memory_usage(pid: Union[int, str] = 'self') -> Dict:
+    """
+    Memory of a process in kB
+
+    rss counts shared pages in full for every process; pss splits them
+    between the processes sharing them, and uss (private pages) is what
+    the process would free on exit. Summing pss over pre-forked workers
+    gives their real combined footprint.
+
+    Args:
+        pid: Process id, or 'self'
+
+    Returns:
+        Dict with rss_kb, pss_kb, uss_kb, shared_kb, ... (whatever the
+        platform exposes) and 'source'
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            usage = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].rstrip(':') in _SMAPS_FIELDS:
+                    usage[_SMAPS_FIELDS[parts[0].rstrip(':')]] = int(parts[1])
+        usage['uss_kb'] = usage.get('private_clean_kb', 0) + usage.get('private_dirty_kb', 0)
+        usage['shared_kb'] = usage.get('shared_clean_kb', 0) + usage.get('shared_dirty_kb', 0)
+        usage['source'] = 'smaps_rollup'
+        return usage
+    except OSError:
+        pass
+
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return {'rss_kb': int(line.split()[1]), 'source': 'status'}
+    except OSError:
+        pass
+
+    # No /proc (e.g. macOS): peak RSS of this process only
+    try:
+        import resource
+    except ImportError:  # Windows
+        return {'source': 'unavailable'}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024  # bytes on macOS
+    return {'max_rss_kb': peak, 'source': 'getrusage'}
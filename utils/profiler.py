@@ -0,0 +1,269 @@
+"""
+On-demand sampling profiler and per-request stage traces
+Shared by ALL team members
+
+An admin starts a profile on one worker for its next N requests or T
+seconds. A sampler thread then reads the stacks of the threads serving
+requests (sys._current_frames) every PROFILE_SAMPLE_INTERVAL_SECONDS and
+counts collapsed stacks, the input format of flamegraph.pl / speedscope.
+Results are written to PROFILE_DIR so any worker can return them.
+
+While no profile is running the request hooks check one attribute and the
+sampler thread does not exist.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import (PROFILE_DIR, PROFILE_SAMPLE_INTERVAL_SECONDS, PROFILE_MAX_SECONDS,
+                    PROFILE_MAX_REQUESTS, PROFILE_TOP_FUNCTIONS)
+from .metrics import begin_trace, end_trace
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(code, cache: Dict) -> str:
+    """'function (package/module.py:line)' for a code object"""
+    label = cache.get(code)
+    if label is None:
+        path = '/'.join(code.co_filename.replace('\\', '/').rsplit('/', 2)[-2:])
+        label = cache[code] = f'{code.co_name} ({path}:{code.co_firstlineno})'
+    return label
+
+
+def top_functions(stacks: Dict[str, int], limit: int = PROFILE_TOP_FUNCTIONS) -> List[Dict]:
+    """
+    Functions by samples spent in them (self) and under them (total)
+
+    Args:
+        stacks: Collapsed stack ('root;...;leaf') -> samples
+        limit: Number of functions to return
+    """
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    samples = sum(stacks.values()) or 1
+    ranked = sorted(total, key=lambda frame: (own[frame], total[frame]), reverse=True)
+    return [{'function': frame,
+             'self_samples': own[frame],
+             'self_percent': round(100 * own[frame] / samples, 1),
+             'total_samples': total[frame],
+             'total_percent': round(100 * total[frame] / samples, 1)}
+            for frame in ranked[:limit]]
+
+
+class SamplingProfiler:
+    """Statistical profiler for the requests served by this process"""
+
+    def __init__(self, directory: Optional[str] = PROFILE_DIR,
+                 interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+        self.directory = directory
+        self.interval = interval
+        self.active = False  # The only thing the request hooks read when idle
+        self._lock = threading.Lock()
+        self._session: Optional[Dict] = None
+        self._threads = set()
+        self._stacks = Counter()
+        self._labels: Dict = {}
+
+    def start(self, requests: Optional[int] = None,
+              seconds: Optional[float] = None) -> Dict:
+        """
+        Profile the next `requests` requests or `seconds` seconds,
+        whichever ends first
+
+        Returns:
+            Session info including profile_id
+
+        Raises:
+            ValueError: Neither limit given, or out of range
+            RuntimeError: A profile is already running in this process
+        """
+        if requests is None and seconds is None:
+            raise ValueError("Give requests and/or seconds")
+        if requests is not None and not 1 <= requests <= PROFILE_MAX_REQUESTS:
+            raise ValueError(f"requests must be between 1 and {PROFILE_MAX_REQUESTS}")
+        if seconds is not None and not 0 < seconds <= PROFILE_MAX_SECONDS:
+            raise ValueError(f"seconds must be between 0 and {PROFILE_MAX_SECONDS}")
+
+        with self._lock:
+            if self.active:
+                raise RuntimeError("A profile is already running in this worker")
+            self._session = {
+                'profile_id': uuid.uuid4().hex[:12],
+                'pid': os.getpid(),
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'requests_limit': requests,
+                'seconds_limit': seconds,
+                'requests': 0,
+                'interval_ms': self.interval * 1000,
+                'started': time.monotonic(),
+                'deadline': time.monotonic() + (seconds or PROFILE_MAX_SECONDS)
+            }
+            self._stacks = Counter()
+            self._threads = set()
+            self.active = True
+        threading.Thread(target=self._sample, name='profiler', daemon=True).start()
+        return self.status()
+
+    def status(self) -> Dict:
+        """Running session of this process, if any"""
+        with self._lock:
+            if not self.active:
+                return {'active': False, 'pid': os.getpid()}
+            session = self._session
+            return {'active': True,
+                    **{key: value for key, value in session.items()
+                       if key not in ('started', 'deadline')},
+                    'elapsed_s': round(time.monotonic() - session['started'], 1)}
+
+    # Request hooks (the first check is all an idle profiler costs)
+
+    def enter_request(self) -> None:
+        if self.active:
+            with self._lock:
+                if self.active:
+                    self._threads.add(threading.get_ident())
+
+    def exit_request(self) -> None:
+        if self.active:
+            with self._lock:
+                ident = threading.get_ident()
+                if not self.active or ident not in self._threads:
+                    return
+                self._threads.discard(ident)
+                self._session['requests'] += 1
+                limit = self._session['requests_limit']
+                done = limit is not None and self._session['requests'] >= limit
+            if done:
+                self._finish()
+
+    def _sample(self) -> None:
+        """Sampler thread: runs only while a profile is active"""
+        own = threading.get_ident()
+        session = self._session
+        while self.active and self._session is session:
+            time.sleep(self.interval)
+            if time.monotonic() >= session['deadline']:
+                self._finish()
+                break
+            frames = sys._current_frames()
+            with self._lock:
+                if self._session is not session:
+                    break
+                idents = [ident for ident in self._threads if ident != own]
+            for ident in idents:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code, self._labels))
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[';'.join(reversed(stack))] += 1
+            del frames
+
+    def _finish(self) -> None:
+        with self._lock:
+            if not self.active:
+                return
+            self.active = False
+            session, stacks = self._session, dict(self._stacks)
+            self._threads = set()
+
+        result = {key: value for key, value in session.items()
+                  if key not in ('started', 'deadline')}
+        result.update({
+            'duration_s': round(time.monotonic() - session['started'], 2),
+            'samples': sum(stacks.values()),
+            'top_functions': top_functions(stacks),
+            'collapsed': stacks
+        })
+        self._save(result)
+        logger.info("Profile finished", extra={'profile_id': result['profile_id'],
+                                               'requests': result['requests'],
+                                               'samples': result['samples']})
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f'profile-{profile_id}.json')
+
+    def _save(self, result: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(result['profile_id'])
+        with open(path + '.tmp', 'w') as f:
+            json.dump(result, f)
+        os.replace(path + '.tmp', path)
+
+    def result(self, profile_id: str) -> Optional[Dict]:
+        """Finished profile from any worker, or None"""
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(self._path(profile_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def collapsed_text(result: Dict) -> str:
+    """Profile as 'frame;frame;frame count' lines for flame graph tools"""
+    return ''.join(f'{stack} {count}\n' for stack, count in
+                   sorted(result['collapsed'].items(), key=lambda item: -item[1]))
+
+
+profiler = SamplingProfiler()
+
+
+# ============================================================
+# FLASK HOOKS
+# ============================================================
+
+def start_request_hooks() -> None:
+    """before_request hook: join a running profile, start a ?trace=1 trace"""
+    profiler.enter_request()
+
+    from flask import g, request
+    if request.args.get('trace') == '1':
+        from .admin import is_admin_request
+        if is_admin_request():
+            g.trace_started = time.perf_counter()
+            begin_trace()
+
+
+def finish_request_hooks(exc=None) -> None:
+    """teardown_request hook (also runs when the view raised)"""
+    profiler.exit_request()
+
+    from flask import g
+    if g.pop('trace_started', None) is not None:
+        end_trace(0.0)  # attach_trace did not run; drop the observations
+
+
+def attach_trace(response):
+    """after_request hook: add the stage breakdown to a traced JSON response"""
+    from flask import current_app, g
+    started = g.pop('trace_started', None)
+    if started is None:
+        return response
+    stages = end_trace(started)
+    if not response.is_json or response.direct_passthrough:
+        return response
+    body = response.get_json(silent=True)
+    if not isinstance(body, dict):
+        return response
+    body['trace'] = {'total_ms': round((time.perf_counter() - started) * 1000, 3),
+                     'stages': stages}
+    response.set_data(current_app.json.dumps(body))
+    # A timing breakdown is not the cacheable representation
+    response.headers.pop('ETag', None)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
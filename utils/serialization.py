@@ -0,0 +1,115 @@
+"""
+API response serialization
+Shared by ALL team members
+"""
+
+from typing import Dict, List, Optional, Tuple
+from flask.json.provider import DefaultJSONProvider
+from config import JSON_PROVIDER, QUESTION_RESPONSE_FIELDS
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, stdlib json is used instead
+    orjson = None
+
+# Every field a question dict can carry in a response
+QUESTION_FIELDS = ('question_id', 'question_text', 'category', 'difficulty',
+                   'topics', 'job_roles', 'embedding', 'ideal_keywords',
+                   'created_at', 'similarity_score', 'diversity_group')
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ?fields= query argument
+
+    Args:
+        value: Comma-separated field names, "all", or None for the default
+
+    Returns:
+        Tuple of fields to keep, or None to keep every field
+    """
+    if value is None or not value.strip():
+        return tuple(QUESTION_RESPONSE_FIELDS)
+    if value.strip() in ('all', '*'):
+        return None
+
+    fields = tuple(f.strip() for f in value.split(',') if f.strip())
+    unknown = [f for f in fields if f not in QUESTION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(QUESTION_FIELDS)}")
+    return fields
+
+
+def select_fields(questions: List[Dict], fields: Optional[Tuple[str, ...]]) -> List[Dict]:
+    """Project question dicts onto the requested fields (None keeps all)"""
+    if fields is None:
+        return questions
+    return [{f: q[f] for f in fields if f in q} for q in questions]
+
+
+def select_question_fields(question: Optional[Dict],
+                           fields: Optional[Tuple[str, ...]]) -> Optional[Dict]:
+    """select_fields for a single (possibly missing) question"""
+    if question is None:
+        return None
+    return select_fields([question], fields)[0]
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson when it is installed
+
+    Falls back to the stdlib provider without orjson, or whenever a caller
+    passes json.dumps/json.loads keyword arguments orjson does not support.
+    """
+
+    # Matches app.config['JSON_SORT_KEYS'] = False: keep insertion order
+    sort_keys = False
+
+    _OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+    def __init__(self, app, use_orjson: bool = True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+
+    def _orjson_dumps(self, obj, indent: bool = False) -> bytes:
+        option = self._OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        if not self.use_orjson or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._orjson_dumps(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+def configure_json(app, provider: str = JSON_PROVIDER):
+    """
+    Install the JSON provider on a Flask app
+
+    Args:
+        app: Flask app
+        provider: "auto" | "orjson" | "stdlib"
+    """
+    if provider not in ('auto', 'orjson', 'stdlib'):
+        raise ValueError("JSON provider must be 'auto', 'orjson' or 'stdlib'")
+    if provider == 'orjson' and orjson is None:
+        raise ImportError("JSON_PROVIDER is 'orjson' but orjson is not installed")
+
+    app.json = FastJSONProvider(app, use_orjson=provider != 'stdlib')
+    return app.json
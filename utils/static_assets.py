@@ -0,0 +1,132 @@
+"""
+Fingerprinted, precompressed frontend assets
+Shared by ALL team members
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+from flask import current_app, request
+from config import COMPRESSION_MIN_BYTES, STATIC_MAX_AGE_SECONDS
+from .http_cache import COMPRESSIBLE_MIMETYPES, brotli, choose_encoding, compress
+
+# Files that get a content hash in their URL (and are cached for a year)
+FINGERPRINTED_EXTENSIONS = ('.css', '.js')
+
+# src="..." / href="..." references in HTML
+_REFERENCE = re.compile(r'''((?:src|href)=["'])([^"'#?]+)(["'])''')
+
+
+class StaticAssets:
+    """
+    In-memory copy of a frontend directory
+
+    CSS/JS files are also served under a fingerprinted name
+    (js/app.<hash>.js) with long-lived cache headers; HTML is rewritten to
+    reference those names and is always revalidated. Compressible files
+    are gzip/brotli-compressed once at build time.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._assets = {}
+        self._fingerprints = {}
+        self.build()
+
+    def build(self):
+        """(Re)load every file under root"""
+        assets = {}
+        fingerprints = {}
+        pages = []
+
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+
+                if path.endswith('.html'):
+                    pages.append((path, data))
+                    continue
+
+                assets[path] = self._asset(path, data, immutable=False)
+                if path.endswith(FINGERPRINTED_EXTENSIONS):
+                    stem, ext = os.path.splitext(path)
+                    digest = hashlib.sha256(data).hexdigest()[:10]
+                    fingerprinted = f'{stem}.{digest}{ext}'
+                    fingerprints[path] = fingerprinted
+                    assets[fingerprinted] = self._asset(path, data, immutable=True)
+
+        for path, data in pages:
+            base = os.path.dirname(path)
+
+            def rewrite(match):
+                target = os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, '/')
+                if target not in fingerprints:
+                    return match.group(0)
+                relative = os.path.relpath(fingerprints[target], base or '.').replace(os.sep, '/')
+                return match.group(1) + relative + match.group(3)
+
+            html = _REFERENCE.sub(rewrite, data.decode('utf-8')).encode('utf-8')
+            assets[path] = self._asset(path, html, immutable=False)
+
+        self._assets = assets
+        self._fingerprints = fingerprints
+
+    @staticmethod
+    def _asset(path: str, data: bytes, immutable: bool) -> Dict:
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        variants = {None: data}
+        if mimetype in COMPRESSIBLE_MIMETYPES and len(data) >= COMPRESSION_MIN_BYTES:
+            for encoding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+                body = compress(data, encoding)
+                if len(body) < len(data):
+                    variants[encoding] = body
+        return {
+            'mimetype': mimetype,
+            'variants': variants,
+            'etag': hashlib.sha256(data).hexdigest()[:20],
+            'immutable': immutable
+        }
+
+    def url_for(self, path: str) -> str:
+        """Fingerprinted path of an asset (the path itself if not fingerprinted)"""
+        return self._fingerprints.get(path, path)
+
+    def manifest(self) -> Dict[str, str]:
+        """Logical path -> fingerprinted path"""
+        return dict(self._fingerprints)
+
+    def serve(self, path: str):
+        """
+        Response for an asset
+
+        Returns:
+            Response (200 or 304), or None if the asset is unknown
+        """
+        asset = self._assets.get(path)
+        if asset is None:
+            return None
+
+        if request.if_none_match.contains_weak(asset['etag']):
+            response = current_app.response_class(status=304)
+        else:
+            encoding = choose_encoding() if len(asset['variants']) > 1 else None
+            if encoding not in asset['variants']:
+                encoding = None
+            response = current_app.response_class(asset['variants'][encoding],
+                                                  mimetype=asset['mimetype'])
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(asset['etag'], weak=True)
+        if len(asset['variants']) > 1:
+            response.vary.add('Accept-Encoding')
+        if asset['immutable']:
+            response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE_SECONDS}, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
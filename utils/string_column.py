@@ -0,0 +1,81 @@
+"""
+Immutable string column: one UTF-8 blob plus offsets
+Shared by ALL team members
+"""
+
+import numpy as np
+from typing import Iterable, List
+
+
+class StringColumn:
+    """
+    n strings stored as a uint8 blob and n + 1 int64 offsets
+
+    Both arrays can be memory-mapped, so a column of millions of strings
+    costs two mappings instead of millions of Python objects; strings are
+    decoded only when read.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        """
+        Args:
+            data: uint8 array with every string's UTF-8 bytes back to back
+            offsets: int64 array, string i is data[offsets[i]:offsets[i + 1]]
+        """
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringColumn":
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    @classmethod
+    def concat(cls, columns: List["StringColumn"]) -> "StringColumn":
+        """One column with the strings of every column, in order"""
+        data = [np.asarray(c.data[c.offsets[0]:c.offsets[-1]]) for c in columns]
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for c in columns:
+            offsets.append(c.offsets[1:] - c.offsets[0] + base)
+            base += int(c.offsets[-1] - c.offsets[0])
+        return cls(np.concatenate(data) if data else np.zeros(0, dtype=np.uint8),
+                   np.concatenate(offsets))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, rows: np.ndarray) -> "StringColumn":
+        """
+        New column with the given rows, in that order
+
+        Runs of consecutive rows are copied as one slice, so dropping a
+        few rows from a large (memory-mapped) column is cheap.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.offsets[rows + 1] - self.offsets[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        data = np.empty(int(offsets[-1]), dtype=np.uint8)
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        for a, b in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [len(rows)]))):
+            if a == b:
+                continue
+            data[offsets[a]:offsets[b]] = self.data[self.offsets[rows[a]]:self.offsets[rows[b - 1] + 1]]
+        return StringColumn(data, offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.data.nbytes + self.offsets.nbytes)
@@ -3,10 +3,13 @@ Vector operations for similarity computation
 Shared by ALL team members
 """
 
+import logging
 import numpy as np
 from typing import List, Tuple
 from config import VECTOR_DIMENSION
 
+logger = logging.getLogger(__name__)
+
 def normalize_vector(vector: List[float]) -> List[float]:
     """
     Normalize vector to unit length
@@ -83,7 +86,7 @@ def validate_vector(vector: List[float], name: str = "vector") -> bool:
     
     norm = np.linalg.norm(vector)
     if not (0.99 <= norm <= 1.01):
-        print(f"⚠️  Warning: {name} norm is {norm:.4f}, expected ~1.0 (not normalized)")
+        logger.warning("Vector is not normalized", extra={'vector': name, 'norm': round(float(norm), 4)})
     
     return True
 
@@ -111,4 +114,84 @@ def weighted_vector_update(old_vector: List[float],
     updated = (old * old_weight) + (new * new_weight)
     
     # Normalize
-    return normalize_vector(updated.tolist())
\ No newline at end of file
+    return normalize_vector(updated.tolist())
+
+def decayed_weighted_sum(accumulator: List[float],
+                         weight_sum: float,
+                         vectors: List[List[float]],
+                         weights: List[float],
+                         decay: float = 0.9) -> Tuple[List[float], float]:
+    """
+    Fold new vectors into a running recency-decayed weighted sum
+    Used by Person B for incremental profile updates
+    
+    Each new vector ages everything before it by `decay`, so folding
+    n vectors costs O(n * d) no matter how long the history is.
+    
+    Args:
+        accumulator: Current weighted sum (d floats)
+        weight_sum: Current sum of weights
+        vectors: New vectors, oldest first
+        weights: Weight of each new vector
+        decay: Factor applied to older entries per new vector
+    
+    Returns:
+        (updated accumulator, updated weight_sum)
+    """
+    acc = np.asarray(accumulator, dtype=np.float64)
+    n = len(vectors)
+    if n == 0:
+        return acc.tolist(), weight_sum
+    
+    # Vector i is aged by the n-1-i vectors that arrive after it
+    ages = decay ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    coeffs = ages * np.asarray(weights, dtype=np.float64)
+    
+    acc = acc * (decay ** n) + coeffs @ np.asarray(vectors, dtype=np.float64)
+    weight_sum = weight_sum * (decay ** n) + float(coeffs.sum())
+    
+    return acc.tolist(), weight_sum
+
+def mmr_select(relevance: np.ndarray,
+               vectors: np.ndarray,
+               k: int,
+               lambda_: float = 0.7) -> List[int]:
+    """
+    Maximal marginal relevance selection
+    
+    Greedily picks the item that best trades relevance against similarity
+    to the items already picked. The max-similarity of every item to the
+    selected set is updated with one matrix-vector product per pick, so
+    the cost is O(k * n * d).
+    
+    Args:
+        relevance: Relevance score per item (n)
+        vectors: Normalized item vectors (n x d)
+        k: Number of items to select
+        lambda_: 1.0 = pure relevance, 0.0 = pure diversity
+    
+    Returns:
+        Selected positions, in pick order
+    """
+    if not 0.0 <= lambda_ <= 1.0:
+        raise ValueError(f"lambda must be between 0 and 1, got {lambda_}")
+    
+    relevance = np.asarray(relevance, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    n = len(relevance)
+    k = min(k, n)
+    
+    selected = []
+    max_sim = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    
+    for _ in range(k):
+        mmr = lambda_ * relevance - (1.0 - lambda_) * max_sim
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, vectors @ vectors[best])
+    
+    return selected
@@ -0,0 +1,17 @@
+"""
+Production WSGI entry point
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is created once in the gunicorn master (preload_app = True): the
+embedding model, spaCy pipeline and question index are loaded before the
+workers fork, so every worker shares those pages copy-on-write instead of
+loading its own copy. Background threads do not survive fork; the
+post_fork hook in gunicorn.conf.py starts them in each worker.
+"""
+
+from app import create_app, start_background_tasks, stop_background_tasks
+
+app = create_app(preload=True)
+
+__all__ = ['app', 'start_background_tasks', 'stop_background_tasks']